@@ -1,6 +1,49 @@
 from django.apps import AppConfig
+from django.db import transaction
+from django.db.models.signals import post_migrate, post_save, post_delete
+
+
+def _install_search_index(sender, using, **kwargs):
+    from .search import install_search_index
+    install_search_index(using)
+
+
+def _release_key(model, key):
+    # A freed key goes to a duplicate spelling left without one (see Product.save)
+    if key is not None:
+        transaction.on_commit(lambda: model.objects.claim_key(key))
+
+
+def _product_deleted(sender, instance, **kwargs):
+    _release_key(sender, instance.canonical_barcode)
+
+
+def _product_saved(sender, instance, created, **kwargs):
+    if not created and instance.changed('canonical_barcode'):
+        _release_key(sender, instance.stored_value('canonical_barcode'))
 
 
 class InventoryConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "Inventory"
+
+    def ready(self):
+        from django.apps import apps
+        from . import autocomplete, reference_data
+
+        post_migrate.connect(_install_search_index, sender=self)
+
+        Product = self.get_model('Product')
+        post_save.connect(autocomplete.product_saved, sender=Product, dispatch_uid='autocomplete_product_saved')
+        post_delete.connect(autocomplete.product_deleted, sender=Product, dispatch_uid='autocomplete_product_deleted')
+        post_save.connect(_product_saved, sender=Product, dispatch_uid='product_release_key_saved')
+        post_delete.connect(_product_deleted, sender=Product, dispatch_uid='product_release_key_deleted')
+
+        for model in (self.get_model('Category'), self.get_model('Supplier'), apps.get_model('competitor', 'Competitor')):
+            post_save.connect(reference_data.shared_changed, sender=model,
+                              dispatch_uid=f'reference_data_{model._meta.model_name}_saved')
+            post_delete.connect(reference_data.shared_changed, sender=model,
+                                dispatch_uid=f'reference_data_{model._meta.model_name}_deleted')
+        Rack = self.get_model('Rack')
+        post_save.connect(reference_data.rack_changed, sender=Rack, dispatch_uid='reference_data_rack_saved')
+        post_delete.connect(reference_data.rack_changed, sender=Rack, dispatch_uid='reference_data_rack_deleted')
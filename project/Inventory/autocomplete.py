@@ -0,0 +1,239 @@
+# Inventory/autocomplete.py
+"""
+In-process autocomplete index behind product_search_api.
+
+Each worker keeps a sorted list of (term, barcode) pairs, where the terms of a
+product are the words of its normalised name + brand, its barcode and, for a
+GTIN, its canonical 14-digit form (see gtin.py), so any spelling of the code
+finds it. A prefix
+lookup is two bisects, so a keystroke never reaches the database.
+
+The index is built lazily on first use and kept current by Product
+post_save / post_delete signals (see InventoryConfig.ready); saves that leave
+the suggestion fields alone (prices, scrape dates) are ignored. Each change
+bumps a version counter in the shared cache (settings.CACHES) and, once the
+transaction commits, logs the product under the new version, so other workers
+catch up by re-reading only the logged products. A worker that falls behind
+by more than MAX_REPLAY versions, or finds a log entry missing, rebuilds.
+Writes that skip signals (bulk_create, queryset.update) must call
+invalidate(), which logs nothing and so makes every worker rebuild. The
+counter starts from a timestamp, so a flushed cache never hands out a version
+some worker has already built.
+"""
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import namedtuple
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .gtin import normalize_gtin
+from .search import normalize_search_text
+
+SUGGESTION_LIMIT = 20
+VERSION_KEY = 'inventory:autocomplete:version'
+CHANGE_KEY = 'inventory:autocomplete:change:{}'   # version -> (product id, barcode before the change)
+CHANGE_TTL = 60 * 60
+MAX_REPLAY = 1000
+
+# Product columns a Suggestion is built from
+FIELDS = ('barcode', 'name', 'brand', 'image_url', 'category_id')
+
+# Sorts after any character a term can hold
+_PREFIX_END = '\uffff'
+
+# `words` is ' <search_text> <barcode> [<gtin>]': a word-prefix test is one substring check
+Suggestion = namedtuple('Suggestion', 'barcode gtin name brand image_url category_id search_text terms words')
+
+
+def _suggestion(barcode, name, brand, image_url, category_id):
+    search_text = normalize_search_text(name, brand)
+    gtin = normalize_gtin(barcode)
+    codes = {barcode, gtin} - {None}
+    return Suggestion(barcode, gtin, name, brand, image_url, category_id, search_text,
+                      frozenset(search_text.split()) | codes, f' {search_text} {" ".join(sorted(codes))}')
+
+
+class AutocompleteIndex:
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._keys = []       # sorted [(term, barcode)]
+        self._products = {}   # barcode -> Suggestion
+        self.version = None   # shared version this index reflects; None = not built
+
+    @property
+    def built(self):
+        return self.version is not None
+
+    def build(self, version=0):
+        from .models import Product
+
+        products = {}
+        keys = []
+        rows = Product.objects.values_list(*FIELDS)
+        for row in rows.iterator(chunk_size=5000):
+            entry = _suggestion(*row)
+            products[entry.barcode] = entry
+            keys.extend((term, entry.barcode) for term in entry.terms)
+        keys.sort()
+
+        with self._lock:
+            self._products, self._keys = products, keys
+            self.version = version
+
+    def add(self, product, old_barcode=None):
+        """Indexes `product`, replacing its entry under `old_barcode` if the barcode changed."""
+        self.put(_suggestion(*(getattr(product, field) for field in FIELDS)), old_barcode)
+
+    def put(self, entry, old_barcode=None):
+        with self._lock:
+            if old_barcode is not None:
+                self.discard(old_barcode)
+            self.discard(entry.barcode)
+            self._products[entry.barcode] = entry
+            for term in entry.terms:
+                insort(self._keys, (term, entry.barcode))
+
+    def replay(self, changes):
+        """Applies logged (product id, old barcode) changes from the products' current rows."""
+        from .models import Product
+
+        rows = Product.objects.filter(pk__in={pk for pk, _old in changes}).values_list(*FIELDS)
+        with self._lock:
+            for _pk, old_barcode in changes:
+                self.discard(old_barcode)
+            for row in rows:
+                self.put(_suggestion(*row))
+
+    def discard(self, barcode):
+        with self._lock:
+            entry = self._products.pop(barcode, None)
+            if entry is None:
+                return
+            for term in entry.terms:
+                i = bisect_left(self._keys, (term, barcode))
+                if i < len(self._keys) and self._keys[i] == (term, barcode):
+                    del self._keys[i]
+
+    def _range(self, prefix):
+        return (bisect_left(self._keys, (prefix,)),
+                bisect_left(self._keys, (prefix + _PREFIX_END,)))
+
+    def suggest(self, query, limit=SUGGESTION_LIMIT, category_id=None):
+        """
+        Products whose terms start with every word of `query`.
+
+        Candidates come from the narrowest word's prefix range, which lists
+        shorter (closer) completions first; the first `limit` matches are then
+        ranked exact barcode > barcode prefix > name prefix > other.
+        """
+        raw = (query or '').strip()
+        tokens = normalize_search_text(raw).split()
+        if not tokens:
+            return []
+
+        needles = [f' {t}' for t in tokens]
+        matches = []
+        with self._lock:
+            lo, hi = min((self._range(t) for t in tokens), key=lambda r: r[1] - r[0])
+            seen = set()
+            for i in range(lo, hi):
+                barcode = self._keys[i][1]
+                if barcode in seen:
+                    continue
+                seen.add(barcode)
+                entry = self._products[barcode]
+                if category_id is not None and entry.category_id != category_id:
+                    continue
+                if all(n in entry.words for n in needles):
+                    matches.append(entry)
+                    if len(matches) >= limit:
+                        break
+
+        normalized = ' '.join(tokens)
+        gtin = normalize_gtin(raw)
+
+        def rank(entry):
+            if entry.barcode == raw or (gtin is not None and entry.gtin == gtin):
+                return 0
+            if entry.barcode.startswith(raw):
+                return 1
+            if entry.search_text.startswith(normalized):
+                return 2
+            return 3
+
+        return sorted(matches, key=lambda e: (rank(e), e.name.lower(), e.barcode))
+
+
+_index = AutocompleteIndex()
+
+
+def _shared_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(VERSION_KEY, 0)
+    return version
+
+
+def _bump_version():
+    """Bumps the shared version and returns the new one."""
+    current = _shared_version()
+    try:
+        return cache.incr(VERSION_KEY)
+    except ValueError:  # evicted between add() and incr()
+        cache.set(VERSION_KEY, current + 1, timeout=None)
+        return current + 1
+
+
+def _catch_up(version):
+    """Replays the logged changes since the index's version; False if some are missing."""
+    if _index.version is None or not 0 < version - _index.version <= MAX_REPLAY:
+        return False
+    keys = [CHANGE_KEY.format(v) for v in range(_index.version + 1, version + 1)]
+    changes = cache.get_many(keys)
+    if len(changes) != len(keys):
+        return False
+    _index.replay([changes[key] for key in keys])
+    _index.version = version
+    return True
+
+
+def autocomplete_index():
+    """The worker's index, caught up or (re)built if missing or behind the shared version."""
+    version = _shared_version()
+    if _index.version != version and not _catch_up(version):
+        _index.build(version)
+    return _index
+
+
+def invalidate():
+    """Forces every worker to rebuild on its next lookup."""
+    _bump_version()
+    _index.version = None
+
+
+def _publish(product_id, old_barcode, apply):
+    # After commit, so no worker replays the change before it can read it
+    def publish():
+        version = _bump_version()
+        cache.set(CHANGE_KEY.format(version), (product_id, old_barcode), CHANGE_TTL)
+        if _index.built and _index.version == version - 1:
+            apply()
+            _index.version = version
+    transaction.on_commit(publish)
+
+
+def product_saved(sender, instance, created, **kwargs):
+    if not created and not instance.changed(*FIELDS):
+        return
+    old_barcode = None if created else instance.stored_value('barcode')
+    entry = _suggestion(*(getattr(instance, field) for field in FIELDS))
+    _publish(instance.pk, old_barcode, lambda: _index.put(entry, old_barcode))
+
+
+def product_deleted(sender, instance, **kwargs):
+    barcode = instance.barcode
+    _publish(instance.pk, barcode, lambda: _index.discard(barcode))
@@ -0,0 +1,256 @@
+# Inventory/bulk_import.py
+import csv
+import io
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+
+from .gtin import canonical_barcode
+from .models import Product, ProductPrice, Rack, Category, InventoryItem
+
+try:  # XLSX support is optional
+    import openpyxl
+except ImportError:  # pragma: no cover
+    openpyxl = None
+
+
+# Max number of values in one `__in` lookup (keeps SQLite under its variable limit)
+IN_CHUNK = 900
+
+# Accepted header aliases -> canonical column name
+COLUMN_ALIASES = {
+    'barcode': 'barcode', 'ean': 'barcode', 'gtin': 'barcode',
+    'quantity': 'quantity', 'qty': 'quantity',
+    'expiry_date': 'expiry_date', 'expiry': 'expiry_date', 'dlc': 'expiry_date',
+    'store_price': 'store_price', 'price': 'store_price',
+    'rack': 'rack', 'category': 'category',
+    'manufacture_date': 'manufacture_date',
+}
+
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%d.%m.%Y')
+
+NOT_UTF8 = "The file is not UTF-8 text. Save it as \"CSV UTF-8\" and upload it again."
+
+
+class ImportFileError(Exception):
+    """Raised when the uploaded file itself cannot be read."""
+
+
+def chunked(values, size=IN_CHUNK):
+    values = list(values)
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def parse_date(value):
+    if value in (None, ''):
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    value = str(value).strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Invalid date '{value}'")
+
+
+def parse_price(value):
+    if value in (None, ''):
+        return None
+    try:
+        return Decimal(str(value).strip().replace(',', '.')).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        raise ValueError(f"Invalid price '{value}'")
+
+
+def parse_quantity(value):
+    """'3', '3.0', 3.0 (XLSX cells) -> 3; '2.7' or 'x' raise ValueError."""
+    if value in (None, ''):
+        return 1
+    try:
+        quantity = Decimal(str(value).strip().replace(',', '.'))
+    except InvalidOperation:
+        raise ValueError(f"Invalid quantity '{value}'")
+    if not quantity.is_finite() or quantity != quantity.to_integral_value():
+        raise ValueError(f"Invalid quantity '{value}'")
+    return int(quantity)
+
+
+def _normalise_header(header, aliases):
+    return [aliases.get(str(h or '').strip().lower()) for h in header]
+
+
+def iter_rows(uploaded_file, required=('barcode', 'expiry_date'), aliases=COLUMN_ALIASES):
+    """
+    Streams (line_number, row_dict) from a CSV or XLSX upload without
+    loading the whole file into memory.
+    """
+    name = (getattr(uploaded_file, 'name', '') or '').lower()
+
+    if name.endswith('.xlsx'):
+        if openpyxl is None:
+            raise ImportFileError("XLSX import requires openpyxl to be installed.")
+        wb = openpyxl.load_workbook(uploaded_file, read_only=True, data_only=True)
+        rows = wb.active.iter_rows(values_only=True)
+    else:
+        text = io.TextIOWrapper(uploaded_file, encoding='utf-8-sig', newline='')
+        try:
+            sample = text.read(4096)
+        except UnicodeDecodeError:
+            raise ImportFileError(NOT_UTF8)
+        text.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+        except csv.Error:
+            dialect = csv.excel
+        rows = csv.reader(text, dialect)
+
+    try:
+        header = _normalise_header(next(rows), aliases)
+    except StopIteration:
+        raise ImportFileError("The file is empty.")
+    except UnicodeDecodeError:
+        raise ImportFileError(NOT_UTF8)
+
+    missing = [col for col in required if col not in header]
+    if missing:
+        raise ImportFileError(f"The file must have the column(s): {', '.join(missing)}.")
+
+    try:
+        for line_no, values in enumerate(rows, start=2):
+            if not values or all(v in (None, '') for v in values):
+                continue
+            yield line_no, {col: val for col, val in zip(header, values) if col}
+    except UnicodeDecodeError:  # past the sample: decoded in blocks, so no reliable line number
+        raise ImportFileError(NOT_UTF8)
+
+
+def import_inventory_file(supermarket, uploaded_file):
+    """
+    Bulk-imports a supplier delivery note into a supermarket's inventory.
+
+    1. Streams and validates every line (no DB access).
+    2. Resolves products, ProductPrice defaults, racks and categories with
+       one query per table (chunked `__in` lookups).
+    3. Merges lines that target the same batch, then adds their quantities
+       with InventoryItemManager.add_quantities: the same key-based upsert as
+       a scan, so a scan of one of the batches during the import is neither
+       lost nor turned into an IntegrityError.
+
+    Returns a report dict: created / updated / lines_ok / errors [(line, message)].
+    """
+    parsed = []
+    errors = []
+
+    for line_no, row in iter_rows(uploaded_file):
+        barcode = str(row.get('barcode') or '').strip()
+        if not barcode:
+            errors.append((line_no, "Missing barcode."))
+            continue
+        try:
+            expiry_date = parse_date(row.get('expiry_date'))
+            if expiry_date is None:
+                raise ValueError("Missing expiry date.")
+            quantity = parse_quantity(row.get('quantity'))
+            if quantity <= 0:
+                raise ValueError("Quantity must be positive.")
+            parsed.append({
+                'line': line_no,
+                'barcode': barcode,
+                'quantity': quantity,
+                'expiry_date': expiry_date,
+                'manufacture_date': parse_date(row.get('manufacture_date')),
+                'store_price': parse_price(row.get('store_price')),
+                'rack': str(row.get('rack') or '').strip(),
+                'category': str(row.get('category') or '').strip(),
+            })
+        except (TypeError, ValueError) as e:
+            errors.append((line_no, str(e)))
+
+    # --- Set-based resolution ---
+    barcodes = {canonical_barcode(r['barcode']) for r in parsed}
+
+    products = {}  # canonical barcode -> product
+    for chunk in chunked(barcodes):
+        products.update(Product.objects.only('barcode', 'category_id').in_bulk(chunk, field_name='canonical_barcode'))
+
+    defaults = {}
+    for chunk in chunked([product.pk for product in products.values()]):
+        for pp in ProductPrice.objects.filter(supermarket=supermarket, product_id__in=chunk).only(
+                'product_id', 'price', 'default_category_id', 'default_rack_id'):
+            defaults[pp.product_id] = pp
+
+    racks = dict(Rack.objects.filter(supermarket=supermarket).values_list('name', 'id'))
+    categories = dict(Category.objects.values_list('name', 'id'))
+
+    # --- Build batches, merging duplicate lines ---
+    batches = {}
+    lines_ok = 0
+    for r in parsed:
+        product = products.get(canonical_barcode(r['barcode']))
+        if product is None:
+            errors.append((r['line'], f"Unknown product '{r['barcode']}'."))
+            continue
+
+        rack_id = None
+        if r['rack']:
+            rack_id = racks.get(r['rack'])
+            if rack_id is None:
+                errors.append((r['line'], f"Unknown rack '{r['rack']}'."))
+                continue
+
+        category_id = None
+        if r['category']:
+            category_id = categories.get(r['category'])
+            if category_id is None:
+                errors.append((r['line'], f"Unknown category '{r['category']}'."))
+                continue
+
+        # Same fallback order as scan_api / add_inventory_from_product_list
+        store_price = r['store_price']
+        entry = defaults.get(product.pk)
+        if entry:
+            if store_price is None:
+                store_price = entry.price
+            if category_id is None:
+                category_id = entry.default_category_id
+            if rack_id is None:
+                rack_id = entry.default_rack_id
+        if category_id is None:
+            category_id = product.category_id
+
+        key = (product.pk, r['expiry_date'], rack_id, store_price)
+        batch = batches.get(key)
+        if batch is None:
+            batches[key] = {
+                'quantity': r['quantity'],
+                'category_id': category_id,
+                'manufacture_date': r['manufacture_date'],
+            }
+        else:
+            batch['quantity'] += r['quantity']
+        lines_ok += 1
+
+    created = updated = 0
+    if batches:
+        with transaction.atomic():
+            results = InventoryItem.objects.add_quantities(supermarket, [
+                {'product_id': product_id, 'expiry_date': expiry_date, 'rack_id': rack_id,
+                 'store_price': store_price, **batch}
+                for (product_id, expiry_date, rack_id, store_price), batch in batches.items()
+            ])
+        created = sum(new for _item_id, new in results)
+        updated = len(results) - created
+
+    errors.sort()
+    return {
+        'created': created,
+        'updated': updated,
+        'lines_ok': lines_ok,
+        'errors': errors,
+    }
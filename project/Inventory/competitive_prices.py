@@ -0,0 +1,53 @@
+# Inventory/competitive_prices.py
+"""
+Data for the competitor price dashboard.
+
+competitive_prices() is one grouped query over the products stocked by a
+store: its own price (price list first, else the earliest-expiring batch
+with a price) next to the average / lowest competitor price. The view
+paginates it, and attach_competitors() then loads the competitor rows of
+the visible page in a single query.
+"""
+from django.db.models import Avg, Count, DecimalField, Exists, ExpressionWrapper, F, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from pricing.models import CompetitorPrice
+from .models import InventoryItem, Product, ProductPrice
+
+PAGE_SIZE = 50
+
+PRICE_FIELD = DecimalField(max_digits=10, decimal_places=2)
+
+
+def competitive_prices(supermarket):
+    """Products in stock at `supermarket`, annotated with store_price, avg_price, min_price,
+    competitor_count and difference (store_price - avg_price), ordered by name."""
+    in_stock = InventoryItem.objects.filter(supermarket=supermarket, product=OuterRef('pk'))
+    listed_price = (ProductPrice.objects
+                    .filter(supermarket=supermarket, product=OuterRef('pk'), price__isnull=False)
+                    .values('price')[:1])
+    batch_price = in_stock.filter(store_price__isnull=False).order_by('expiry_date', 'pk').values('store_price')[:1]
+
+    return (Product.objects
+            .filter(Exists(in_stock))
+            .only('barcode', 'name', 'brand', 'image_url')
+            .annotate(store_price=Coalesce(Subquery(listed_price), Subquery(batch_price), output_field=PRICE_FIELD),
+                      avg_price=Avg('competitor_prices__price', output_field=PRICE_FIELD),
+                      min_price=Min('competitor_prices__price'),
+                      competitor_count=Count('competitor_prices'))
+            .annotate(difference=ExpressionWrapper(F('store_price') - F('avg_price'), output_field=PRICE_FIELD))
+            .order_by('name', 'pk'))
+
+
+def attach_competitors(products):
+    """Sets product.competitors (cheapest first) on each product of a page, in one query."""
+    by_product = {product.pk: product for product in products}
+    for product in by_product.values():
+        product.competitors = []
+    rows = (CompetitorPrice.objects
+            .filter(product_id__in=by_product)
+            .order_by('product_id', 'price', 'competitor_name')
+            .only('product_id', 'competitor_name', 'price', 'url', 'scraped_at'))
+    for row in rows:
+        by_product[row.product_id].competitors.append(row)
+    return products
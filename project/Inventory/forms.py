@@ -64,6 +64,16 @@ class ProductForm(forms.ModelForm):
             self.fields['barcode'].widget.attrs['readonly'] = True
             self.fields['barcode'].widget.attrs['class'] += ' bg-gray-100 cursor-not-allowed'
 
+    def clean_barcode(self):
+        # '036000291452' and '0036000291452' are the same item: check the canonical key too
+        barcode = self.cleaned_data['barcode']
+        existing = Product.objects.for_barcode(barcode).exclude(pk=self.instance.pk).first()
+        if existing:
+            raise forms.ValidationError(
+                f"This barcode is already registered as '{existing.barcode}' ({existing.name})."
+            )
+        return barcode
+
 class RackForm(forms.ModelForm):
     class Meta:
         model = Rack
@@ -80,3 +90,16 @@ class RackForm(forms.ModelForm):
                 'placeholder': 'e.g., Frozen Goods Section'
             }),
         }
+
+
+class InventoryImportForm(forms.Form):
+    """
+    Upload form for a supplier delivery note (CSV or XLSX).
+    """
+    file = forms.FileField(
+        help_text="Columns: barcode, quantity, expiry_date, store_price, rack, category, manufacture_date",
+        widget=forms.FileInput(attrs={
+            'class': 'w-full text-sm text-gray-500 file:mr-4 file:py-2 file:px-4 file:rounded-full file:border-0 file:text-sm file:font-semibold file:bg-blue-50 file:text-blue-700 hover:file:bg-blue-100',
+            'accept': '.csv,.xlsx',
+        })
+    )
@@ -0,0 +1,76 @@
+# Inventory/gtin.py
+"""
+Canonical form of scanned barcodes.
+
+The same trade item reaches us as EAN-8, UPC-A (12 digits), EAN-13 or
+GTIN-14, with or without leading zeros, depending on the scanner, the
+supplier file or the person typing it. canonical_barcode() maps every
+spelling of a valid GTIN to one 14-digit string (zero-padded on the left,
+check digit verified); anything else (internal codes, Code 128 labels,
+typos with a wrong check digit) is kept as typed, minus surrounding
+whitespace.
+
+Product.canonical_barcode and the canonical_*_barcode columns of
+ProductPackaging store that value under an index, so a lookup by any
+spelling of a code is a single index probe.
+"""
+GTIN_LENGTH = 14
+
+# Shortest code accepted as a GTIN: an EAN-8. Shorter numbers are store
+# codes (PLUs, internal references) and are never padded.
+MIN_GTIN_LENGTH = 8
+
+
+def gtin_check_digit(digits):
+    """GS1 mod-10 check digit for `digits` (every digit of the GTIN but the last)."""
+    total = sum(int(d) * (3 if i % 2 == 0 else 1) for i, d in enumerate(reversed(digits)))
+    return str(-total % 10)
+
+
+def normalize_gtin(code):
+    """
+    '036000291452' (UPC-A), '0036000291452' (EAN-13) -> '00036000291452';
+    None if `code` is not a GTIN with a valid check digit.
+    """
+    code = (code or '').strip()
+    if not code.isascii() or not code.isdigit() or len(code) < MIN_GTIN_LENGTH:
+        return None
+    significant = code.lstrip('0')
+    if len(significant) > GTIN_LENGTH or len(significant) < 2:
+        return None
+    if significant[-1] != gtin_check_digit(significant[:-1]):
+        return None
+    return significant.zfill(GTIN_LENGTH)
+
+
+def canonical_barcode(code):
+    """The key a code is stored and looked up under: its GTIN-14, or the code itself."""
+    return normalize_gtin(code) or (code or '').strip()
+
+
+def spellings(key):
+    """
+    Every barcode canonical_barcode() maps to `key` (surrounding whitespace aside):
+    '00036000291452' -> ['36000291452', '036000291452', '0036000291452', '00036000291452'].
+    """
+    if normalize_gtin(key) != key:
+        return [key]
+    significant = key.lstrip('0')
+    return [significant.zfill(n) for n in range(max(MIN_GTIN_LENGTH, len(significant)), GTIN_LENGTH + 1)]
+
+
+def external_barcode(code):
+    """
+    The spelling product databases and retailer sites index a code under:
+    EAN-13 for GTINs that fit in 13 digits (UPC-A gains its leading zero),
+    EAN-8 kept at 8 digits, GTIN-14 for real case codes. Other codes are
+    returned as typed.
+    """
+    gtin = normalize_gtin(code)
+    if gtin is None:
+        return (code or '').strip()
+    if gtin.startswith('000000'):
+        return gtin[-8:]
+    if gtin.startswith('0'):
+        return gtin[-13:]
+    return gtin
@@ -0,0 +1,68 @@
+# Inventory/hot_queries.py
+"""
+Registry of the InventoryItem queries the busiest pages run.
+
+Each entry calls the service its views call, for one store and day;
+`manage.py explain_hot_queries` records the SQL the call sends, EXPLAINs
+every statement that reads the inventory table and fails if the database
+would read the whole table for any of them. Because the entries run the
+views' own code, a change to a service is planned as it ships. Register an
+entry here when a view starts reading InventoryItem through a new service,
+so a missing index shows up before it shows up in production.
+"""
+from django.db.models import Sum
+
+from .models import InventoryItem, Product, Supermarket
+from .stock_status import keyset_page, status_case, status_counts
+from .urgent_items import urgent_items
+
+HOT_QUERIES = {}
+
+
+def hot_query(name):
+    """Registers `builder(supermarket, product, today)` under `name`; the builder runs the queries."""
+    def register(builder):
+        HOT_QUERIES[name] = builder
+        return builder
+    return register
+
+
+@hot_query('urgent_items')
+def urgent(supermarket, product, today):
+    # Both alert monitors and both "Urgent Attention" APIs
+    urgent_items(supermarket, today)
+
+
+@hot_query('status_counts')
+def counts(supermarket, product, today):
+    # Both dashboard_stats_api views, the analytics dashboard and expiry detail
+    status_counts(supermarket.inventory_items.all(), today, quantity=Sum('quantity'))
+
+
+@hot_query('inventory_list_page')
+def inventory_list_page(supermarket, product, today):
+    inventory_items = InventoryItem.objects.for_list(supermarket)
+    status_counts(inventory_items, today)
+    page = keyset_page(inventory_items.annotate(stock_status=status_case(today)))
+    # The "next page" query, starting from a cursor
+    keyset_page(inventory_items.annotate(stock_status=status_case(today)), after=page.next_cursor or f'{today}_0')
+
+
+@hot_query('expired_products')
+def expired_products(supermarket, product, today):
+    list(InventoryItem.objects.expired(supermarket, today))
+
+
+@hot_query('product_batches')
+def product_batches(supermarket, product, today):
+    # scan_api and product_detail_view
+    list(InventoryItem.objects.product_batches(supermarket, product))
+
+
+def sample(supermarket_id=None):
+    """(supermarket, product) to plan for; unsaved stand-ins when the database is empty."""
+    supermarket = (Supermarket.objects.filter(pk=supermarket_id).first() if supermarket_id
+                   else Supermarket.objects.order_by('pk').first()) or Supermarket(pk=supermarket_id or 1)
+    product = (Product.objects.filter(inventory_instances__supermarket=supermarket).first()
+               or Product(pk=0))
+    return supermarket, product
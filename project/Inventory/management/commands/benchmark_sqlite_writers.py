@@ -0,0 +1,111 @@
+import multiprocessing
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# What Django does without a profile: rollback journal, full fsync, 5 s busy
+# timeout (sqlite3 module default), deferred transactions
+BASELINE = {
+    'pragmas': {'journal_mode': 'DELETE', 'synchronous': 'FULL'},
+    'transaction_mode': 'DEFERRED',
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS stock (
+    id INTEGER PRIMARY KEY,
+    supermarket_id INTEGER NOT NULL,
+    product_id INTEGER NOT NULL,
+    expiry_date TEXT NOT NULL,
+    quantity INTEGER NOT NULL,
+    UNIQUE (supermarket_id, product_id, expiry_date)
+);
+CREATE INDEX IF NOT EXISTS stock_store_expiry ON stock (supermarket_id, expiry_date);
+"""
+
+
+def _connect(path, profile):
+    conn = sqlite3.connect(path, timeout=5, isolation_level=None)
+    for name, value in profile['pragmas'].items():
+        conn.execute(f'PRAGMA {name}={value}')
+    return conn
+
+
+def _scan(conn, profile, rng, products):
+    """One scan-to-stock write, shaped like scan_api's add: look up the batch, then bump or insert it."""
+    product = rng.randrange(products)
+    expiry = f'2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}'
+    conn.execute(f'BEGIN {profile["transaction_mode"]}')
+    try:
+        row = conn.execute('SELECT id FROM stock WHERE supermarket_id = 1 AND product_id = ? AND expiry_date = ?',
+                           (product, expiry)).fetchone()
+        if row:
+            conn.execute('UPDATE stock SET quantity = quantity + 1 WHERE id = ?', row)
+        else:
+            conn.execute('INSERT INTO stock (supermarket_id, product_id, expiry_date, quantity) VALUES (1, ?, ?, 1)',
+                         (product, expiry))
+        conn.execute('COMMIT')
+    except sqlite3.Error:
+        conn.execute('ROLLBACK')
+        raise
+
+
+def _writer(args):
+    path, profile, scans, products, seed = args
+    rng = random.Random(seed)
+    conn = _connect(path, profile)
+    done = locked = 0
+    started = time.time()
+    for _ in range(scans):
+        try:
+            _scan(conn, profile, rng, products)
+            done += 1
+        except sqlite3.OperationalError as exc:
+            if 'locked' not in str(exc) and 'busy' not in str(exc):
+                raise
+            locked += 1
+    conn.close()
+    return done, locked, started, time.time()
+
+
+def run_profile(profile, writers, scans, products):
+    """(seconds, committed scans, 'database is locked' failures) for `writers` processes."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.sqlite3')
+        conn = _connect(path, profile)
+        conn.executescript(SCHEMA)
+        conn.close()
+
+        jobs = [(path, profile, scans, products, seed) for seed in range(writers)]
+        with multiprocessing.get_context('spawn').Pool(writers) as pool:
+            results = pool.map(_writer, jobs)
+    # Process start-up is left out: from the first writer starting to the last one finishing
+    elapsed = max(r[3] for r in results) - min(r[2] for r in results)
+    return elapsed, sum(r[0] for r in results), sum(r[1] for r in results)
+
+
+class Command(BaseCommand):
+    help = ("Scan-write throughput with N parallel writer processes on a scratch SQLite file, "
+            "Django's defaults against the SQLITE_PRAGMAS profile from settings.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, nargs='+', default=[1, 4, 8])
+        parser.add_argument('--scans', type=int, default=500, help='Scans per writer')
+        parser.add_argument('--products', type=int, default=2000)
+
+    def handle(self, *args, **opts):
+        tuned = {
+            'pragmas': settings.SQLITE_PRAGMAS,
+            'transaction_mode': settings.DATABASES['default'].get('OPTIONS', {}).get('transaction_mode') or 'DEFERRED',
+        }
+        self.stdout.write(f"profile: {', '.join(f'{k}={v}' for k, v in tuned['pragmas'].items())}, "
+                          f"BEGIN {tuned['transaction_mode']}")
+        self.stdout.write(f"{'writers':>7}  {'profile':<8} {'scans/s':>9} {'committed':>10} {'locked':>7} {'time':>7}")
+        for writers in opts['writers']:
+            for label, profile in (('baseline', BASELINE), ('tuned', tuned)):
+                elapsed, done, locked = run_profile(profile, writers, opts['scans'], opts['products'])
+                self.stdout.write(f'{writers:>7}  {label:<8} {done / elapsed:>9.0f} {done:>10} {locked:>7} {elapsed:>6.2f}s')
@@ -0,0 +1,79 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from Inventory.hot_queries import HOT_QUERIES, sample
+from Inventory.models import InventoryItem
+
+
+def full_scans(plan, table):
+    """Lines of an EXPLAIN output that read every row of `table`."""
+    if connection.vendor == 'postgresql':
+        pattern = re.compile(rf'Seq Scan on "?{re.escape(table)}"?\b', re.IGNORECASE)
+    else:
+        # SQLite: "SCAN t" is a full table scan; "SCAN t USING [COVERING] INDEX" walks a whole index
+        pattern = re.compile(rf'\bSCAN "?{re.escape(table)}"?(\s+AS\s+\S+)?(\s+USING\s+(COVERING\s+)?INDEX\b.*)?$')
+    return [line.strip() for line in plan.splitlines() if pattern.search(line.strip())]
+
+
+def reads_table(sql, table):
+    """Whether a captured statement reads `table`."""
+    return sql.lstrip().upper().startswith('SELECT') and re.search(rf'\bFROM "?{re.escape(table)}"?', sql) is not None
+
+
+def explain(sql):
+    """The database's plan for a captured statement, one step per line."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'EXPLAIN {sql}')
+            return '\n'.join(row[0] for row in cursor.fetchall())
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return '\n'.join(row[-1] for row in cursor.fetchall())
+
+
+class Command(BaseCommand):
+    help = ("Run every entry registered in Inventory/hot_queries.py, EXPLAIN the inventory queries "
+            "it sends and fail if any of them scans the whole inventory table.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--supermarket', type=int, help='Supermarket id to plan for (default: the first one)')
+        parser.add_argument('--verbose-plans', action='store_true', help='Print the full plan of every query')
+
+    def handle(self, *args, **opts):
+        supermarket, product = sample(opts['supermarket'])
+        today = timezone.localdate()
+        table = InventoryItem._meta.db_table
+
+        failed = []
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                # Small tables make the planner prefer a seq scan; ask whether an index *can* be used
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+
+            for name, builder in HOT_QUERIES.items():
+                with CaptureQueriesContext(connection) as captured:
+                    builder(supermarket, product, today)
+                statements = [query['sql'] for query in captured.captured_queries if reads_table(query['sql'], table)]
+                if not statements:
+                    raise CommandError(f'{name} sent no query to {table}')
+                plan = '\n'.join(explain(sql) for sql in statements)
+                scans = full_scans(plan, table)
+                if scans:
+                    failed.append(name)
+                    self.stdout.write(self.style.ERROR(f'FULL SCAN  {name}'))
+                    for line in scans:
+                        self.stdout.write(f'    {line}')
+                else:
+                    self.stdout.write(self.style.SUCCESS(f'ok         {name}'))
+                if opts['verbose_plans']:
+                    for line in plan.splitlines():
+                        self.stdout.write(f'    {line}')
+
+        if failed:
+            raise CommandError(f'{len(failed)} hot quer{"y" if len(failed) == 1 else "ies"} '
+                               f'fall back to a full scan: {", ".join(failed)}')
+        self.stdout.write(self.style.SUCCESS(f'All {len(HOT_QUERIES)} hot queries use an index.'))
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:01
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+
+def normalize_search_text(*parts):
+    # Frozen copy of Inventory.search.normalize_search_text as of this migration;
+    # later changes to that function must not rewrite history
+    text = ' '.join(str(p) for p in parts if p).lower()
+    text = ''.join(ch for ch in unicodedata.normalize('NFKD', text) if not unicodedata.combining(ch))
+    text = re.sub(r'[^a-z0-9\s]+', ' ', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def fill_search_text(apps, schema_editor):
+    Product = apps.get_model('Inventory', 'Product')
+    batch = []
+    for product in Product.objects.only('barcode', 'name', 'brand').iterator(chunk_size=2000):
+        product.search_text = normalize_search_text(product.name, product.brand)
+        batch.append(product)
+        if len(batch) >= 2000:
+            Product.objects.bulk_update(batch, ['search_text'])
+            batch = []
+    Product.objects.bulk_update(batch, ['search_text'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Inventory', '0003_alter_productprice_price'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_text',
+            field=models.CharField(blank=True, default='', editable=False, max_length=410),
+        ),
+        migrations.RunPython(fill_search_text, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Inventory', '0004_product_search_text'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='suggested_price',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='Price proposed by the applied pricing rule or promotion.', max_digits=10, null=True),
+        ),
+    ]
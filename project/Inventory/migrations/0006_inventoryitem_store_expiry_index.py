@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Inventory', '0005_inventoryitem_suggested_price'),
+        ('pricing', '0006_repricing_audit'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(fields=['supermarket', 'expiry_date'], name='Inventory_i_superma_c83eee_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:34
+
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+def merge_duplicate_batches(apps, schema_editor):
+    """
+    The old unique_together let batches without a rack or price repeat
+    (NULLs never collide); fold each group into its oldest row first.
+    """
+    InventoryItem = apps.get_model('Inventory', 'InventoryItem')
+    keep = {}
+    for item in InventoryItem.objects.order_by('pk').iterator():
+        key = (item.supermarket_id, item.product_id, item.expiry_date, item.rack_id, item.store_price)
+        first = keep.setdefault(key, item)
+        if first is not item:
+            first.quantity += item.quantity
+            first.save(update_fields=['quantity'])
+            item.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Inventory', '0006_inventoryitem_store_expiry_index'),
+        ('pricing', '0006_repricing_audit'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_batches, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='inventoryitem',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='inventoryitem',
+            constraint=models.UniqueConstraint(models.F('supermarket'), models.F('product'), models.F('expiry_date'), django.db.models.functions.comparison.Coalesce(models.F('rack'), models.Value(0)), django.db.models.functions.comparison.Coalesce(models.F('store_price'), models.Value(-1), output_field=models.DecimalField()), name='inventory_item_unique_batch'),
+        ),
+    ]
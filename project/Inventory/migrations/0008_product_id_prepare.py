@@ -0,0 +1,93 @@
+"""
+Step 1 of moving Product from its barcode primary key to an integer id.
+
+Numbers every product into a plain `id` column, then detaches everything in
+this app that points at Product by barcode: the InventoryItem/ProductPrice
+foreign keys become integer `product_ref` columns and Product.suppliers is
+parked in a scratch table. The other apps do the same in their own
+`*_product_ref` migrations; 0009 then swaps the primary key and turns every
+reference back into a real foreign key.
+"""
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+BATCH_SIZE = 2000
+
+
+def number_products(apps, schema_editor):
+    Product = apps.get_model('Inventory', 'Product')
+    barcodes = list(Product.objects.order_by('barcode').values_list('barcode', flat=True))
+    for start in range(0, len(barcodes), BATCH_SIZE):
+        Product.objects.bulk_update(
+            [Product(barcode=barcode, id=start + n + 1) for n, barcode in enumerate(barcodes[start:start + BATCH_SIZE])],
+            ['id'], batch_size=BATCH_SIZE,
+        )
+
+
+def fill_product_refs(apps, schema_editor):
+    Product = apps.get_model('Inventory', 'Product')
+    product_id = Subquery(Product.objects.filter(barcode=OuterRef('product_id')).values('id')[:1])
+    for model_name in ('InventoryItem', 'ProductPrice'):
+        apps.get_model('Inventory', model_name).objects.update(product_ref=product_id)
+
+    ProductSupplierRef = apps.get_model('Inventory', 'ProductSupplierRef')
+    links = Product.suppliers.through.objects.values_list('product__id', 'supplier_id')
+    ProductSupplierRef.objects.bulk_create(
+        [ProductSupplierRef(product_ref=product_ref, supplier_id=supplier_id) for product_ref, supplier_id in links],
+        batch_size=BATCH_SIZE,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Inventory', '0007_inventoryitem_unique_batch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='id',
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.RunPython(number_products),
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='product_ref',
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='productprice',
+            name='product_ref',
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.CreateModel(
+            name='ProductSupplierRef',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('product_ref', models.BigIntegerField()),
+                ('supplier', models.ForeignKey(on_delete=models.deletion.CASCADE, to='Inventory.supplier')),
+            ],
+        ),
+        migrations.RunPython(fill_product_refs),
+        migrations.RemoveConstraint(
+            model_name='inventoryitem',
+            name='inventory_item_unique_batch',
+        ),
+        migrations.AlterUniqueTogether(
+            name='productprice',
+            unique_together=set(),
+        ),
+        migrations.RemoveField(
+            model_name='inventoryitem',
+            name='product',
+        ),
+        migrations.RemoveField(
+            model_name='productprice',
+            name='product',
+        ),
+        migrations.RemoveField(
+            model_name='product',
+            name='suppliers',
+        ),
+    ]
@@ -0,0 +1,86 @@
+"""
+Step 2 of moving Product to an integer id (see 0008).
+
+With nothing left pointing at the barcode, `id` becomes the primary key and
+the barcode a unique (indexed) attribute, so routes and lookups by barcode
+keep working. InventoryItem/ProductPrice get their foreign keys and
+constraints back, now on the integer column, and Product.suppliers is
+restored from the scratch table.
+"""
+import django.db.models.deletion
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+
+
+def restore_suppliers(apps, schema_editor):
+    Product = apps.get_model('Inventory', 'Product')
+    ProductSupplierRef = apps.get_model('Inventory', 'ProductSupplierRef')
+    Through = Product.suppliers.through
+    Through.objects.bulk_create(
+        [Through(product_id=product_ref, supplier_id=supplier_id)
+         for product_ref, supplier_id in ProductSupplierRef.objects.values_list('product_ref', 'supplier_id')],
+        batch_size=BATCH_SIZE,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Inventory', '0008_product_id_prepare'),
+        ('Tickettheme', '0004_ticketlabel_product_ref'),
+        ('competitor', '0002_snapshot_product_ref'),
+        ('order', '0004_product_ref'),
+        ('pricing', '0007_product_ref'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='product',
+            name='id',
+            field=models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID'),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='barcode',
+            field=models.CharField(max_length=100, unique=True),
+        ),
+        migrations.RenameField(
+            model_name='inventoryitem',
+            old_name='product_ref',
+            new_name='product',
+        ),
+        migrations.AlterField(
+            model_name='inventoryitem',
+            name='product',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inventory_instances', to='Inventory.product'),
+        ),
+        migrations.RenameField(
+            model_name='productprice',
+            old_name='product_ref',
+            new_name='product',
+        ),
+        migrations.AlterField(
+            model_name='productprice',
+            name='product',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_listings', to='Inventory.product'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='productprice',
+            unique_together={('supermarket', 'product')},
+        ),
+        migrations.AddConstraint(
+            model_name='inventoryitem',
+            constraint=models.UniqueConstraint(models.F('supermarket'), models.F('product'), models.F('expiry_date'), django.db.models.functions.comparison.Coalesce(models.F('rack'), models.Value(0)), django.db.models.functions.comparison.Coalesce(models.F('store_price'), models.Value(-1), output_field=models.DecimalField()), name='inventory_item_unique_batch'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='suppliers',
+            field=models.ManyToManyField(blank=True, related_name='products', to='Inventory.supplier'),
+        ),
+        migrations.RunPython(restore_suppliers),
+        migrations.DeleteModel(
+            name='ProductSupplierRef',
+        ),
+    ]
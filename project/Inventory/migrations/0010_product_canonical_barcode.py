@@ -0,0 +1,60 @@
+from django.db import migrations, models
+
+
+def canonical_barcode(code):
+    # Frozen copy of Inventory.gtin.canonical_barcode as of this migration;
+    # later changes to that function must not rewrite history
+    code = (code or '').strip()
+    if not code.isascii() or not code.isdigit() or len(code) < 8:
+        return code
+    significant = code.lstrip('0')
+    if len(significant) > 14 or len(significant) < 2:
+        return code
+    total = sum(int(d) * (3 if i % 2 == 0 else 1) for i, d in enumerate(reversed(significant[:-1])))
+    if significant[-1] != str(-total % 10):
+        return code
+    return significant.zfill(14)
+
+
+def fill_canonical_barcode(apps, schema_editor):
+    """
+    Products created from different spellings of one GTIN collide here; the
+    oldest keeps the canonical code and every barcode lookup, the later
+    duplicates are left NULL (still listed in the admin, where they can be
+    merged by hand).
+    """
+    Product = apps.get_model('Inventory', 'Product')
+    seen = set()
+    batch = []
+    for product in Product.objects.only('id', 'barcode').order_by('id').iterator(chunk_size=2000):
+        key = canonical_barcode(product.barcode)
+        if key in seen:
+            continue
+        seen.add(key)
+        product.canonical_barcode = key
+        batch.append(product)
+        if len(batch) >= 2000:
+            Product.objects.bulk_update(batch, ['canonical_barcode'])
+            batch = []
+    Product.objects.bulk_update(batch, ['canonical_barcode'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Inventory', '0009_product_integer_pk'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='canonical_barcode',
+            field=models.CharField(editable=False, max_length=100, null=True),
+        ),
+        migrations.RunPython(fill_canonical_barcode, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='product',
+            name='canonical_barcode',
+            field=models.CharField(editable=False, max_length=100, null=True, unique=True),
+        ),
+    ]
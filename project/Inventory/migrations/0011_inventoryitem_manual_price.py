@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Inventory', '0010_product_canonical_barcode'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='manual_price',
+            field=models.BooleanField(default=False),
+        ),
+    ]
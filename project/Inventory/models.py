@@ -1,8 +1,12 @@
-from django.db import models
+from django.db import connection, models
+from django.db.models import Case, F, Q, Value, When
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
 from django.utils import timezone
 
 from project import settings
+from . import gtin
+from .search import normalize_search_text
 
 
 class Supermarket(models.Model):
@@ -54,8 +58,42 @@ class Category(models.Model):
     def __str__(self): return self.name
 
 
+class ProductQuerySet(models.QuerySet):
+
+    def for_barcode(self, code):
+        """The product stored under any spelling of `code` (one probe on the canonical_barcode index)."""
+        return self.filter(canonical_barcode=gtin.canonical_barcode(code))
+
+    def for_stored_barcode(self, code):
+        """
+        The product stored under exactly `code`, else the one stored under another
+        spelling of it. For codes taken from a product (URLs, forms, task arguments):
+        a duplicate left without a canonical key is only reachable by its own barcode.
+        """
+        return self.filter(Q(barcode=code) | Q(canonical_barcode=gtin.canonical_barcode(code))).order_by(
+            Case(When(barcode=code, then=Value(0)), default=Value(1)))[:1]
+
+    def for_barcodes(self, codes):
+        return self.filter(canonical_barcode__in={gtin.canonical_barcode(code) for code in codes})
+
+    def keyless(self, keys):
+        """Products left without a canonical key (see Product.save) stored under a spelling of one of `keys`, oldest first."""
+        return self.filter(canonical_barcode__isnull=True,
+                           barcode__in={code for key in keys for code in gtin.spellings(key)}).order_by('id')
+
+    def claim_key(self, key):
+        """Hands a freed canonical key to the oldest keyless product spelled with it; returns that product or None."""
+        product = self.keyless([key]).first()
+        if product is not None:
+            product.save(update_fields=['canonical_barcode'])  # save() takes the key now that it is free
+        return product
+
+
 class Product(models.Model):
-    barcode = models.CharField(max_length=100, unique=True, primary_key=True)
+    barcode = models.CharField(max_length=100, unique=True)
+    # gtin.canonical_barcode(barcode): what every barcode lookup matches on. NULL only on
+    # duplicates of an older product whose key they cannot share (see save() and migration 0010)
+    canonical_barcode = models.CharField(max_length=100, unique=True, null=True, editable=False)
     name = models.CharField(max_length=255)
     brand = models.CharField(max_length=150, blank=True, null=True)
     image_url = models.URLField(max_length=500, blank=True, null=True, help_text="Scraped image URL")
@@ -74,11 +112,68 @@ class Product(models.Model):
     suppliers = models.ManyToManyField(Supplier, blank=True, related_name='products')
     last_scraped = models.DateTimeField(null=True, blank=True)
 
+    # Normalised name + brand (see Inventory/search.py), indexed for search
+    search_text = models.CharField(max_length=410, blank=True, default='', editable=False)
+
+    objects = ProductQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Catalog order of both product listings; scan-to-find counts the
+            # rows sorting before a product along it (Inventory/pagination.py).
+            models.Index(fields=['name', 'id']),
+        ]
 
+    # Columns whose stored value is remembered, so signal handlers can tell what a save changed
+    TRACKED_FIELDS = ('barcode', 'canonical_barcode', 'name', 'brand', 'image_url', 'category_id')
 
     def __str__(self):
         return f"{self.name} ({self.barcode})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember(cls.TRACKED_FIELDS)
+        return instance
+
+    def _remember(self, fields):
+        # Deferred fields are left out: changed() treats them as unknown
+        stored = getattr(self, '_stored', {})
+        stored.update((f, self.__dict__[f]) for f in fields if f in self.__dict__)
+        self._stored = stored
+
+    def stored_value(self, field, default=None):
+        """`field` as last read from or written to the database (`default` for a new product)."""
+        return getattr(self, '_stored', {}).get(field, default)
+
+    def changed(self, *fields):
+        """Whether any of the TRACKED_FIELDS `fields` differs from the database row (always True for a new product)."""
+        stored = getattr(self, '_stored', {})
+        return any(f not in stored or stored[f] != getattr(self, f) for f in fields)
+
+    def save(self, *args, **kwargs):
+        self.search_text = normalize_search_text(self.name, self.brand)
+        canonical = gtin.canonical_barcode(self.barcode)
+        update_fields = kwargs.get('update_fields')
+        # A new or re-keyed row (or one still without a key) takes the key unless another
+        # product holds it; a duplicate spelling keeps NULL, like the ones migration 0010 left
+        if self.canonical_barcode != canonical:
+            taken = Product.objects.filter(canonical_barcode=canonical).exclude(pk=self.pk).exists()
+            self.canonical_barcode = None if taken else canonical
+            if update_fields is not None:
+                update_fields = kwargs['update_fields'] = {*update_fields, 'canonical_barcode'}
+        if update_fields is not None and {'name', 'brand'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'search_text'}
+        super().save(*args, **kwargs)
+        saved = self.TRACKED_FIELDS if update_fields is None else [
+            f for f in self.TRACKED_FIELDS if self._meta.get_field(f).name in kwargs['update_fields']]
+        self._remember(saved)
+
+    @property
+    def external_barcode(self):
+        """The barcode as product databases and competitor sites index it (see gtin.external_barcode)."""
+        return gtin.external_barcode(self.barcode)
+
     @property
     def display_image_url(self):
         """
@@ -106,6 +201,98 @@ class Rack(models.Model):
         return f"{self.name} ({self.supermarket.name})"
 
 
+BATCH_CONSTRAINT = 'inventory_item_unique_batch'
+
+
+class InventoryItemManager(models.Manager):
+    _conflict_target = None
+    # Batches per add_quantities() statement: 11 parameters each, under SQLite's variable limit
+    ADD_CHUNK = 80
+
+    def for_list(self, supermarket):
+        """The store's batches with the relations the inventory list shows."""
+        return self.filter(supermarket=supermarket).select_related('product', 'category', 'product__category', 'rack')
+
+    def expired(self, supermarket, today):
+        """The store's expired batches, most recently expired first (expiry_ai "Expired products")."""
+        return (self.filter(supermarket=supermarket, expiry_date__lt=today)
+                .select_related('product').order_by('-expiry_date'))
+
+    def product_batches(self, supermarket, product):
+        """One product's batches in a store, soonest expiry first (product page, scan lookup)."""
+        return self.filter(supermarket=supermarket, product=product).order_by('expiry_date')
+
+    def add_quantity(self, supermarket, product, expiry_date, quantity,
+                     rack_id=None, store_price=None, category_id=None, manufacture_date=None):
+        """
+        Adds `quantity` to the batch (supermarket, product, expiry_date, rack,
+        store_price), creating it if needed, in one statement:
+
+            INSERT ... ON CONFLICT (batch key) DO UPDATE SET quantity = quantity + excluded.quantity
+
+        Concurrent scans of the same batch therefore never race into an
+        IntegrityError or lose an increment. category_id and manufacture_date
+        only apply to a new batch. Returns (item_id, created).
+        """
+        [(item_id, created)] = self.add_quantities(supermarket, [{
+            'product_id': getattr(product, 'pk', product), 'expiry_date': expiry_date, 'quantity': quantity,
+            'rack_id': rack_id, 'store_price': store_price, 'category_id': category_id,
+            'manufacture_date': manufacture_date,
+        }])
+        return item_id, created
+
+    def add_quantities(self, supermarket, batches):
+        """
+        add_quantity() for many batches of one store: `batches` are dicts with
+        product_id, expiry_date, quantity and optional rack_id, store_price,
+        category_id, manufacture_date; no two may share a batch key. One
+        multi-row upsert per ADD_CHUNK batches. Returns [(item_id, created)],
+        not in any particular order.
+        """
+        meta = self.model._meta
+        qn = connection.ops.quote_name
+        now = timezone.now()
+        if self._conflict_target is None:
+            # Rendered from the constraint itself, since the target must match its index exactly
+            constraint = next(c for c in meta.constraints if c.name == BATCH_CONSTRAINT)
+            self._conflict_target = str(constraint.create_sql(self.model, connection.schema_editor()).parts['columns'])
+        prep = {name: meta.get_field(name) for name in ('expiry_date', 'store_price', 'manufacture_date')}
+        stamp = meta.get_field('last_updated').get_db_prep_save(now, connection)
+        columns = ('supermarket_id', 'product_id', 'expiry_date', 'rack_id', 'store_price', 'category_id',
+                   'manufacture_date', 'quantity', 'manual_price', 'added_at', 'last_updated')
+        rows = [[
+            getattr(supermarket, 'pk', supermarket),
+            batch['product_id'],
+            prep['expiry_date'].get_db_prep_save(batch['expiry_date'], connection),
+            batch.get('rack_id') or None,
+            prep['store_price'].get_db_prep_save(batch.get('store_price'), connection),
+            batch.get('category_id') or None,
+            prep['manufacture_date'].get_db_prep_save(batch.get('manufacture_date'), connection),
+            batch['quantity'],
+            False,
+            stamp,
+            stamp,
+        ] for batch in batches]
+
+        results = []
+        placeholder = f"({', '.join(['%s'] * len(columns))})"
+        for i in range(0, len(rows), self.ADD_CHUNK):
+            chunk = rows[i:i + self.ADD_CHUNK]
+            sql = (
+                f"INSERT INTO {qn(meta.db_table)} ({', '.join(qn(c) for c in columns)}) "
+                f"VALUES {', '.join([placeholder] * len(chunk))} "
+                f"ON CONFLICT ({self._conflict_target}) DO UPDATE SET "
+                f"{qn('quantity')} = {qn(meta.db_table)}.{qn('quantity')} + excluded.{qn('quantity')}, "
+                f"{qn('last_updated')} = excluded.{qn('last_updated')} "
+                # A new row has added_at == last_updated; an updated one keeps its older added_at
+                f"RETURNING {qn('id')}, {qn('added_at')} = {qn('last_updated')}"
+            )
+            with connection.cursor() as cursor:
+                cursor.execute(sql, [value for row in chunk for value in row])
+                results.extend((item_id, bool(created)) for item_id, created in cursor.fetchall())
+        return results
+
+
 class InventoryItem(models.Model):
     """
     Represents a specific batch of a product in a specific supermarket.
@@ -126,6 +313,8 @@ class InventoryItem(models.Model):
     rack = models.ForeignKey(Rack, on_delete=models.SET_NULL, null=True, blank=True, related_name='items')
 
     store_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    suggested_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True,
+                                          help_text="Price proposed by the applied pricing rule or promotion.")
 
     # Use string 'app_label.ModelName' to prevent circular import errors
 
@@ -138,20 +327,35 @@ class InventoryItem(models.Model):
     )
     promotion = models.ForeignKey('pricing.Promotion', on_delete=models.SET_NULL, null=True, blank=True,
                                   related_name='inventory_items')
+    # Discount applied by hand from the alert monitor: repricing runs leave the batch alone
+    manual_price = models.BooleanField(default=False)
 
     added_at = models.DateTimeField(auto_now_add=True)
     last_updated = models.DateTimeField(auto_now=True)
 
-    class Meta:
-        ordering = ['expiry_date']
-        # ✅ THIS IS THE RULE THAT PREVENTS DUPLICATES
-        # It defines a "batch" as a unique combination of these 5 fields.
-        unique_together = ['supermarket', 'product', 'expiry_date', 'store_price']
+    objects = InventoryItemManager()
 
     class Meta:
         ordering = ['expiry_date']
-        # This constraint prevents duplicate entries for the same batch
-        unique_together = ['supermarket', 'product', 'expiry_date', 'rack', 'store_price']
+        constraints = [
+            # One row per batch. rack and store_price are nullable and NULLs
+            # never collide in a unique index, so they are compared through
+            # COALESCE: two batches without a rack share the same "no rack".
+            # The index leads with (supermarket, product), which serves the
+            # per-product lookups (scan_api, product_detail_view).
+            models.UniqueConstraint(
+                F('supermarket'), F('product'), F('expiry_date'),
+                Coalesce(F('rack'), Value(0)),
+                Coalesce(F('store_price'), Value(-1), output_field=models.DecimalField()),
+                name=BATCH_CONSTRAINT,
+            ),
+        ]
+        indexes = [
+            # Expiry windows of one store: alert monitor, urgent items,
+            # dashboard counts, expired list, inventory list pages.
+            # See Inventory/hot_queries.py and `manage.py explain_hot_queries`.
+            models.Index(fields=['supermarket', 'expiry_date']),
+        ]
 
     def __str__(self):
         return f"{self.product.name} ({self.quantity}) in {self.supermarket.name}"
@@ -0,0 +1,50 @@
+# Inventory/pagination.py
+from django.db.models import Q
+
+
+def _before_q(ordering, values):
+    """
+    Builds the filter matching rows that sort strictly before `values` under
+    `ordering` (lexicographic over the ordering fields):
+
+        f1 < v1 OR (f1 = v1 AND f2 < v2) OR ...
+
+    Fields prefixed with '-' are compared with '>' instead.
+    """
+    q = Q()
+    equal_so_far = Q()
+    for field in ordering:
+        name = field.lstrip('-')
+        op = 'gt' if field.startswith('-') else 'lt'
+        q |= equal_so_far & Q(**{f'{name}__{op}': values[name]})
+        equal_so_far &= Q(**{name: values[name]})
+    return q
+
+
+def row_position(queryset, pk, ordering, field='pk'):
+    """
+    0-based position of the row `pk` inside `queryset` sorted by `ordering`,
+    or None if the row is not part of the queryset. `field` names another
+    unique field to find the row by (e.g. a product's barcode).
+
+    Costs one indexed lookup plus one COUNT of the rows sorting before it,
+    instead of pulling every key of the queryset into Python. The COUNT is
+    still linear in the row's position: it walks a composite index on the
+    ordering fields (Product has one on (name, id)) rather than the table,
+    and without such an index it scans the table. The last ordering field
+    must be unique (usually the primary key) so ties are broken the same way
+    the listing breaks them; ordering fields must be non-nullable.
+    """
+    names = [f.lstrip('-') for f in ordering]
+    values = queryset.filter(**{field: pk}).values(*names).first()
+    if values is None:
+        return None
+    return queryset.filter(_before_q(ordering, values)).order_by().count()
+
+
+def page_number_for(queryset, pk, ordering, per_page, field='pk'):
+    """1-based page number showing row `pk`, or None if it is not in the queryset."""
+    position = row_position(queryset, pk, ordering, field)
+    if position is None:
+        return None
+    return position // per_page + 1
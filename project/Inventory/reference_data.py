@@ -0,0 +1,114 @@
+# Inventory/reference_data.py
+"""
+Cached reference data for dropdowns and handheld clients: categories,
+suppliers and active competitors (shared by every store) plus the racks of
+one supermarket, as lists of {'id', 'name'} dicts.
+
+Entries live in the shared cache (settings.CACHES) under a version: one
+counter for the shared tables and one per supermarket for its racks. Saving
+or deleting a Category, Supplier, Competitor or Rack bumps the matching
+counter (see InventoryConfig.ready), at once and again after commit, so every
+worker moves to a fresh entry on its next read.
+
+reference_version() is a digest of the data itself, not of the counters:
+it is the ETag of reference_data_api, and two responses share it only if
+they carry the same lists, whatever the cache held when they were built.
+Scanners fetch the lists once and revalidate cheaply afterwards; scan_api
+leaves the category list out of lookups that send back the current digest.
+"""
+import hashlib
+import json
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+SHARED_VERSION_KEY = 'inventory:reference:version'
+STORE_VERSION_KEY = 'inventory:reference:{}:version'
+SHARED_DATA_KEY = 'inventory:reference:shared:{}'
+STORE_DATA_KEY = 'inventory:reference:{}:racks:{}'
+DIGEST_KEY = 'inventory:reference:{}:digest:{}.{}'
+TIMEOUT = 24 * 60 * 60  # old versions just age out
+
+
+def _version(key):
+    version = cache.get(key)
+    if version is None:
+        # Seeded from a timestamp so a flushed cache never reuses an old entry's version
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key, 0)
+    return version
+
+
+def _bump(key):
+    _incr(key)
+    # Again once the change is committed: a request that read the old rows meanwhile may have
+    # cached them under the new version
+    transaction.on_commit(lambda: _incr(key))
+
+
+def _incr(key):
+    if not cache.add(key, time.time_ns(), timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:  # evicted between add() and incr()
+            cache.set(key, time.time_ns(), timeout=None)
+
+
+def _load_shared():
+    from competitor.models import Competitor
+    from .models import Category, Supplier
+    return {
+        'categories': list(Category.objects.order_by('name').values('id', 'name')),
+        'suppliers': list(Supplier.objects.order_by('name').values('id', 'name')),
+        'competitors': list(Competitor.objects.filter(is_active=True).order_by('name').values('id', 'name')),
+    }
+
+
+def _load_racks(supermarket_id):
+    from .models import Rack
+    return list(Rack.objects.filter(supermarket_id=supermarket_id).order_by('name').values('id', 'name'))
+
+
+def shared_data():
+    """{'categories', 'suppliers', 'competitors'} shared by every store."""
+    return cache.get_or_set(SHARED_DATA_KEY.format(_version(SHARED_VERSION_KEY)), _load_shared, TIMEOUT)
+
+
+def racks(supermarket_id):
+    key = STORE_DATA_KEY.format(supermarket_id, _version(STORE_VERSION_KEY.format(supermarket_id)))
+    return cache.get_or_set(key, lambda: _load_racks(supermarket_id), TIMEOUT)
+
+
+def categories():
+    return shared_data()['categories']
+
+
+def suppliers():
+    return shared_data()['suppliers']
+
+
+def _digest(data):
+    return hashlib.sha1(json.dumps(data, sort_keys=True).encode()).hexdigest()
+
+
+def reference_version(supermarket_id):
+    """Digest of what reference_data(supermarket_id) returns; computed once per counter change."""
+    key = DIGEST_KEY.format(supermarket_id, _version(SHARED_VERSION_KEY),
+                            _version(STORE_VERSION_KEY.format(supermarket_id)))
+    return cache.get_or_set(
+        key, lambda: _digest({**shared_data(), 'racks': racks(supermarket_id)}), TIMEOUT)
+
+
+def reference_data(supermarket_id):
+    """Everything at once, with the digest of exactly these lists as 'version'."""
+    data = {**shared_data(), 'racks': racks(supermarket_id)}
+    return {'version': _digest(data), **data}
+
+
+def shared_changed(sender, **kwargs):
+    _bump(SHARED_VERSION_KEY)
+
+
+def rack_changed(sender, instance, **kwargs):
+    _bump(STORE_VERSION_KEY.format(instance.supermarket_id))
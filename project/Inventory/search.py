@@ -0,0 +1,190 @@
+# Inventory/search.py
+"""
+Product search shared by the catalog, inventory and price views.
+
+Every Product keeps a normalised `search_text` (name + brand, lower-cased,
+accents and punctuation stripped), which is what queries are matched against:
+
+* barcodes are matched by prefix, as a range on the barcode's unique index,
+  and a complete GTIN also by its canonical form (any spelling of the code);
+* words are matched against `search_text` through a trigram index:
+  an FTS5 `trigram` table on SQLite, a pg_trgm GIN index on PostgreSQL.
+  Words shorter than a trigram fall back to a plain LIKE on `search_text`.
+
+Results are ranked exact barcode > barcode prefix > name prefix > word prefix > substring.
+"""
+import re
+import unicodedata
+from functools import lru_cache
+
+from django.db import connections, DEFAULT_DB_ALIAS, OperationalError
+from django.db.models import Case, When, Value, IntegerField, Q
+from django.db.models.expressions import RawSQL
+
+from .gtin import normalize_gtin
+
+FTS_TABLE = 'Inventory_product_fts'
+PRODUCT_TABLE = 'Inventory_product'
+TRIGRAM_INDEX = 'inventory_product_search_trgm'
+
+# FTS5's trigram tokenizer cannot match anything shorter than this
+MIN_TRIGRAM = 3
+
+# Upper bound for barcode prefix ranges: sorts after any character a barcode can hold
+_PREFIX_END = '\uffff'
+
+RANK_EXACT_BARCODE = 100
+RANK_BARCODE_PREFIX = 80
+RANK_NAME_PREFIX = 60
+RANK_WORD_PREFIX = 40
+RANK_SUBSTRING = 20
+
+
+def normalize_search_text(*parts):
+    """'Crème Brûlée', 'Nestlé' -> 'creme brulee nestle'"""
+    text = ' '.join(str(p) for p in parts if p).lower()
+    text = ''.join(ch for ch in unicodedata.normalize('NFKD', text) if not unicodedata.combining(ch))
+    text = re.sub(r'[^a-z0-9\s]+', ' ', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def _barcode_prefix_q(barcode, prefix):
+    return Q(**{f'{prefix}barcode__gte': barcode, f'{prefix}barcode__lt': barcode + _PREFIX_END})
+
+
+def _barcode_exact_q(barcode, prefix):
+    gtin = normalize_gtin(barcode)
+    if gtin is None:
+        return Q(**{f'{prefix}barcode': barcode})
+    return Q(**{f'{prefix}canonical_barcode': gtin})
+
+
+@lru_cache(maxsize=None)
+def fts_enabled(using=DEFAULT_DB_ALIAS):
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        return FTS_TABLE in connection.introspection.table_names(cursor)
+
+
+def _text_q(tokens, prefix):
+    if fts_enabled():
+        long_tokens = [t for t in tokens if len(t) >= MIN_TRIGRAM]
+        tokens = [t for t in tokens if len(t) < MIN_TRIGRAM]
+    else:
+        long_tokens = []
+
+    q = Q()
+    if long_tokens:
+        # Tokens are [a-z0-9] only, so quoting each one is enough to make a safe MATCH expression
+        match = ' '.join(f'"{t}"' for t in long_tokens)
+        # The index's rowid is the product's rowid, which is its integer primary key
+        q &= Q(**{f'{prefix}pk__in': RawSQL(
+            f'SELECT rowid FROM "{FTS_TABLE}" WHERE "{FTS_TABLE}" MATCH %s',
+            (match,),
+        )})
+    for token in tokens:
+        q &= Q(**{f'{prefix}search_text__contains': token})
+    return q
+
+
+def search_q(query, prefix=''):
+    """
+    Q object matching `query` against products, or against a relation when
+    `prefix` is given (e.g. 'product__' from InventoryItem).
+    Returns None for a blank query.
+    """
+    raw = (query or '').strip()
+    if not raw:
+        return None
+
+    tokens = normalize_search_text(raw).split()
+    q = _text_q(tokens, prefix) if tokens else None
+    if ' ' not in raw:
+        barcode_q = _barcode_prefix_q(raw, prefix)
+        if normalize_gtin(raw):
+            barcode_q |= _barcode_exact_q(raw, prefix)
+        q = barcode_q if q is None else q | barcode_q
+    return q if q is not None else Q(**{f'{prefix}pk__in': []})
+
+
+def search_rank(query, prefix=''):
+    """Relevance expression for rows already filtered by search_q()."""
+    raw = (query or '').strip()
+    normalized = normalize_search_text(raw)
+    return Case(
+        When(_barcode_exact_q(raw, prefix), then=Value(RANK_EXACT_BARCODE)),
+        When(_barcode_prefix_q(raw, prefix), then=Value(RANK_BARCODE_PREFIX)),
+        When(**{f'{prefix}search_text__startswith': normalized}, then=Value(RANK_NAME_PREFIX)),
+        When(**{f'{prefix}search_text__contains': f' {normalized}'}, then=Value(RANK_WORD_PREFIX)),
+        default=Value(RANK_SUBSTRING),
+        output_field=IntegerField(),
+    )
+
+
+def search(queryset, query, prefix='', ranked=False):
+    """
+    The one entry point the views use: filters `queryset` by `query`.
+
+    With `ranked=True` rows are annotated with `search_rank` and ordered by it
+    (ties broken by name); otherwise the queryset keeps its own ordering.
+    """
+    q = search_q(query, prefix)
+    if q is None:
+        return queryset
+    queryset = queryset.filter(q)
+    if ranked:
+        queryset = queryset.annotate(search_rank=search_rank(query, prefix)).order_by(
+            '-search_rank', f'{prefix}name', f'{prefix}barcode')
+    return queryset
+
+
+# --- Index maintenance -------------------------------------------------------
+
+def install_search_index(using=DEFAULT_DB_ALIAS):
+    """
+    Creates the vendor-specific trigram index over Product.search_text.
+
+    On SQLite the FTS5 table is an external-content index over the product
+    table, kept in sync by triggers. Django rebuilds SQLite tables on most
+    ALTERs (dropping triggers and renumbering rowids), so this runs after
+    every migrate and re-populates the index from scratch.
+    """
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            try:
+                cursor.execute(
+                    f'CREATE VIRTUAL TABLE IF NOT EXISTS "{FTS_TABLE}" USING fts5('
+                    f"search_text, content='{PRODUCT_TABLE}', content_rowid='rowid', tokenize='trigram')"
+                )
+            except OperationalError:
+                # SQLite built without FTS5 / older than 3.34: search falls back to LIKE
+                fts_enabled.cache_clear()
+                return
+            for suffix in ('ai', 'ad', 'au'):
+                cursor.execute(f'DROP TRIGGER IF EXISTS "{FTS_TABLE}_{suffix}"')
+            cursor.execute(
+                f'CREATE TRIGGER "{FTS_TABLE}_ai" AFTER INSERT ON "{PRODUCT_TABLE}" BEGIN '
+                f'INSERT INTO "{FTS_TABLE}"(rowid, search_text) VALUES (new.rowid, new.search_text); END'
+            )
+            cursor.execute(
+                f'CREATE TRIGGER "{FTS_TABLE}_ad" AFTER DELETE ON "{PRODUCT_TABLE}" BEGIN '
+                f'INSERT INTO "{FTS_TABLE}"("{FTS_TABLE}", rowid, search_text) '
+                f"VALUES ('delete', old.rowid, old.search_text); END"
+            )
+            cursor.execute(
+                f'CREATE TRIGGER "{FTS_TABLE}_au" AFTER UPDATE OF search_text ON "{PRODUCT_TABLE}" BEGIN '
+                f'INSERT INTO "{FTS_TABLE}"("{FTS_TABLE}", rowid, search_text) '
+                f"VALUES ('delete', old.rowid, old.search_text); "
+                f'INSERT INTO "{FTS_TABLE}"(rowid, search_text) VALUES (new.rowid, new.search_text); END'
+            )
+            cursor.execute(f'INSERT INTO "{FTS_TABLE}"("{FTS_TABLE}") VALUES (\'rebuild\')')
+        elif connection.vendor == 'postgresql':
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {TRIGRAM_INDEX} '
+                f'ON "{PRODUCT_TABLE}" USING gin (search_text gin_trgm_ops)'
+            )
+    fts_enabled.cache_clear()
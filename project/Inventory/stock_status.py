@@ -0,0 +1,121 @@
+# Inventory/stock_status.py
+"""
+Expiry status of inventory batches, computed by the database.
+
+InventoryItem.status works on one instance and calls timezone.now() each
+time; lists use these helpers instead, all anchored on a single `today`:
+
+- status_case(today): Case/When annotation with the same buckets as
+  InventoryItem.status (expired / expires_today / expires_soon / fresh).
+- status_q(status, today): the WHERE clause for one bucket.
+- status_counts(queryset, today, **aggregates): all bucket counts (and any
+  extra aggregates) in one query.
+- keyset_page(queryset, ...): a page ordered by (expiry_date, id) that
+  seeks past a cursor instead of OFFSET, so deep pages cost the same as
+  the first one.
+"""
+from collections import namedtuple
+from datetime import date, timedelta
+
+from django.db.models import Case, CharField, Count, Q, Value, When
+
+SOON_DAYS = 7
+
+EXPIRED = 'expired'
+EXPIRES_TODAY = 'expires_today'
+EXPIRES_SOON = 'expires_soon'
+FRESH = 'fresh'
+
+STATUS_CHOICES = (
+    (FRESH, 'Fresh'),
+    (EXPIRES_SOON, 'Expires Soon'),
+    (EXPIRES_TODAY, 'Expires Today'),
+    (EXPIRED, 'Expired'),
+)
+
+PAGE_SIZE = 50
+
+
+def status_q(status, today, prefix=''):
+    """Q matching the batches in one status bucket (None for an unknown status)."""
+    field = f'{prefix}expiry_date'
+    if status == EXPIRED:
+        return Q(**{f'{field}__lt': today})
+    if status == EXPIRES_TODAY:
+        return Q(**{field: today})
+    if status == EXPIRES_SOON:
+        return Q(**{f'{field}__gt': today, f'{field}__lte': today + timedelta(days=SOON_DAYS)})
+    if status == FRESH:
+        return Q(**{f'{field}__gt': today + timedelta(days=SOON_DAYS)})
+    return None
+
+
+def status_case(today, prefix=''):
+    """Case/When expression evaluating to the status string of each batch."""
+    return Case(
+        *[When(status_q(status, today, prefix), then=Value(status)) for status, _label in STATUS_CHOICES],
+        default=Value('unknown'),
+        output_field=CharField(),
+    )
+
+
+def status_counts(queryset, today, **aggregates):
+    """
+    {status: count, ..., 'total': count} for `queryset` in one query; extra
+    `aggregates` (e.g. quantity=Sum('quantity')) are computed alongside.
+    """
+    counts = queryset.order_by().aggregate(
+        **{status: Count('pk', filter=status_q(status, today)) for status, _label in STATUS_CHOICES},
+        **aggregates,
+    )
+    counts['total'] = sum(counts[status] for status, _label in STATUS_CHOICES)
+    return counts
+
+
+KeysetPage = namedtuple('KeysetPage', 'items next_cursor prev_cursor')
+
+
+def _cursor(item):
+    return f'{item.expiry_date.isoformat()}_{item.pk}'
+
+
+def parse_cursor(value):
+    """(expiry_date, id) from a cursor string, or None if it is malformed."""
+    try:
+        day, pk = (value or '').split('_')
+        return date.fromisoformat(day), int(pk)
+    except ValueError:
+        return None
+
+
+def keyset_page(queryset, after=None, before=None, size=PAGE_SIZE):
+    """
+    One page of `queryset` in (expiry_date, id) order.
+    `after` / `before` are cursors from a previous page's next_cursor /
+    prev_cursor; without either, the first page is returned.
+    """
+    after, before = parse_cursor(after), parse_cursor(before)
+    if before:
+        day, pk = before
+        queryset = queryset.filter(Q(expiry_date__lt=day) | Q(expiry_date=day, pk__lt=pk))
+        queryset = queryset.order_by('-expiry_date', '-pk')
+    else:
+        if after:
+            day, pk = after
+            queryset = queryset.filter(Q(expiry_date__gt=day) | Q(expiry_date=day, pk__gt=pk))
+        queryset = queryset.order_by('expiry_date', 'pk')
+
+    items = list(queryset[:size + 1])
+    more = len(items) > size
+    items = items[:size]
+    if before:
+        items.reverse()
+        has_next, has_prev = True, more
+    else:
+        has_next, has_prev = more, bool(after)
+
+    return KeysetPage(
+        items,
+        _cursor(items[-1]) if items and has_next else None,
+        _cursor(items[0]) if items and has_prev else None,
+    )
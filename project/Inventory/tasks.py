@@ -18,14 +18,14 @@ def scrape_product_task(product_barcode):
     """
     try:
         # 1. Find the product in our database using the barcode.
-        product = Product.objects.get(pk=product_barcode)
+        product = Product.objects.for_stored_barcode(product_barcode).get()
 
         # 2. Clear out any old pricing data to ensure the results are fresh.
         CompetitorPrice.objects.filter(product=product).delete()
 
         # 3. Call the main scraping function from scraping_utils.py.
         #    This is the slow part that can take several seconds.
-        scraped_data = scrape_competitor_prices(product.barcode, product.name)
+        scraped_data = scrape_competitor_prices(product.external_barcode, product.name)
 
         # 4. Loop through the results and save each new price to the database.
         for data in scraped_data:
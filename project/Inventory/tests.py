@@ -1,3 +1,263 @@
-from django.test import TestCase
+import threading
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from Inventory import autocomplete, views as inventory_views
+from Inventory.bulk_import import ImportFileError, import_inventory_file
+from Inventory.models import Category, InventoryItem, Product, Rack, Supermarket
+from order import scan_resolver
+from order.models import OrderBatch, OrderLine
+from order.views import _add_scans_to_batch
+from pricing import views as pricing_views
+from pricing.models import PricingRule, Promotion
+from product_price import views as product_price_views
+
+LOCAL_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class UrgentItemsQueryCountTests(TestCase):
+    """
+    The alert monitors and the "Urgent Attention" APIs read every urgent batch
+    in one query (Inventory/urgent_items.py): the number of queries must not
+    grow with the number of batches.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            'Store', 'Owner', username='owner', email='owner@example.com', password='pass')
+        cls.supermarket = Supermarket.objects.create(name='Store', owner=cls.user)
+        cls.category = Category.objects.create(name='Dairy')
+        cls.racks = [Rack.objects.create(supermarket=cls.supermarket, name=f'Aisle {n}') for n in range(3)]
+        cls.rule = PricingRule.objects.create(supermarket=cls.supermarket, name='Expiry -30%',
+                                              rule_type=PricingRule.RuleType.EXPIRY_DISCOUNT, amount=30)
+        cls.promotion = Promotion.objects.create(supermarket=cls.supermarket, name='Summer',
+                                                 end_date=timezone.now() + timedelta(days=30),
+                                                 discount_type=Promotion.DiscountType.PERCENTAGE,
+                                                 discount_value=10)
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.batches = 0
+
+    def add_batches(self, count):
+        """`count` urgent batches, each of its own product, spread over every status, rack, rule and promotion."""
+        today = timezone.localdate()
+        for _ in range(count):
+            n = self.batches = self.batches + 1
+            product = Product.objects.create(barcode=f'200000{n:06d}', name=f'Product {n}', category=self.category)
+            InventoryItem.objects.create(
+                supermarket=self.supermarket, product=product, quantity=n,
+                expiry_date=today + timedelta(days=n % 10 - 3),
+                store_price=Decimal('2.50'),
+                rack=self.racks[n % 3] if n % 4 else None,
+                applied_rule=self.rule if n % 2 else None,
+                promotion=self.promotion if n % 3 else None,
+            )
+
+    def call(self, view):
+        request = self.factory.get('/')
+        request.user = self.user
+        response = view(request, supermarket_id=self.supermarket.pk)
+        self.assertEqual(response.status_code, 200)
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+
+    def assert_constant_queries(self, view, queries):
+        for count in (3, 40):
+            with self.subTest(batches=count):
+                self.add_batches(count)
+                self.call(view)  # fill the reference data and promotion caches
+                with self.assertNumQueries(queries):
+                    self.call(view)
+
+    def test_inventory_alert_monitor(self):
+        self.assert_constant_queries(inventory_views.alert_monitor_view, 2)
+
+    def test_pricing_alert_monitor(self):
+        self.assert_constant_queries(pricing_views.alert_monitor_view, 3)
+
+    def test_inventory_urgent_items_api(self):
+        self.assert_constant_queries(inventory_views.urgent_items_api, 2)
+
+    def test_product_price_urgent_items_api(self):
+        self.assert_constant_queries(product_price_views.urgent_items_api, 2)
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class AddQuantityConcurrencyTests(TransactionTestCase):
+    """
+    InventoryItemManager.add_quantity is one INSERT ... ON CONFLICT statement:
+    scans of the same batch from many workers at once must add up on one row.
+    """
+    THREADS = 16
+    CALLS = 25
+
+    def test_concurrent_scans_of_one_batch(self):
+        owner = get_user_model().objects.create_user(
+            'Store', 'Owner', username='owner', email='owner@example.com', password='pass')
+        supermarket = Supermarket.objects.create(name='Store', owner=owner)
+        product = Product.objects.create(barcode='3017620422003', name='Nutella')
+        expiry_date = date(2030, 1, 31)
+
+        start = threading.Barrier(self.THREADS)
+        results, errors = [], []
+
+        def scan():
+            try:
+                start.wait()
+                for _ in range(self.CALLS):
+                    results.append(InventoryItem.objects.add_quantity(supermarket, product, expiry_date, 1))
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=scan) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        items = InventoryItem.objects.filter(supermarket=supermarket, product=product)
+        self.assertEqual(items.count(), 1)
+        self.assertEqual(items.get().quantity, self.THREADS * self.CALLS)
+        self.assertEqual(len(results), self.THREADS * self.CALLS)
+        self.assertEqual({item_id for item_id, _created in results}, {items.get().pk})
+        self.assertEqual(sum(created for _item_id, created in results), 1)
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class KeylessProductTests(TestCase):
+    """A duplicate spelling saved after its twin is left without a canonical key and must stay reachable."""
+
+    def setUp(self):
+        owner = get_user_model().objects.create_user(
+            'Store', 'Owner', username='owner', email='owner@example.com', password='pass')
+        self.supermarket = Supermarket.objects.create(name='Store', owner=owner)
+        self.batch = OrderBatch.objects.create(supermarket=self.supermarket, created_by=owner)
+        self.upc = Product.objects.create(barcode='123456789012', name='UPC-A')
+        self.ean = Product.objects.create(barcode='0123456789012', name='EAN-13')
+        scan_resolver.invalidate()
+
+    def test_duplicate_spelling_is_saved_without_a_key(self):
+        self.assertEqual(self.upc.canonical_barcode, '00123456789012')
+        self.assertIsNone(self.ean.canonical_barcode)
+
+    def test_deleting_the_keyed_twin_hands_over_the_key(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.upc.delete()
+        self.ean.refresh_from_db()
+        self.assertEqual(self.ean.canonical_barcode, '00123456789012')
+        self.assertEqual(scan_resolver.resolve_barcode('00123456789012').product_id, self.ean.pk)
+
+    def test_scans_reach_a_keyless_product_whose_key_is_free(self):
+        self.upc.delete()  # no commit: the key is not handed over
+        _add_scans_to_batch(self.batch, {'0123456789012': 2})
+        self.assertEqual(list(OrderLine.objects.filter(batch=self.batch).values_list('product_id', 'cartons')),
+                         [(self.ean.pk, 2)])
+        self.assertEqual(Product.objects.count(), 1)
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class InventoryImportTests(TestCase):
+
+    def setUp(self):
+        owner = get_user_model().objects.create_user(
+            'Store', 'Owner', username='owner', email='owner@example.com', password='pass')
+        self.supermarket = Supermarket.objects.create(name='Store', owner=owner)
+        self.product = Product.objects.create(barcode='3017620422003', name='Nutella')
+
+    def upload(self, content):
+        return import_inventory_file(self.supermarket, SimpleUploadedFile('delivery.csv', content))
+
+    def test_quantities_add_to_the_stored_batch(self):
+        InventoryItem.objects.add_quantity(self.supermarket, self.product, date(2030, 1, 31), 5,
+                                           store_price=Decimal('2.50'))
+        report = self.upload(b'barcode,quantity,expiry_date,store_price\n'
+                             b'3017620422003,3,2030-01-31,2.50\n'
+                             b'03017620422003,2,2030-01-31,2.5\n'
+                             b'3017620422003,1,2030-02-28,\n')
+        self.assertEqual((report['created'], report['updated'], report['errors']), (1, 1, []))
+        self.assertEqual(dict(InventoryItem.objects.values_list('expiry_date', 'quantity')),
+                         {date(2030, 1, 31): 10, date(2030, 2, 28): 1})
+
+    def test_non_utf8_file_is_a_file_error(self):
+        with self.assertRaises(ImportFileError):
+            self.upload(b'barcode,quantity,expiry_date\n3017620422003,1,2030-01-31,caf\xe9\n')
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class AutocompleteSyncTests(TestCase):
+    """Other workers apply a product change from the shared log instead of rebuilding their index."""
+
+    def setUp(self):
+        self.product = Product.objects.create(barcode='3017620422003', name='Nutella')
+        self.addCleanup(autocomplete.invalidate)
+
+    def worker_index(self):
+        index = autocomplete.AutocompleteIndex()
+        index.build(autocomplete._shared_version())
+        return index
+
+    def test_a_renamed_product_is_replayed_without_a_rebuild(self):
+        other = self.worker_index()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.name = 'Nutella Biscuits'
+            self.product.barcode = '8000500310427'
+            self.product.save()
+
+        with mock.patch.object(autocomplete, '_index', other), \
+                mock.patch.object(other, 'build', side_effect=AssertionError('rebuilt')):
+            index = autocomplete.autocomplete_index()
+        self.assertEqual([s.barcode for s in index.suggest('biscuits')], ['8000500310427'])
+        self.assertEqual(index.suggest('3017620422003'), [])
+
+    def test_saves_that_leave_the_suggestion_alone_do_not_bump(self):
+        version = autocomplete._shared_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.last_scraped = timezone.now()
+            self.product.save()
+        self.assertEqual(autocomplete._shared_version(), version)
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class ScanLookupReferenceDataTests(TestCase):
+    """scan_api lookups leave out the category list while the client's reference_version is current."""
+
+    def setUp(self):
+        owner = get_user_model().objects.create_user(
+            'Store', 'Owner', username='owner', email='owner@example.com', password='pass')
+        self.supermarket = Supermarket.objects.create(name='Store', owner=owner)
+        Product.objects.create(barcode='3017620422003', name='Nutella')
+        Category.objects.create(name='Dairy')
+        self.client.force_login(owner)
+
+    def lookup(self, reference_version=None):
+        response = self.client.post(reverse('inventory:scan_api'), {
+            'mode': 'lookup', 'barcode': '3017620422003', 'supermarket_id': self.supermarket.pk,
+            'reference_version': reference_version,
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_categories_are_sent_until_the_client_holds_them(self):
+        first = self.lookup()
+        self.assertEqual([c['name'] for c in first['categories']], ['Dairy'])
+        self.assertNotIn('categories', self.lookup(first['reference_version']))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.create(name='Bakery')
+        self.assertEqual([c['name'] for c in self.lookup(first['reference_version'])['categories']],
+                         ['Bakery', 'Dairy'])
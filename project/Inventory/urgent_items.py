@@ -0,0 +1,89 @@
+# Inventory/urgent_items.py
+"""
+Expired and soon-to-expire batches of one store, shared by the dashboard
+"Urgent Attention" APIs (Inventory and product_price) and the alert monitor
+views (Inventory and pricing).
+
+urgent_items() runs one query: a values() projection of the batch with the
+product, rack, applied rule and promotion columns it needs, and its status
+computed by the database (stock_status.status_case). Rows are plain dicts
+shaped like the templates expect (row['product']['name'], row['rack_name'],
+...), so rendering them never goes back to the database.
+"""
+from datetime import timedelta
+
+from django.db.models import F
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import InventoryItem, Product
+from .stock_status import EXPIRED, EXPIRES_SOON, EXPIRES_TODAY, SOON_DAYS, status_case
+
+NO_IMAGE_URL = 'https://placehold.co/300x300/F7F7F7/CCC?text=No+Image'
+
+_COLUMNS = ('id', 'quantity', 'expiry_date', 'store_price', 'suggested_price', 'status',
+            'rack_id', 'applied_rule_id', 'promotion_id')
+_JOINED = {
+    'effective_category_id': Coalesce('category_id', 'product__category_id'),  # InventoryItem.get_category
+    'rack_name': F('rack__name'),
+    'applied_rule_name': F('applied_rule__name'),
+    'promotion_name': F('promotion__name'),
+    'product_barcode': F('product__barcode'),
+    'product_name': F('product__name'),
+    'product_brand': F('product__brand'),
+    'product_image_url': F('product__image_url'),
+    'product_cover_image': F('product__cover_image'),
+}
+
+
+def _image_url(cover_image, image_url):
+    """Same choice as Product.display_image_url, from the raw column values."""
+    if cover_image:
+        return Product._meta.get_field('cover_image').storage.url(cover_image)
+    return image_url or NO_IMAGE_URL
+
+
+def _row(values, today):
+    days = (values['expiry_date'] - today).days
+    row = {key: value for key, value in values.items() if not key.startswith('product_')}
+    row['product'] = {
+        'barcode': values['product_barcode'],
+        'name': values['product_name'],
+        'brand': values['product_brand'],
+        'image_url': _image_url(values['product_cover_image'], values['product_image_url']),
+    }
+    row['days_left'] = max(days, 0)
+    row['days_since_expiry'] = max(-days, 0)
+    return row
+
+
+def urgent_items(supermarket, today=None):
+    """Rows for every batch of `supermarket` expiring within SOON_DAYS (or expired), soonest first."""
+    today = today or timezone.localdate()
+    queryset = (InventoryItem.objects
+                .filter(supermarket=supermarket, expiry_date__lte=today + timedelta(days=SOON_DAYS))
+                .annotate(status=status_case(today))
+                .order_by('expiry_date', 'pk')
+                .values(*_COLUMNS, **_JOINED))
+    return [_row(values, today) for values in queryset]
+
+
+def bucketed(rows):
+    """{EXPIRED: [...], EXPIRES_TODAY: [...], EXPIRES_SOON: [...]} from urgent_items() rows."""
+    buckets = {EXPIRED: [], EXPIRES_TODAY: [], EXPIRES_SOON: []}
+    for row in rows:
+        buckets[row['status']].append(row)
+    return buckets
+
+
+def api_payload(rows):
+    """JSON list for the dashboard's "Urgent Attention" panel."""
+    return [{
+        'id': row['id'],
+        'product': row['product'],
+        'quantity': row['quantity'],
+        'rack_name': row['rack_name'] or 'N/A',
+        'status': row['status'],
+        'days_left': row['days_left'],
+        'days_since_expiry': row['days_since_expiry'],
+    } for row in rows]
@@ -71,6 +71,7 @@ path('supermarket/<int:supermarket_id>/scan-redirect/', views.scan_redirect_view
     path('supermarket/<int:supermarket_id>/inventory/item/<int:item_id>/edit/', views.edit_inventory_item, name='edit_inventory_item'),
     path('supermarket/<int:supermarket_id>/inventory/item/<int:item_id>/delete/', views.delete_inventory_item, name='delete_inventory_item'),
     path('supermarket/<int:supermarket_id>/inventory/export/', views.export_inventory_csv, name='export_inventory_csv'),
+    path('supermarket/<int:supermarket_id>/inventory/import/', views.inventory_import_view, name='inventory_import'),
 
     # Product Catalog & CRUD
     path('products/<int:supermarket_id>/', views.product_list_view, name='product_list'),
@@ -104,6 +105,8 @@ path('supermarket/<int:supermarket_id>/scan-redirect/', views.scan_redirect_view
 
     # --- FIX: Made API path more specific and conventional for search ---
     path('api/products/search/', views.product_search_api, name='product_search_api'),
+    path('api/categories/', views.category_list_api, name='category_list_api'),
+    path('api/supermarket/<int:supermarket_id>/reference-data/', views.reference_data_api, name='reference_data_api'),
 
     # ✅ NEW URLs FOR RACK MANAGEMENT
     path('<int:supermarket_id>/racks/', views.rack_list_create_view, name='rack_list'),
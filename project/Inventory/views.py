@@ -14,10 +14,15 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
 from order.models import ProductPackaging
+from order.scan_resolver import resolve_barcode, resolve_product
+from .stock_status import EXPIRED, EXPIRES_SOON, EXPIRES_TODAY, FRESH, STATUS_CHOICES, keyset_page, status_case, status_counts, status_q
+from .urgent_items import api_payload, bucketed, urgent_items
+from .competitive_prices import PAGE_SIZE as COMPETITIVE_PAGE_SIZE, attach_competitors, competitive_prices
 from pricing.models import CompetitorPrice, WastageRecord, DiscountedSale
 from product_price import models
 from .tasks import scrape_product_task  # Correctly import the Celery task
 from .scraping_utils import get_product_info_cascade  # Correctly import the cascade function
+from .gtin import canonical_barcode, external_barcode
 
 
 # --- Page Rendering Views ---
@@ -67,16 +72,14 @@ def scan_redirect_view(request, supermarket_id):
         messages.error(request, "No barcode was provided.")
         return redirect('inventory:scan_item', supermarket_id=supermarket.id)
 
-    try:
-        # Check if the product exists in the master catalog
-        product = Product.objects.get(barcode=barcode)
-
+    # Check if the product exists in the master catalog (carton codes resolve to their unit)
+    product, _resolution = resolve_product(barcode)
+    if product:
         # --- PRODUCT EXISTS ---
         # Redirect to the product detail page
         messages.info(request, f"Product found: {product.name}")
         return redirect('inventory:product_detail', supermarket_id=supermarket.id, product_barcode=product.barcode)
-
-    except Product.DoesNotExist:
+    else:
         # --- PRODUCT IS NEW ---
         # Redirect to the 'create product' form, pre-filling the barcode
         messages.warning(request, "New barcode. Please create the product.")
@@ -88,14 +91,14 @@ def scan_redirect_view(request, supermarket_id):
 @login_required(login_url='account_login')
 def inventory_list_view(request, supermarket_id):
     """
-    Displays a filterable list of all inventory items, GROUPED BY PRODUCT.
+    Displays a filterable, keyset-paginated list of the store's inventory batches.
+    Status and status counts are computed in SQL against one `today`.
     """
     supermarket = get_object_or_404(Supermarket, pk=supermarket_id, owner=request.user)
+    today = timezone.localdate()
 
     # ✅ FIX: Efficiently pre-fetch all related models, including the new 'rack'
-    inventory_items = supermarket.inventory_items.all().select_related(
-        'product', 'category', 'product__category', 'rack'
-    )
+    inventory_items = InventoryItem.objects.for_list(supermarket)
 
     # Get filter parameters from the URL
     search_query = request.GET.get('q', '')
@@ -104,39 +107,48 @@ def inventory_list_view(request, supermarket_id):
     rack_filter = request.GET.get('rack', '')  # ✅ ADDED: Get new rack filter
 
     if search_query:
-        inventory_items = inventory_items.filter(
-            Q(product__name__icontains=search_query) |
-            Q(product__brand__icontains=search_query) |
-            Q(product__barcode__icontains=search_query)
-        )
+        inventory_items = search(inventory_items, search_query, prefix='product__')
     if category_filter:
+        # Both joins are to-one, so no duplicates (and no DISTINCT) are needed
         inventory_items = inventory_items.filter(
             Q(category__id=category_filter) | Q(product__category__id=category_filter)
-        ).distinct()
-
-    if status_filter:
-        today = timezone.now().date()
-        if status_filter == 'fresh':
-            inventory_items = inventory_items.filter(expiry_date__gt=today + timezone.timedelta(days=7))
-        elif status_filter == 'expires_soon':
-            inventory_items = inventory_items.filter(
-                expiry_date__range=[today + timezone.timedelta(days=1), today + timezone.timedelta(days=7)])
-        elif status_filter == 'expires_today':
-            inventory_items = inventory_items.filter(expiry_date=today)
-        elif status_filter == 'expired':
-            inventory_items = inventory_items.filter(expiry_date__lt=today)
+        )
 
     # ✅ ADDED: New filter logic for rack
     if rack_filter:
         inventory_items = inventory_items.filter(rack__id=rack_filter)
 
-    categories = Category.objects.all()
-    # ✅ ADDED: Get all racks for this supermarket to populate the dropdown
-    racks = Rack.objects.filter(supermarket=supermarket).order_by('name')
+    # Counts per status for the other filters, in one query
+    status_totals = status_counts(inventory_items, today)
+
+    if status_filter and status_q(status_filter, today) is not None:
+        inventory_items = inventory_items.filter(status_q(status_filter, today))
+
+    page = keyset_page(
+        inventory_items.annotate(stock_status=status_case(today)),
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
+
+    categories = category_choices()
+    racks = rack_choices(supermarket.pk)
+
+    # Filters without the page cursor, for the pagination and status links
+    filters = request.GET.copy()
+    for key in ('after', 'before'):
+        filters.pop(key, None)
+    status_filters = filters.copy()
+    status_filters.pop('status', None)
 
     context = {
         'supermarket': supermarket,
-        'inventory_items': inventory_items.order_by('expiry_date'),  # Order the final list
+        'inventory_items': page.items,
+        'next_cursor': page.next_cursor,
+        'prev_cursor': page.prev_cursor,
+        'filter_query': filters.urlencode(),
+        'status_filter_query': status_filters.urlencode(),
+        'status_tabs': [(status, label, status_totals[status]) for status, label in STATUS_CHOICES],
+        'status_total': status_totals['total'],
         'categories': categories,
         'racks': racks,  # ✅ Pass racks to the template
         'search_query': search_query,
@@ -175,9 +187,8 @@ def edit_inventory_item(request, supermarket_id, item_id):
         messages.success(request, f"Updated {item.product.name}.")
         return redirect('inventory:inventory_list', supermarket_id=supermarket.id)
 
-    categories = Category.objects.all()
-    # ✅ FIX: Fetch all racks *for this supermarket* to show in the dropdown
-    racks = Rack.objects.filter(supermarket=supermarket)
+    categories = category_choices()
+    racks = rack_choices(supermarket.pk)
 
     context = {
         'supermarket': supermarket,
@@ -188,6 +199,33 @@ def edit_inventory_item(request, supermarket_id, item_id):
     return render(request, 'inventory/edit_inventory_item.html', context)
 
 
+@login_required(login_url='account_login')
+def inventory_import_view(request, supermarket_id):
+    """
+    Bulk-imports a supplier delivery note (CSV/XLSX) and shows a per-line report.
+    """
+    supermarket = get_object_or_404(Supermarket, pk=supermarket_id, owner=request.user)
+    report = None
+
+    if request.method == 'POST':
+        form = InventoryImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            try:
+                report = import_inventory_file(supermarket, form.cleaned_data['file'])
+                messages.success(request, f"Imported {report['lines_ok']} lines: "
+                                          f"{report['created']} new batches, {report['updated']} updated.")
+            except ImportFileError as e:
+                messages.error(request, str(e))
+    else:
+        form = InventoryImportForm()
+
+    return render(request, 'inventory/inventory_import.html', {
+        'supermarket': supermarket,
+        'form': form,
+        'report': report,
+    })
+
+
 @login_required
 def export_inventory_csv(request, supermarket_id):
     supermarket = get_object_or_404(Supermarket, pk=supermarket_id, owner=request.user)
@@ -228,26 +266,27 @@ def product_list_view(request, supermarket_id):
     """
     supermarket = get_object_or_404(Supermarket, pk=supermarket_id, owner=request.user)
 
-    # --- ✅ QUERY FOR RACKS ---
-    racks = Rack.objects.filter(supermarket=supermarket).order_by('name')
+    racks = rack_choices(supermarket.pk)
 
-    products_list = Product.objects.all().order_by('name')
+    products_list = Product.objects.all().order_by('name', 'id')
     search_query = request.GET.get('q', '')
     category_filter = request.GET.get('category', '')
 
     if search_query:
-        products_list = products_list.filter(
-            Q(name__icontains=search_query) |
-            Q(brand__icontains=search_query) |
-            Q(barcode__icontains=search_query)
-        )
+        products_list = search(products_list, search_query)
     if category_filter:
         products_list = products_list.filter(category__id=category_filter)
 
-    categories = Category.objects.all()
+    categories = category_choices()
 
     paginator = Paginator(products_list, 100)
     page_number = request.GET.get('page')
+
+    # Scan to find: jump to the page holding the scanned barcode
+    if search_query and not page_number:
+        page_number = page_number_for(products_list, canonical_barcode(search_query), ('name', 'id'), 100,
+                                      field='canonical_barcode')
+
     products_page = paginator.get_page(page_number)
 
     context = {
@@ -266,8 +305,8 @@ def product_list_view(request, supermarket_id):
 def product_detail_view(request, supermarket_id, product_barcode):
     """(READ) Displays detailed information about a single product."""
     supermarket = get_object_or_404(Supermarket, pk=supermarket_id, owner=request.user)
-    product = get_object_or_404(Product, barcode=product_barcode)
-    inventory_items = InventoryItem.objects.filter(supermarket=supermarket, product=product).order_by('expiry_date')
+    product = get_object_or_404(Product.objects.for_stored_barcode(product_barcode))
+    inventory_items = InventoryItem.objects.product_batches(supermarket, product)
     competitor_prices = CompetitorPrice.objects.filter(product=product).order_by('price')
     context = {
         'supermarket': supermarket,
@@ -391,7 +430,7 @@ def add_inventory_from_product_list(request, supermarket_id, product_barcode):
     now with auto-fetching for price, category, and rack.
     """
     supermarket = get_object_or_404(Supermarket, pk=supermarket_id, owner=request.user)
-    product = get_object_or_404(Product, barcode=product_barcode)
+    product = get_object_or_404(Product.objects.for_stored_barcode(product_barcode))
     # --- 1. Get all data from the form ---
     # We get the user's explicit choices from the form first
     form_category_id = request.POST.get('category_id')
@@ -444,26 +483,19 @@ def add_inventory_from_product_list(request, supermarket_id, product_barcode):
         product.cover_image = uploaded_image
         product.save()
 
-    # --- 6. ✅ FIX: Improved Create or Update Logic ---
-    # This logic is much safer. It finds a batch based on *all* its
-    # properties, and only sets quantity in the 'defaults'.
+    # --- 6. Create or Update in one statement ---
+    # A batch is (product, expiry, price, rack); an existing one just gets
+    # the quantity added, even when another scan of it runs concurrently.
     try:
-        item, created = InventoryItem.objects.get_or_create(
-            supermarket=supermarket,
-            product=product,
-            expiry_date=form_expiry_date,
-            store_price=final_store_price,
+        item_id, created = InventoryItem.objects.add_quantity(
+            supermarket, product, form_expiry_date, form_quantity,
             rack_id=final_rack_id,
+            store_price=final_store_price,
             category_id=final_category_id,
             manufacture_date=form_manufacture_date,
-            defaults={'quantity': form_quantity}  # Only set quantity if new
         )
 
-
         if not created:
-            # If the batch already exists, just add the quantity
-            item.quantity = F('quantity') + form_quantity
-            item.save()
             messages.success(request, f"Added {form_quantity} more to an existing batch of {product.name}.")
         else:
             # A new batch was created
@@ -471,7 +503,7 @@ def add_inventory_from_product_list(request, supermarket_id, product_barcode):
 
     # --- 7. ✅ FIX: Cleaned up Exception Handling ---
     except IntegrityError:
-        messages.error(request, "Database error. This exact item (product, expiry, price, rack) may already exist.")
+        messages.error(request, "Database error. The selected rack or category no longer exists.")
     except Exception as e:
         messages.error(request, f"An unexpected error occurred: {e}")
 
@@ -511,7 +543,7 @@ def create_product_view(request, supermarket_id):
         initial_data = {'barcode': barcode_from_scan}
         if barcode_from_scan:
             try:
-                product_info = get_product_info_cascade(barcode_from_scan)
+                product_info = get_product_info_cascade(external_barcode(barcode_from_scan))
                 if product_info and product_info.get('name'):
                     initial_data['name'] = product_info.get('name')
                     initial_data['brand'] = product_info.get('brand')
@@ -532,14 +564,21 @@ def create_product_view(request, supermarket_id):
     }
     return render(request, 'inventory/product_form.html', context)
 
-from .forms import ProductForm, RackForm  # Import the new form
+from .forms import ProductForm, RackForm, InventoryImportForm  # Import the new form
+from .bulk_import import import_inventory_file, ImportFileError
+from .pagination import page_number_for
+from .search import search
+from .autocomplete import autocomplete_index, SUGGESTION_LIMIT
+from .reference_data import categories as category_choices, racks as rack_choices, reference_data, reference_version
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
 
 
 @login_required
 def edit_product_view(request, supermarket_id, product_barcode):
     """(UPDATE) Displays a form to edit an existing product's details."""
     supermarket = get_object_or_404(Supermarket, pk=supermarket_id, owner=request.user)
-    product = get_object_or_404(Product, barcode=product_barcode)
+    product = get_object_or_404(Product.objects.for_stored_barcode(product_barcode))
 
     if request.method == 'POST':
         # Instantiate the form with all submitted data:
@@ -589,7 +628,7 @@ from django.contrib import messages
 def delete_product_view(request, supermarket_id, product_barcode):
     """(DELETE) Handles the deletion of a product from the master catalog."""
     supermarket = get_object_or_404(Supermarket, pk=supermarket_id, owner=request.user)
-    product = get_object_or_404(Product, barcode=product_barcode)
+    product = get_object_or_404(Product.objects.for_stored_barcode(product_barcode))
 
     if request.method == 'POST':
         product_name = product.name
@@ -607,17 +646,15 @@ def delete_product_view(request, supermarket_id, product_barcode):
 @login_required
 def alert_monitor_view(request, supermarket_id):
     supermarket = get_object_or_404(Supermarket, pk=supermarket_id, owner=request.user)
-    today = timezone.now().date()
-    urgent_items = supermarket.inventory_items.filter(
-        Q(expiry_date__lt=today) | Q(expiry_date__lte=today + timezone.timedelta(days=7))
-    ).select_related('product').order_by('expiry_date')
-
-    for item in urgent_items:
-        days_diff = (item.expiry_date - today).days
-        item.days_left = days_diff if days_diff >= 0 else 0
-        item.days_since_expiry = abs(days_diff) if days_diff < 0 else 0
-
-    return render(request, 'inventory/alert_monitor.html', {'supermarket': supermarket, 'urgent_items': urgent_items})
+    rows = urgent_items(supermarket)
+    buckets = bucketed(rows)
+    return render(request, 'inventory/alert_monitor.html', {
+        'supermarket': supermarket,
+        'expired_items': buckets[EXPIRED],
+        'expires_today_items': buckets[EXPIRES_TODAY],
+        'expires_soon_items': buckets[EXPIRES_SOON],
+        'total_urgent_count': len(rows),
+    })
 
 @require_POST
 @login_required
@@ -630,20 +667,11 @@ def delete_inventory_item(request, supermarket_id, item_id):
 @login_required
 def competitive_price_view(request, supermarket_id):
     supermarket = get_object_or_404(Supermarket, pk=supermarket_id, owner=request.user)
-    products_in_inventory = Product.objects.filter(inventory_instances__supermarket=supermarket).distinct()
-    product_prices = []
-    for product in products_in_inventory:
-        inventory_item = product.inventory_instances.filter(supermarket=supermarket).first()
-        competitors = product.competitor_prices.order_by('price')
-        stats = competitors.aggregate(avg_price=Avg('price'), min_price=Min('price'))
-        difference = None
-        if inventory_item and inventory_item.store_price and stats['avg_price']:
-            difference = inventory_item.store_price - stats['avg_price']
-        product_prices.append(
-            {'product': product, 'store_price': inventory_item.store_price if inventory_item else None,
-             'competitors': competitors, 'stats': stats, 'difference': difference})
+    paginator = Paginator(competitive_prices(supermarket), COMPETITIVE_PAGE_SIZE)
+    page = paginator.get_page(request.GET.get('page'))
+    page.object_list = attach_competitors(list(page.object_list))
     return render(request, 'inventory/competitive_price_dashboard.html',
-                  {'supermarket': supermarket, 'product_prices': product_prices})
+                  {'supermarket': supermarket, 'product_prices': page})
 # --- Management Views ---
 @login_required
 def staff_management_view(request, supermarket_id):
@@ -737,7 +765,7 @@ def supermarket_list_api(request):
 @permission_classes([IsAuthenticated])
 def scrape_prices_api(request, supermarket_id, product_barcode):
     get_object_or_404(Supermarket, pk=supermarket_id, owner=request.user)
-    get_object_or_404(Product, pk=product_barcode)
+    get_object_or_404(Product.objects.for_stored_barcode(product_barcode))
     # Trigger the background Celery task
     scrape_product_task.delay(product_barcode)
     return Response({'message': 'Price analysis has started. The results will be updated automatically in a moment.'},
@@ -776,11 +804,7 @@ def product_filter_api(request, supermarket_id):
     product_list = Product.objects.all()
 
     if search_query:
-        product_list = product_list.filter(
-            Q(name__icontains=search_query) |
-            Q(brand__icontains=search_query) |
-            Q(barcode__icontains=search_query)
-        )
+        product_list = search(product_list, search_query)
 
     if category_id:
         product_list = product_list.filter(category__id=category_id)
@@ -824,49 +848,55 @@ def product_filter_api(request, supermarket_id):
 def product_search_api(request):
     """
     API endpoint for the live product search.
-    Returns both the filtered products and all available categories.
+    Answers from the worker's in-memory autocomplete index; the category list
+    for the modal dropdown is served separately by category_list_api.
     """
     search_query = request.GET.get('q', '').strip()
     category_id = request.GET.get('category', '')
-
-    products = Product.objects.all().order_by('name')
+    category_id = int(category_id) if category_id.isdigit() else None
 
     if search_query:
-        products = products.filter(
-            Q(name__icontains=search_query) |
-            Q(brand__icontains=search_query) |
-            Q(barcode__icontains=search_query)
-        )
-
-    # This filter assumes a Product might have a direct category link.
-    # If not, it filters based on its instances in inventory. Adjust if your model is different.
-    if category_id:
-        try:  # Assuming Product has a direct ForeignKey 'category'
-            products = products.filter(category__id=category_id)
-        except:  # Fallback to checking inventory instances if direct link fails
-            products = products.filter(inventory_instances__category__id=category_id).distinct()
-
-    products = products[:20]  # Limit results
+        products = autocomplete_index().suggest(search_query, category_id=category_id)
+    else:
+        products = Product.objects.order_by('name')
+        if category_id:
+            products = products.filter(category_id=category_id)
+        products = products[:SUGGESTION_LIMIT]
 
     product_data = [{
         'name': p.name,
         'brand': p.brand,
         'barcode': p.barcode,
         'image_url': p.image_url or '',
-        'category_id': p.category.id if hasattr(p, 'category') and p.category else None
+        'category_id': p.category_id,
     } for p in products]
 
-    # Always send all categories so the modal dropdown can be populated
-    all_categories = Category.objects.all().order_by('name')
-    category_data = [{'id': c.id, 'name': c.name} for c in all_categories]
+    return JsonResponse({'products': product_data})
 
-    # Structure the response in the required format
-    response_data = {
-        'products': product_data,
-        'categories': category_data
-    }
 
-    return JsonResponse(response_data)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def category_list_api(request):
+    """All categories, for the add-product modal dropdown (cached until a category changes)."""
+    response = JsonResponse({'categories': category_choices()})
+    patch_cache_control(response, private=True, max_age=300)
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def reference_data_api(request, supermarket_id):
+    """
+    Categories, racks, suppliers and competitors in one response, for handheld
+    clients to cache. Answers 304 when the client's ETag is still current.
+    """
+    supermarket = get_object_or_404(Supermarket, pk=supermarket_id, owner=request.user)
+    data = reference_data(supermarket.pk)
+    etag = quote_etag(data['version'])
+    response = get_conditional_response(request, etag=etag) or JsonResponse(data)
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def product_filter_api(request, supermarket_id):
@@ -883,11 +913,7 @@ def product_filter_api(request, supermarket_id):
     product_list = Product.objects.all()
 
     if search_query:
-        product_list = product_list.filter(
-            Q(name__icontains=search_query) |
-            Q(brand__icontains=search_query) |
-            Q(barcode__icontains=search_query)
-        )
+        product_list = search(product_list, search_query)
 
     if category_id:
         product_list = product_list.filter(category__id=category_id)
@@ -928,6 +954,7 @@ def product_filter_api(request, supermarket_id):
     })
 from django.db.models import F
 from django.db import IntegrityError
+from django.http import Http404
 import logging  # Import the logging library
 
 # Get an instance of a logger
@@ -951,11 +978,22 @@ def scan_api(request):
         if not barcode:
             return Response({'error': 'Barcode required.'}, status=400)
         try:
-            product, created = Product.objects.get_or_create(barcode=barcode, defaults={'name': f'Product {barcode}'})
+            # A carton code resolves to its unit product; unknown codes create the product
+            product, resolution = resolve_product(barcode)
+            created = False
+            if product is None:
+                # A product left without a key under this very code, or a new one
+                product = Product.objects.for_stored_barcode(barcode).first()
+                if product is None:
+                    product, created = Product.objects.get_or_create(
+                        canonical_barcode=canonical_barcode(barcode),
+                        defaults={'barcode': barcode, 'name': f'Product {barcode}'},
+                    )
+                resolution = resolve_barcode(barcode)
             # --- ✅ Scrape new fields ---
             if (created or not product.name or product.name.startswith("Product ")) and not product.cover_image:
                 try:
-                    product_info = get_product_info_cascade(barcode)
+                    product_info = get_product_info_cascade(product.external_barcode)
                     if product_info and product_info.get('name'):
                         product.name = product_info.get('name')
                         product.brand = product_info.get('brand')
@@ -966,9 +1004,7 @@ def scan_api(request):
                 except Exception as e:
                     logger.warning(f"Scraping failed for {barcode}: {e}")
 
-            existing_items = InventoryItem.objects.filter(supermarket=supermarket, product=product).select_related(
-                'rack').order_by('expiry_date')
-            categories = list(Category.objects.values('id', 'name'))
+            existing_items = InventoryItem.objects.product_batches(supermarket, product).select_related('rack')
 
             # --- ✅ AUTO-FETCH ALL DEFAULTS ---
             default_price = None
@@ -983,6 +1019,7 @@ def scan_api(request):
                     default_rack_id = defaults_entry.default_rack_id
             except ProductPrice.DoesNotExist:
                 pass
+            version = reference_version(supermarket.pk)
             return Response({
                 'product': {
                     'barcode': product.barcode, 'name': product.name, 'brand': product.brand,
@@ -990,12 +1027,16 @@ def scan_api(request):
                     'default_store_price': default_price,
                     'category_id': default_category_id,  # Send the smart default
                     'default_rack_id': default_rack_id,  # Send the smart default
+                    'scan_units': resolution.units if resolution else 1,  # units per scan (carton = units_per_carton)
                 },
                 'existing_items': [
                     {'id': item.id, 'quantity': item.quantity, 'expiry_date': item.expiry_date, 'rack_id': item.rack_id,
                      'rack_name': item.rack.name if item.rack else None, 'store_price': item.store_price} for item in
                     existing_items],
-                'categories': categories
+                'reference_version': version,
+                # Clients send back the reference_version (reference_data_api's ETag) they hold;
+                # the category list is only sent when theirs is missing or stale
+                **({} if request.data.get('reference_version') == version else {'categories': category_choices()}),
             })
         except Exception as e:
             logger.error(f"Error in scan_api lookup: {e}", exc_info=True)
@@ -1004,7 +1045,9 @@ def scan_api(request):
     elif mode == 'add':
         data = request.data
         try:
-            product = get_object_or_404(Product, barcode=data.get('barcode'))
+            product, resolution = resolve_product(data.get('barcode'))
+            if product is None:
+                raise Http404("Product not found.")
 
             # --- 1. Get explicit choices from the form ---
             form_category_id = data.get('category_id') or None
@@ -1013,7 +1056,8 @@ def scan_api(request):
             form_store_price = form_price_str if form_price_str and form_price_str.strip() else None
             form_manufacture_date = data.get('manufacture_date') or None
             form_expiry_date = data.get('expiry_date')
-            form_quantity = int(data.get('quantity', 1))
+            # quantity counts scans: a carton scan adds units_per_carton units each
+            form_quantity = int(data.get('quantity', 1)) * resolution.units
 
             if not form_expiry_date:
                 return Response({'error': 'Expiry date is required.'}, status=400)
@@ -1038,26 +1082,21 @@ def scan_api(request):
             if final_category_id is None and product.category_id:
                 final_category_id = product.category_id
 
-            # --- 5. Create or Update Logic ---
-            item, created = InventoryItem.objects.get_or_create(
-                supermarket=supermarket,
-                product=product,
-                expiry_date=form_expiry_date,
-                store_price=final_store_price,
+            # --- 5. Create or Update Logic (single-statement upsert, safe under concurrent scans) ---
+            item_id, created = InventoryItem.objects.add_quantity(
+                supermarket, product, form_expiry_date, form_quantity,
                 rack_id=final_rack_id,
+                store_price=final_store_price,
                 category_id=final_category_id,
                 manufacture_date=form_manufacture_date,
-                defaults={'quantity': form_quantity}
             )
             if not created:
-                item.quantity = F('quantity') + form_quantity
-                item.save()
                 return Response({'message': 'Updated quantity for existing batch.'}, status=200)
             else:
                 return Response({'message': f'New batch of {product.name} added.'}, status=201)
 
         except IntegrityError:
-            return Response({'error': 'A batch with these exact details already exists.'}, status=400)
+            return Response({'error': 'The selected rack or category no longer exists.'}, status=400)
         except Exception as e:
             logger.error(f"Error in scan_api add mode: {e}", exc_info=True)
             return Response({'error': f'An error occurred: {e}'}, status=400)
@@ -1321,15 +1360,10 @@ from .scraping_utils import get_product_info_cascade
 @permission_classes([IsAuthenticated])
 def dashboard_stats_api(request, supermarket_id):
     supermarket = get_object_or_404(Supermarket, pk=supermarket_id, owner=request.user)
-    today = timezone.now().date()
-    stats = supermarket.inventory_items.aggregate(total=Sum('quantity'), fresh=Count('id', filter=Q(
-        expiry_date__gt=today + timezone.timedelta(days=7))), soon=Count('id', filter=Q(expiry_date__gte=today,
-                                                                                        expiry_date__lte=today + timezone.timedelta(
-                                                                                            days=7))),
-                                                  expired=Count('id', filter=Q(expiry_date__lt=today)))
+    counts = status_counts(supermarket.inventory_items.all(), timezone.localdate(), quantity=Sum('quantity'))
     return Response(
-        {'total_items': stats['total'] or 0, 'fresh_count': stats['fresh'], 'expires_soon_count': stats['soon'],
-         'expired_count': stats['expired']})
+        {'total_items': counts['quantity'] or 0, 'fresh_count': counts[FRESH],
+         'expires_soon_count': counts[EXPIRES_TODAY] + counts[EXPIRES_SOON], 'expired_count': counts[EXPIRED]})
 
 
 @api_view(['GET'])
@@ -1337,32 +1371,9 @@ def dashboard_stats_api(request, supermarket_id):
 def urgent_items_api(request, supermarket_id):
     """
     API endpoint for the "Urgent Attention" list on the dashboard.
-    This version now includes the product barcode in the response.
+    One query for the whole list, see Inventory/urgent_items.py.
     """
     supermarket = get_object_or_404(Supermarket, pk=supermarket_id, owner=request.user)
-    today = timezone.now().date()
-    urgent_items = supermarket.inventory_items.filter(
-        Q(expiry_date__lt=today) | Q(expiry_date__lte=today + timezone.timedelta(days=7))).select_related(
-        'product').order_by('expiry_date')
-
-    data = []
-    for item in urgent_items:
-        days_diff = (item.expiry_date - today).days
-        data.append({
-            'id': item.id,
-            'product': {
-                'name': item.product.name,
-                'brand': item.product.brand,
-                'image_url': item.product.image_url,
-                'barcode': item.product.barcode  # --- FIX: Barcode is now included ---
-            },
-            'quantity': item.quantity,
-            'rack_name': item.rack.name if item.rack else 'N/A',
-            'rack_zone': item.rack_zone,
-            'status': item.status,
-            'days_left': days_diff if days_diff >= 0 else 0,
-            'days_since_expiry': abs(days_diff) if days_diff < 0 else 0
-        })
-    return Response(data)
+    return Response(api_payload(urgent_items(supermarket)))
 
 # ... (all other views and API endpoints remain the same) ...
@@ -1,6 +1,6 @@
 # tickettheme/admin.py
 from django.contrib import admin
-from .models import TicketTheme, TicketLabel
+from .models import TicketTheme, TicketLabel, TicketPrintJob
 
 
 @admin.register(TicketTheme)
@@ -12,3 +12,10 @@ class TicketThemeAdmin(admin.ModelAdmin):
 class TicketLabelAdmin(admin.ModelAdmin):
     list_display = ("product", "unit_price", "price_per_liter", "theme", "created_at")
     list_filter = ("supermarket",)
+
+
+@admin.register(TicketPrintJob)
+class TicketPrintJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "supermarket", "sheet", "status", "ticket_count", "pages", "created_at", "finished_at")
+    list_filter = ("status", "supermarket")
+    readonly_fields = ("file", "ticket_count", "pages", "error", "created_at", "started_at", "finished_at")
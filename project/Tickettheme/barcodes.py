@@ -0,0 +1,93 @@
+# Tickettheme/barcodes.py
+"""
+Barcode drawing for ticket PDFs.
+
+Barcodes are drawn as ReportLab vector graphics (no PNG encode/decode).
+The Drawing for each (symbology, code, size) is kept in a process-wide LRU,
+and inside one PDF each distinct barcode is written once as a form XObject
+and referenced by every ticket that shows it.
+
+python-barcode's ImageWriter stays as a fallback for codes the native
+widgets reject; its PNGs go through the same kind of LRU.
+"""
+import logging
+from functools import lru_cache
+from io import BytesIO
+
+from reportlab.graphics import renderPDF
+from reportlab.graphics.barcode import createBarcodeDrawing
+from reportlab.lib.utils import ImageReader
+
+logger = logging.getLogger(__name__)
+
+CACHE_SIZE = 4096
+
+# Digit-only codes by length -> symbology; anything else is printed as Code 128
+SYMBOLOGY_BY_LENGTH = {8: 'EAN8', 12: 'UPCA', 13: 'EAN13'}
+
+
+def symbology_for(code):
+    if code.isdigit():
+        return SYMBOLOGY_BY_LENGTH.get(len(code), 'Code128')
+    return 'Code128'
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def barcode_drawing(symbology, code, width, height):
+    """Vector Drawing of `code`, scaled to width x height points."""
+    return createBarcodeDrawing(symbology, value=code, width=width, height=height, humanReadable=True)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def barcode_image(symbology, code):
+    """Raster fallback: PNG rendered by python-barcode, wrapped for canvas.drawImage."""
+    import barcode
+    from barcode.writer import ImageWriter
+
+    buf = BytesIO()
+    barcode.get(symbology.lower(), code, writer=ImageWriter()).write(buf)
+    buf.seek(0)
+    return ImageReader(buf)
+
+
+def _form_name(symbology, code, width, height):
+    safe = ''.join(ch if ch.isalnum() else '_' for ch in code)
+    return f"bc_{symbology}_{safe}_{width:g}x{height:g}".replace('.', '_')
+
+
+def draw_barcode(canvas_obj, code, x, y, width, height, forms):
+    """
+    Draws `code` at (x, y) in a width x height box on `canvas_obj`.
+    `forms` is the set of form names already written to this canvas; the
+    caller that owns the canvas keeps it for the whole document.
+    Returns False (after logging why) if the code could not be drawn.
+    """
+    code = (code or '').strip()
+    if not code:
+        return False
+
+    symbology = symbology_for(code)
+    name = _form_name(symbology, code, width, height)
+
+    if name not in forms:
+        try:
+            drawing = barcode_drawing(symbology, code, width, height)
+        except Exception:
+            logger.warning("Native barcode drawing failed for %s %r; using raster fallback",
+                           symbology, code, exc_info=True)
+            try:
+                canvas_obj.drawImage(barcode_image(symbology, code), x, y, width=width, height=height)
+                return True
+            except Exception:
+                logger.error("Could not render barcode %s %r", symbology, code, exc_info=True)
+                return False
+        canvas_obj.beginForm(name)
+        renderPDF.draw(drawing, canvas_obj, 0, 0)
+        canvas_obj.endForm()
+        forms.add(name)
+
+    canvas_obj.saveState()
+    canvas_obj.translate(x, y)
+    canvas_obj.doForm(name)
+    canvas_obj.restoreState()
+    return True
@@ -0,0 +1,143 @@
+# Tickettheme/bulk.py
+"""
+Bulk shelf-ticket generation.
+
+Selects the products to re-label (by rack, category, promotion, or "price
+changed since the last printed ticket"), resolves store prices with one
+query and promotions from the store's in-memory promotion index, then
+bulk_creates all TicketLabel snapshots at once.
+"""
+from decimal import Decimal
+
+from django.db.models import OuterRef, Q, Subquery
+
+from Inventory.bulk_import import chunked
+from Inventory.models import Product, ProductPrice, InventoryItem
+from pricing.models import Promotion
+from pricing.promotions import promotion_index
+from .models import TicketLabel
+
+SELECT_RACK = 'rack'
+SELECT_CATEGORY = 'category'
+SELECT_PROMOTION = 'promotion'
+SELECT_PRICE_CHANGED = 'price_changed'
+
+SELECTION_CHOICES = (
+    (SELECT_RACK, 'Rack'),
+    (SELECT_CATEGORY, 'Category'),
+    (SELECT_PROMOTION, 'Promotion'),
+    (SELECT_PRICE_CHANGED, 'Price changed since last print'),
+)
+
+
+def _store_products(supermarket):
+    """Products the store lists (price list) or stocks (inventory), as a subquery-friendly Q."""
+    return (Q(pk__in=ProductPrice.objects.filter(supermarket=supermarket).values('product_id'))
+            | Q(pk__in=InventoryItem.objects.filter(supermarket=supermarket).values('product_id')))
+
+
+def select_products(supermarket, selection, value=None):
+    """
+    Products to label for one selection mode. `value` is the rack, category
+    or promotion id; it is ignored for SELECT_PRICE_CHANGED.
+    """
+    products = Product.objects.all()
+
+    if selection == SELECT_RACK:
+        return products.filter(
+            Q(pk__in=ProductPrice.objects.filter(supermarket=supermarket, default_rack_id=value)
+              .values('product_id'))
+            | Q(pk__in=InventoryItem.objects.filter(supermarket=supermarket, rack_id=value)
+                .values('product_id'))
+        )
+
+    if selection == SELECT_CATEGORY:
+        return products.filter(
+            (Q(category_id=value) & _store_products(supermarket))
+            | Q(pk__in=ProductPrice.objects.filter(supermarket=supermarket, default_category_id=value)
+                .values('product_id'))
+        )
+
+    if selection == SELECT_PROMOTION:
+        promo = Promotion.objects.filter(pk=value, supermarket=supermarket)
+        return products.filter(
+            Q(pk__in=promo.values('products'))
+            | (Q(category_id__in=promo.values('categories')) & _store_products(supermarket))
+        )
+
+    if selection == SELECT_PRICE_CHANGED:
+        # Products with a store price; the price comparison happens after promotions are resolved
+        return products.filter(
+            pk__in=ProductPrice.objects.filter(supermarket=supermarket, price__isnull=False).values('product_id')
+        )
+
+    raise ValueError(f"Unknown selection '{selection}'")
+
+
+def generate_tickets(supermarket, products, theme=None, created_by=None,
+                     only_price_changed=False, skip_queued=True):
+    """
+    Creates one TicketLabel per product in `products` (a Product queryset).
+
+    - Products without a store price are skipped.
+    - `skip_queued` skips products that already wait in the print queue.
+    - `only_price_changed` keeps only products whose resolved price differs
+      from their last printed ticket (or that were never printed).
+
+    Returns {'created', 'no_price', 'queued', 'unchanged'}.
+    """
+    rows = products.order_by().values_list('id', 'barcode', 'name', 'brand', 'category_id')
+    if only_price_changed:
+        last_printed = (TicketLabel.objects
+                        .filter(supermarket=supermarket, product=OuterRef('pk'), printed_at__isnull=False)
+                        .order_by('-printed_at').values('unit_price')[:1])
+        rows = products.order_by().annotate(last_price=Subquery(last_printed)).values_list(
+            'id', 'barcode', 'name', 'brand', 'category_id', 'last_price')
+    rows = list(rows)
+
+    product_ids = [r[0] for r in rows]
+    prices, queued = {}, set()
+    for chunk in chunked(product_ids):
+        prices.update(ProductPrice.objects.filter(
+            supermarket=supermarket, product_id__in=chunk, price__isnull=False
+        ).values_list('product_id', 'price'))
+        if skip_queued:
+            queued.update(TicketLabel.objects.filter(
+                supermarket=supermarket, product_id__in=chunk, printed_at__isnull=True
+            ).values_list('product_id', flat=True))
+
+    promotions = promotion_index(supermarket.pk)
+    labels = []
+    report = {'created': 0, 'no_price': 0, 'queued': 0, 'unchanged': 0}
+    for row in rows:
+        product_id, barcode, name, brand, category_id = row[:5]
+        base_price = prices.get(product_id)
+        if not base_price:
+            report['no_price'] += 1
+            continue
+        if product_id in queued:
+            report['queued'] += 1
+            continue
+
+        final_price, promo_text, original_price = promotions.best_price(product_id, category_id, base_price)
+        final_price = Decimal(final_price).quantize(Decimal('0.01'))
+        if only_price_changed and row[5] is not None and row[5] == final_price:
+            report['unchanged'] += 1
+            continue
+
+        labels.append(TicketLabel(
+            supermarket=supermarket,
+            product_id=product_id,
+            theme=theme,
+            unit_price=final_price,
+            product_name=name,
+            product_brand=brand,
+            unit_barcode=barcode,
+            promo_display=promo_text,
+            promo_original_price=original_price,
+            created_by=created_by,
+        ))
+
+    TicketLabel.objects.bulk_create(labels, batch_size=500)
+    report['created'] = len(labels)
+    return report
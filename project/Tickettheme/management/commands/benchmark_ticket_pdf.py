@@ -0,0 +1,57 @@
+import time
+from decimal import Decimal
+from tempfile import TemporaryFile
+
+from django.core.management.base import BaseCommand, CommandError
+
+from Tickettheme.models import LabelSheet, TicketLabel
+from Tickettheme.sheets import THERMAL_ROLL, layout_error, render_sheets
+
+# A4, 3 x 8 labels of 70 x 37 mm
+A4_3X8 = LabelSheet(
+    name="A4 3x8 70x37",
+    label_width_mm=70, label_height_mm=37, cols=3, rows=8,
+    margin_top_mm=0.5, margin_left_mm=0, gap_vertical_mm=0, gap_horizontal_mm=0,
+)
+
+
+class Command(BaseCommand):
+    help = "Time ticket PDF rendering for N in-memory tickets (nothing is written to the database)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tickets", type=int, default=5000)
+        parser.add_argument("--distinct-barcodes", type=int, default=1000,
+                            help="How many different barcodes the tickets cycle through")
+        parser.add_argument("--sheet", type=int, help="LabelSheet id to benchmark instead of A4 3x8")
+
+    def handle(self, *args, **opts):
+        sheet = A4_3X8
+        if opts["sheet"]:
+            sheet = LabelSheet.objects.filter(pk=opts["sheet"]).first()
+            if sheet is None:
+                raise CommandError(f"LabelSheet {opts['sheet']} does not exist")
+        if layout_error(sheet):
+            raise CommandError(layout_error(sheet))
+
+        distinct = max(1, opts["distinct_barcodes"])
+        tickets = [
+            TicketLabel(
+                product_name=f"Benchmark product {i % distinct}",
+                product_brand="Brand",
+                unit_price=Decimal("1.99") + i % 50,
+                unit_barcode=str(400000000000 + i % distinct),
+                promo_display="-20%" if i % 7 == 0 else None,
+            )
+            for i in range(opts["tickets"])
+        ]
+
+        for layout in (THERMAL_ROLL, sheet):
+            with TemporaryFile() as out:
+                started = time.perf_counter()
+                pages = render_sheets(tickets, layout, out)
+                elapsed = time.perf_counter() - started
+                size = out.tell()
+            self.stdout.write(
+                f"{layout.name}: {len(tickets)} tickets, {pages} pages, "
+                f"{size / 1024 / 1024:.1f} MB, {elapsed:.2f}s ({len(tickets) / elapsed:.0f} tickets/s)"
+            )
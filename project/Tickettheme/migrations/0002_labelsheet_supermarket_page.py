@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Inventory', '0005_inventoryitem_suggested_price'),
+        ('Tickettheme', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='labelsheet',
+            name='page_height_mm',
+            field=models.FloatField(default=297),
+        ),
+        migrations.AddField(
+            model_name='labelsheet',
+            name='page_width_mm',
+            field=models.FloatField(default=210),
+        ),
+        migrations.AddField(
+            model_name='labelsheet',
+            name='supermarket',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='label_sheets', to='Inventory.supermarket'),
+        ),
+    ]
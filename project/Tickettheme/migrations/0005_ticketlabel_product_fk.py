@@ -0,0 +1,27 @@
+"""
+Points TicketLabel back at Product through its new integer primary key
+(see Inventory 0009).
+"""
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Inventory', '0009_product_integer_pk'),
+        ('Tickettheme', '0004_ticketlabel_product_ref'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='ticketlabel',
+            old_name='product_ref',
+            new_name='product',
+        ),
+        migrations.AlterField(
+            model_name='ticketlabel',
+            name='product',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ticketlabel', to='Inventory.product'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:38
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def start_running_jobs(apps, schema_editor):
+    """Jobs already rendering have no start time; date them from creation, as before."""
+    TicketPrintJob = apps.get_model('Tickettheme', 'TicketPrintJob')
+    TicketPrintJob.objects.filter(status='RUNNING').update(started_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Tickettheme', '0005_ticketlabel_product_fk'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticketprintjob',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(start_running_jobs, migrations.RunPython.noop),
+    ]
@@ -166,6 +166,15 @@ class TicketLabel(models.Model):
         on_delete=models.SET_NULL
     )
 
+    # print run that claimed this ticket (see TicketPrintJob)
+    print_job = models.ForeignKey(
+        "TicketPrintJob",
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="tickets"
+    )
+
     class Meta:
         ordering = ['-created_at']
 
@@ -175,8 +184,19 @@ class TicketLabel(models.Model):
 
 
 class LabelSheet(models.Model):
+    supermarket = models.ForeignKey(
+        Supermarket,
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name="label_sheets"
+    )
     name = models.CharField(max_length=50)
 
+    # page the labels are printed on (A4 by default)
+    page_width_mm = models.FloatField(default=210)
+    page_height_mm = models.FloatField(default=297)
+
     # mm sizing
     label_width_mm = models.FloatField()
     label_height_mm = models.FloatField()
@@ -193,3 +213,55 @@ class LabelSheet(models.Model):
         return f"{self.name} ({self.cols}x{self.rows})"
 
 
+class TicketPrintJob(models.Model):
+    """
+    One background print run: the queued tickets it claimed are rendered by a
+    Celery worker, the PDF is stored in `file`, and the tickets are marked
+    printed in the same transaction that marks the job DONE.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "PENDING", "Pending"
+        RUNNING = "RUNNING", "Rendering"
+        DONE = "DONE", "Ready"
+        FAILED = "FAILED", "Failed"
+
+    supermarket = models.ForeignKey(
+        Supermarket,
+        on_delete=models.CASCADE,
+        related_name="ticket_print_jobs"
+    )
+    # null = thermal roll, one ticket per page
+    sheet = models.ForeignKey(
+        LabelSheet,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL
+    )
+    cut_marks = models.BooleanField(default=False)
+
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    file = models.FileField(upload_to="tickets/pdf/%Y/%m/", blank=True)
+    ticket_count = models.PositiveIntegerField(default=0)
+    pages = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        on_delete=models.SET_NULL
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    # set when a worker picks the job up; a RUNNING job's claim goes stale from here
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Print job #{self.pk} — {self.ticket_count} tickets ({self.get_status_display()})"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.Status.DONE, self.Status.FAILED)
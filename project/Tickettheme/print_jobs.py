@@ -0,0 +1,115 @@
+# Tickettheme/print_jobs.py
+"""
+Background print runs of the ticket queue.
+
+queue_print_job() claims the store's queued tickets for a new TicketPrintJob
+and hands the job to a Celery worker once the claim is committed. The worker
+(render_print_job) renders the claimed tickets, stores the PDF, and then in
+one transaction marks the job DONE and its tickets printed — a run that
+fails or dies half-way leaves every ticket in the queue.
+
+A claim is released when its job fails, or when the job has waited in the
+queue for longer than STALE_AFTER since it was created, or been rendering for
+longer than that since a worker started it (worker lost), so the next print
+run picks those tickets up again. A job that finds all of its tickets taken
+by such a later run fails as superseded instead of storing an empty PDF.
+"""
+import logging
+from datetime import timedelta
+from tempfile import SpooledTemporaryFile
+
+from django.core.files import File
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import TicketLabel, TicketPrintJob
+from .sheets import SPOOL_MAX_SIZE, THERMAL_ROLL, render_sheets
+
+logger = logging.getLogger(__name__)
+
+STALE_AFTER = timedelta(minutes=30)
+
+SUPERSEDED = "Superseded: a later print run took over all of its tickets."
+
+
+def _claimable(supermarket, now):
+    stale = now - STALE_AFTER
+    return TicketLabel.objects.filter(supermarket=supermarket, printed_at__isnull=True).filter(
+        Q(print_job__isnull=True)
+        | Q(print_job__status=TicketPrintJob.Status.FAILED)
+        | Q(print_job__status=TicketPrintJob.Status.PENDING, print_job__created_at__lt=stale)
+        | Q(print_job__status=TicketPrintJob.Status.RUNNING, print_job__started_at__lt=stale)
+    )
+
+
+def _fail(job_id, error):
+    TicketPrintJob.objects.filter(pk=job_id).update(
+        status=TicketPrintJob.Status.FAILED, error=error[:1000], finished_at=timezone.now())
+
+
+def queue_print_job(supermarket, sheet=None, cut_marks=False, requested_by=None):
+    """
+    Claims the store's unclaimed queued tickets for a new job and schedules
+    its rendering. Returns the job, or None when there was nothing to print.
+    """
+    from .tasks import render_print_job_task
+
+    now = timezone.now()
+    with transaction.atomic():
+        job = TicketPrintJob.objects.create(
+            supermarket=supermarket, sheet=sheet, cut_marks=cut_marks, requested_by=requested_by)
+        claimed = TicketLabel.objects.filter(
+            pk__in=list(_claimable(supermarket, now).values_list('pk', flat=True))
+        ).update(print_job=job)
+        if not claimed:
+            job.delete()
+            return None
+        job.ticket_count = claimed
+        job.save(update_fields=['ticket_count'])
+        transaction.on_commit(lambda: render_print_job_task.delay(job.pk))
+    return job
+
+
+def render_print_job(job_id):
+    """Renders and stores one job's PDF, then marks its tickets printed. Returns the job."""
+    started = TicketPrintJob.objects.filter(pk=job_id, status=TicketPrintJob.Status.PENDING).update(
+        status=TicketPrintJob.Status.RUNNING, started_at=timezone.now())
+    job = TicketPrintJob.objects.select_related('sheet').get(pk=job_id)
+    if not started:
+        return job  # already rendered, or picked up by another worker
+
+    tickets = job.tickets.select_related('theme').order_by('created_at', 'id')
+    if not tickets.filter(printed_at__isnull=True).exists():
+        _fail(job_id, SUPERSEDED)  # waited in the queue until its claim went stale
+        job.refresh_from_db()
+        return job
+    try:
+        with SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as spool:
+            pages = render_sheets(tickets.iterator(chunk_size=1000), job.sheet or THERMAL_ROLL,
+                                  spool, cut_marks=job.cut_marks)
+            spool.seek(0)
+            job.file.save(f"tickets_{job.supermarket_id}_{job.pk}.pdf", File(spool), save=False)
+    except Exception as exc:
+        logger.exception("Ticket print job %s failed", job_id)
+        _fail(job_id, str(exc))
+        job.refresh_from_db()
+        return job
+
+    try:
+        with transaction.atomic():
+            now = timezone.now()
+            printed = TicketLabel.objects.filter(print_job=job, printed_at__isnull=True).update(printed_at=now)
+            if printed:
+                TicketPrintJob.objects.filter(pk=job_id).update(
+                    status=TicketPrintJob.Status.DONE, file=job.file.name,
+                    pages=pages, ticket_count=printed, finished_at=now)
+            else:  # reclaimed while rendering
+                _fail(job_id, SUPERSEDED)
+    except Exception:
+        job.file.delete(save=False)
+        raise
+    if not printed:
+        job.file.delete(save=False)
+    job.refresh_from_db()
+    return job
@@ -0,0 +1,171 @@
+# Tickettheme/sheets.py
+"""
+Multi-up ticket PDFs laid out by LabelSheet.
+
+Tickets are tiled onto sheet pages (A4 unless the sheet says otherwise):
+`cols` x `rows` cells placed from the top-left margins with the sheet's gaps.
+Each ticket is drawn at its theme size (80x50mm without a theme) and scaled
+to fit its cell, so any theme prints on any layout. THERMAL_ROLL is the old
+one-ticket-per-page output expressed as a 1x1 sheet.
+
+Everything that repeats is written to the PDF once: barcodes are form
+XObjects (see barcodes.py) and the optional cut marks are one form per
+layout referenced by every page.
+
+ReportLab only writes the cross-reference table on save(), so print runs
+render into a spooled temporary file (in memory up to SPOOL_MAX_SIZE, then on
+disk) before it is stored (see print_jobs.py).
+"""
+from collections import namedtuple
+
+from reportlab.lib.units import mm
+from reportlab.pdfgen import canvas
+
+from .barcodes import draw_barcode
+from .models import LabelSheet
+
+DEFAULT_TICKET_SIZE = (80, 50)   # mm, thermal roll ticket
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+CUT_MARK = 3 * mm
+
+THERMAL_ROLL = LabelSheet(
+    name="Thermal roll 80x50",
+    page_width_mm=80, page_height_mm=50,
+    label_width_mm=80, label_height_mm=50,
+    cols=1, rows=1,
+    margin_top_mm=0, margin_left_mm=0, gap_vertical_mm=0, gap_horizontal_mm=0,
+)
+
+# Bottom-left corner and size of one label, in points
+Cell = namedtuple('Cell', 'x y width height')
+
+
+def sheet_cells(sheet):
+    """Label cells of one page, in reading order (left to right, top to bottom)."""
+    page_height = sheet.page_height_mm * mm
+    width, height = sheet.label_width_mm * mm, sheet.label_height_mm * mm
+    cells = []
+    for row in range(sheet.rows):
+        top = (sheet.margin_top_mm + row * (sheet.label_height_mm + sheet.gap_vertical_mm)) * mm
+        for col in range(sheet.cols):
+            left = (sheet.margin_left_mm + col * (sheet.label_width_mm + sheet.gap_horizontal_mm)) * mm
+            cells.append(Cell(left, page_height - top - height, width, height))
+    return cells
+
+
+def layout_error(sheet):
+    """Why `sheet` cannot be printed, or None if its grid fits on the page."""
+    if not sheet.cols or not sheet.rows:
+        return "The layout needs at least one column and one row."
+    if sheet.label_width_mm <= 0 or sheet.label_height_mm <= 0:
+        return "Label width and height must be positive."
+    used_width = (sheet.margin_left_mm + sheet.cols * sheet.label_width_mm
+                  + (sheet.cols - 1) * sheet.gap_horizontal_mm)
+    used_height = (sheet.margin_top_mm + sheet.rows * sheet.label_height_mm
+                   + (sheet.rows - 1) * sheet.gap_vertical_mm)
+    if used_width > sheet.page_width_mm + 0.01 or used_height > sheet.page_height_mm + 0.01:
+        return (f"{sheet.cols}x{sheet.rows} labels need {used_width:g}x{used_height:g} mm, "
+                f"the page is {sheet.page_width_mm:g}x{sheet.page_height_mm:g} mm.")
+    return None
+
+
+def ticket_size(ticket):
+    """(width_mm, height_mm) the ticket is designed at: its theme's, or the thermal default."""
+    if ticket.theme_id and ticket.theme.width_mm and ticket.theme.height_mm:
+        return ticket.theme.width_mm, ticket.theme.height_mm
+    return DEFAULT_TICKET_SIZE
+
+
+# ============================================================
+# DRAW TICKET
+# ============================================================
+def draw_ticket(canvas_obj, ticket, width_mm, height_mm, barcode_forms):
+    """`barcode_forms`: barcode form XObjects already in this PDF (see draw_barcode)."""
+    W = width_mm * mm
+    H = height_mm * mm
+
+    y = H
+
+    # Title
+    canvas_obj.setFont("Helvetica-Bold", 11)
+    canvas_obj.drawString(4*mm, y-6*mm, ticket.product_name[:35])
+
+    # Brand small
+    if ticket.product_brand:
+        canvas_obj.setFont("Helvetica", 7)
+        canvas_obj.drawString(4*mm, y-10*mm, ticket.product_brand[:32])
+
+    # PRICE BIG — FRANPRIX STYLE
+    canvas_obj.setFont("Helvetica-Bold", 28)
+    canvas_obj.drawString(4*mm, y-26*mm, f"{ticket.unit_price:.2f}€")
+
+    # price per liter small
+    if ticket.price_per_liter:
+        canvas_obj.setFont("Helvetica", 7)
+        canvas_obj.drawString(4*mm, y-33*mm, ticket.price_per_liter)
+
+    # Promo Chip
+    if ticket.promo_display:
+        canvas_obj.setFont("Helvetica-Bold", 9)
+        canvas_obj.drawString(4*mm, y-40*mm, f"{ticket.promo_display}")
+
+    # BARCODE (vector, cached — see barcodes.py); print the digits if it cannot be drawn
+    if (not draw_barcode(canvas_obj, ticket.unit_barcode, 4*mm, 3*mm, W*0.78, 13*mm, barcode_forms)
+            and ticket.unit_barcode):
+        canvas_obj.setFont("Helvetica", 8)
+        canvas_obj.drawString(4*mm, 6*mm, ticket.unit_barcode)
+
+
+def _cut_marks_form(canvas_obj, cells):
+    """Corner marks of every cell, as one form XObject shared by all pages."""
+    canvas_obj.beginForm("sheet_cut_marks")
+    canvas_obj.setStrokeGray(0.6)
+    canvas_obj.setLineWidth(0.3)
+    for cell in cells:
+        for cx, dx in ((cell.x, -1), (cell.x + cell.width, 1)):
+            for cy, dy in ((cell.y, -1), (cell.y + cell.height, 1)):
+                canvas_obj.line(cx, cy, cx + dx * CUT_MARK, cy)
+                canvas_obj.line(cx, cy, cx, cy + dy * CUT_MARK)
+    canvas_obj.endForm()
+    return "sheet_cut_marks"
+
+
+def render_sheets(tickets, sheet, out, cut_marks=False):
+    """
+    Writes `tickets` (any iterable, consumed once) tiled on `sheet` to the
+    binary file `out`. Returns the number of pages (0 if there were no tickets).
+    """
+    cells = sheet_cells(sheet)
+    c = canvas.Canvas(out, pagesize=(sheet.page_width_mm * mm, sheet.page_height_mm * mm))
+    marks = _cut_marks_form(c, cells) if cut_marks else None
+    barcode_forms = set()
+
+    pages = slot = 0
+    for ticket in tickets:
+        if slot == 0:
+            pages += 1
+            if marks:
+                c.doForm(marks)
+
+        cell = cells[slot]
+        width_mm, height_mm = ticket_size(ticket)
+        scale = min(cell.width / (width_mm * mm), cell.height / (height_mm * mm))
+        c.saveState()
+        # centre the scaled ticket in its cell
+        c.translate(cell.x + (cell.width - width_mm * mm * scale) / 2,
+                    cell.y + (cell.height - height_mm * mm * scale) / 2)
+        c.scale(scale, scale)
+        draw_ticket(c, ticket, width_mm, height_mm, barcode_forms)
+        c.restoreState()
+
+        slot += 1
+        if slot == len(cells):
+            c.showPage()
+            slot = 0
+
+    if slot:
+        c.showPage()
+    if pages:
+        c.save()
+    return pages
+
@@ -0,0 +1,15 @@
+# Tickettheme/tasks.py
+from celery import shared_task
+
+from .models import TicketPrintJob
+from .print_jobs import render_print_job
+
+
+@shared_task
+def render_print_job_task(job_id):
+    """Renders a queued ticket print run (see print_jobs.queue_print_job)."""
+    try:
+        job = render_print_job(job_id)
+    except TicketPrintJob.DoesNotExist:
+        return f"Print job {job_id} not found"
+    return f"Print job {job.pk}: {job.get_status_display()}, {job.ticket_count} tickets, {job.pages} pages."
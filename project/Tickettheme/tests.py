@@ -1,3 +1,47 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
 
-# Create your tests here.
+from Inventory.models import Product, Supermarket
+from .models import TicketLabel, TicketPrintJob
+from .print_jobs import STALE_AFTER, SUPERSEDED, queue_print_job, render_print_job
+
+LOCAL_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class PrintJobClaimTests(TestCase):
+    """Rendering is scheduled on commit, which TestCase never reaches: the tests render by hand."""
+
+    def setUp(self):
+        owner = get_user_model().objects.create_user(
+            'Store', 'Owner', username='owner', email='owner@example.com', password='pass')
+        self.supermarket = Supermarket.objects.create(name='Store', owner=owner)
+        product = Product.objects.create(barcode='3017620422003', name='Nutella')
+        TicketLabel.objects.create(supermarket=self.supermarket, product=product,
+                                   product_name=product.name, unit_price=2)
+
+    def age(self, job, **fields):
+        TicketPrintJob.objects.filter(pk=job.pk).update(
+            **{field: timezone.now() - STALE_AFTER * 2 for field in fields})
+
+    def test_a_long_queued_job_is_only_stale_once_it_runs_too_long(self):
+        job = queue_print_job(self.supermarket)
+        self.age(job, created_at=True)
+        TicketPrintJob.objects.filter(pk=job.pk).update(
+            status=TicketPrintJob.Status.RUNNING, started_at=timezone.now())
+        self.assertIsNone(queue_print_job(self.supermarket))
+
+        self.age(job, started_at=True)
+        self.assertIsNotNone(queue_print_job(self.supermarket))
+
+    def test_a_job_whose_tickets_were_reclaimed_fails_as_superseded(self):
+        job = queue_print_job(self.supermarket)
+        self.age(job, created_at=True)
+        later = queue_print_job(self.supermarket)
+        self.assertEqual(later.tickets.count(), 1)
+
+        job = render_print_job(job.pk)
+        self.assertEqual(job.status, TicketPrintJob.Status.FAILED)
+        self.assertEqual(job.error, SUPERSEDED)
+        self.assertFalse(job.file)
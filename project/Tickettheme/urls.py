@@ -9,7 +9,10 @@ urlpatterns = [
     path("<int:supermarket_id>/", views.ticket_list_view, name="ticket_list"),
 
     # Manual ticket creation from product detail
-    path("<int:supermarket_id>/create/<int:product_id>/", views.ticket_create_view, name="ticket_create"),
+    path("<int:supermarket_id>/create/<str:product_barcode>/", views.ticket_create_view, name="ticket_create"),
+
+    # Bulk creation: rack / category / promotion / price changed
+    path("<int:supermarket_id>/bulk/", views.ticket_bulk_create_view, name="ticket_bulk_create"),
 
     # Delete ticket
     path("<int:supermarket_id>/delete/<int:ticket_id>/", views.ticket_delete_view, name="ticket_delete"),
@@ -20,11 +23,15 @@ urlpatterns = [
     # API: scanner mobile JSON
     # path("<int:supermarket_id>/scan/json/", views.scan_ticket_api, name="scan_ticket_api"),
 
-    # PDF export (1 label per page)
+    # PDF export (1 label per page, or ?sheet=<id>)
     path("<int:supermarket_id>/pdf/", views.ticket_pdf_export, name="ticket_pdf_export"),
 
     # Bulk PDF (grid)
-    # path("<int:supermarket_id>/sheet/<int:sheet_id>/", views.bulk_ticket_pdf, name="bulk_ticket_pdf"),
+    path("<int:supermarket_id>/sheet/<int:sheet_id>/", views.bulk_ticket_pdf, name="bulk_ticket_pdf"),
+
+    # Background print runs
+    path("<int:supermarket_id>/print/<int:job_id>/", views.print_job_view, name="print_job"),
+    path("<int:supermarket_id>/print/<int:job_id>/download/", views.print_job_download, name="print_job_download"),
 
     # Label sheet layouts
     path("<int:supermarket_id>/sheets/", views.label_sheet_list_view, name="label_sheet_list"),
@@ -1,26 +1,26 @@
 from decimal import Decimal
 import json
-from io import BytesIO
 
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, FileResponse, Http404
 from django.views.decorators.csrf import csrf_exempt
 from django.utils import timezone
 from django.db import transaction
 
 # MODELS
-from Inventory.models import Product, Supermarket, ProductPrice, Category
+from Inventory.models import Product, Supermarket, ProductPrice
+from Inventory import reference_data
 from pricing.models import Promotion
-from .models import TicketLabel, TicketTheme, LabelSheet
+from pricing.promotions import promotion_index
+from .models import TicketLabel, TicketTheme, LabelSheet, TicketPrintJob
+from order.scan_resolver import resolve_product
+from .bulk import SELECTION_CHOICES, SELECT_PRICE_CHANGED, select_products, generate_tickets
 
-# PDF + BARCODE
-from reportlab.pdfgen import canvas
-from reportlab.lib.units import mm
-from reportlab.lib.utils import ImageReader
-import barcode
-from barcode.writer import ImageWriter
+# PDF
+from .print_jobs import queue_print_job
+from .sheets import THERMAL_ROLL, layout_error
 
 
 # ============================================================
@@ -34,14 +34,29 @@ def get_store_price(product, supermarket):
     return pp.price if pp and pp.price else Decimal("0.00")
 
 
+# ============================================================
+# HELPER — ID FROM A REQUEST PARAMETER
+# ============================================================
+def parse_id(raw):
+    """
+    Integer id from a form / query value, or None if it is missing or not a
+    number (so a tampered value never reaches an integer filter)
+    """
+    try:
+        return int(raw)
+    except (TypeError, ValueError):
+        return None
+
+
 # ============================================================
 # HELPER — FIND PRODUCT BY BARCODE AND PRICE
 # ============================================================
 def get_product_and_price(barcode_value, supermarket):
     """
     Lookup product globally + price for a supermarket
+    (a scanned carton code resolves to its consumer unit)
     """
-    product = Product.objects.filter(barcode=barcode_value).first()
+    product, _resolution = resolve_product(barcode_value)
     if not product:
         return None, None
 
@@ -58,68 +73,12 @@ def apply_best_promotion(product, supermarket, base_price: Decimal):
       - category promotions
       - active + within date
 
+    Resolved from the store's in-memory promotion index (no queries once built).
+
     Returns:
         (final_price, display_text, original_price)
     """
-
-    now = timezone.now()
-
-    promos = Promotion.objects.filter(
-        supermarket=supermarket,
-        is_active=True,
-        start_date__lte=now,
-        end_date__gte=now
-    ).filter(
-        # product or category match
-        category__in=[product.category] if hasattr(product, "category") else None
-    ) | Promotion.objects.filter(
-        supermarket=supermarket,
-        is_active=True,
-        start_date__lte=now,
-        end_date__gte=now,
-        products=product
-    )
-
-    if not promos.exists():
-        return base_price, None, None
-
-    best_price = base_price
-    best_label = None
-
-    for promo in promos:
-        # % OFF
-        if promo.discount_type == "PERCENTAGE":
-            discounted = base_price * (Decimal(100 - promo.discount_value) / 100)
-            text = f"-{promo.discount_value}%"
-
-        # FIXED €
-        elif promo.discount_type == "FIXED_AMOUNT":
-            discounted = base_price - promo.discount_value
-            text = f"-{promo.discount_value}€"
-
-        # MULTIPACK (3 for 10€)
-        elif promo.discount_type == "MULTIPACK":
-            eff = promo.pack_price / promo.pack_qty
-            discounted = eff
-            text = f"{promo.pack_qty} for {promo.pack_price}€"
-
-        # BOGO
-        elif promo.discount_type == "BOGO":
-            eff = (base_price * promo.buy_qty) / (promo.buy_qty + promo.free_qty)
-            discounted = eff
-            text = f"Buy {promo.buy_qty} get {promo.free_qty} free"
-
-        else:
-            continue
-
-        if discounted < best_price:
-            best_price = discounted
-            best_label = text
-
-    if not best_label:
-        return base_price, None, None
-
-    return best_price, best_label, base_price
+    return promotion_index(supermarket.pk).best_price(product.pk, product.category_id, base_price)
 
 
 # ============================================================
@@ -172,6 +131,8 @@ def ticket_list_view(request, supermarket_id):
     return render(request, "tickettheme/ticket_list.html", {
         "supermarket": supermarket,
         "tickets": tickets,
+        "sheets": LabelSheet.objects.filter(supermarket=supermarket).order_by("name"),
+        "print_jobs": TicketPrintJob.objects.filter(supermarket=supermarket)[:5],
     })
 
 
@@ -179,9 +140,9 @@ def ticket_list_view(request, supermarket_id):
 # TICKET CREATE PAGE
 # ============================================================
 @login_required
-def ticket_create_view(request, supermarket_id, product_id):
+def ticket_create_view(request, supermarket_id, product_barcode):
     supermarket = get_object_or_404(Supermarket, pk=supermarket_id)
-    product = get_object_or_404(Product, pk=product_id)
+    product = get_object_or_404(Product.objects.for_stored_barcode(product_barcode))
 
     themes = TicketTheme.objects.filter(supermarket=supermarket)
 
@@ -228,6 +189,54 @@ def ticket_create_view(request, supermarket_id, product_id):
     })
 
 
+# ============================================================
+# BULK TICKET CREATION — RACK / CATEGORY / PROMOTION / PRICE CHANGED
+# ============================================================
+@login_required
+def ticket_bulk_create_view(request, supermarket_id):
+    supermarket = get_object_or_404(Supermarket, pk=supermarket_id, owner=request.user)
+
+    if request.method == "POST":
+        selection = request.POST.get("selection")
+        value = parse_id(request.POST.get(selection)) if selection else None
+        theme_id = parse_id(request.POST.get("theme"))
+
+        if (selection not in dict(SELECTION_CHOICES)
+                or (selection != SELECT_PRICE_CHANGED and value is None)
+                or (request.POST.get("theme") and theme_id is None)):
+            messages.error(request, "Choose what to label.")
+            return redirect("ticket:ticket_bulk_create", supermarket_id=supermarket.id)
+        theme = TicketTheme.objects.filter(id=theme_id, supermarket=supermarket).first() if theme_id else None
+
+        report = generate_tickets(
+            supermarket,
+            select_products(supermarket, selection, value),
+            theme=theme,
+            created_by=request.user,
+            only_price_changed=selection == SELECT_PRICE_CHANGED,
+            skip_queued=request.POST.get("skip_queued") == "on",
+        )
+
+        skipped = [
+            f"{report['no_price']} without a store price" if report['no_price'] else "",
+            f"{report['queued']} already queued" if report['queued'] else "",
+            f"{report['unchanged']} unchanged" if report['unchanged'] else "",
+        ]
+        skipped = ", ".join(s for s in skipped if s)
+        messages.success(request, f"{report['created']} tickets added to queue."
+                         + (f" Skipped: {skipped}." if skipped else ""))
+        return redirect("ticket:ticket_list", supermarket_id=supermarket.id)
+
+    return render(request, "tickettheme/ticket_bulk_create.html", {
+        "supermarket": supermarket,
+        "selection_choices": SELECTION_CHOICES,
+        "racks": reference_data.racks(supermarket.pk),
+        "categories": reference_data.categories(),
+        "promotions": Promotion.objects.filter(supermarket=supermarket, is_active=True).order_by("-start_date"),
+        "themes": TicketTheme.objects.filter(supermarket=supermarket),
+    })
+
+
 # ============================================================
 # SCAN API — BARCODE FROM CAMERA
 # ============================================================
@@ -282,81 +291,63 @@ def ticket_delete_view(request, supermarket_id, ticket_id):
 
 
 # ============================================================
-# SINGLE TICKET PDF EXPORT
+# TICKET PDF EXPORT (thermal roll or label sheet)
 # ============================================================
-@login_required
-def ticket_pdf_export(request, supermarket_id):
-    supermarket = get_object_or_404(Supermarket, pk=supermarket_id)
-
-    tickets = list(TicketLabel.objects.filter(
-        supermarket=supermarket,
-        printed_at__isnull=True
-    ).order_by("created_at"))
+def _print_queue(request, supermarket, sheet=None):
+    """Queues a background print run of the store's ticket queue on `sheet` (None = thermal roll)."""
+    error = layout_error(sheet or THERMAL_ROLL)
+    if error:
+        messages.error(request, f"Cannot print on '{sheet.name}': {error}")
+        return redirect("ticket:ticket_list", supermarket_id=supermarket.id)
 
-    if not tickets:
+    job = queue_print_job(supermarket, sheet, cut_marks=bool(request.GET.get("marks")),
+                          requested_by=request.user)
+    if job is None:
         messages.warning(request, "No tickets in queue.")
         return redirect("ticket:ticket_list", supermarket_id=supermarket.id)
 
-    response = HttpResponse(content_type="application/pdf")
-    response["Content-Disposition"] = "attachment; filename=tickets.pdf"
-
-    # Default thermal roll size 80×50mm
-    width_mm = 80
-    height_mm = 50
-    c = canvas.Canvas(response, pagesize=(width_mm * mm, height_mm * mm))
-
-    for t in tickets:
-        draw_ticket(c, t, width_mm, height_mm)
-        c.showPage()
+    messages.success(request, f"Rendering {job.ticket_count} tickets in the background.")
+    return redirect("ticket:print_job", supermarket_id=supermarket.id, job_id=job.id)
 
-    c.save()
 
-    TicketLabel.objects.filter(id__in=[t.id for t in tickets]).update(printed_at=timezone.now())
-
-    return response
-
-
-# ============================================================
-# DRAW TICKET
-# ============================================================
-def draw_ticket(canvas_obj, ticket, width_mm, height_mm):
-    W = width_mm * mm
-    H = height_mm * mm
+@login_required
+def ticket_pdf_export(request, supermarket_id):
+    supermarket = get_object_or_404(Supermarket, pk=supermarket_id, owner=request.user)
 
-    y = H
+    # ?sheet=<id> prints on that layout; default is one 80×50mm ticket per page
+    sheet = None
+    if request.GET.get("sheet"):
+        sheet_id = parse_id(request.GET["sheet"])
+        if sheet_id is None:
+            raise Http404("Unknown label sheet.")
+        sheet = get_object_or_404(LabelSheet, pk=sheet_id, supermarket=supermarket)
+    return _print_queue(request, supermarket, sheet)
 
-    # Title
-    canvas_obj.setFont("Helvetica-Bold", 11)
-    canvas_obj.drawString(4*mm, y-6*mm, ticket.product_name[:35])
 
-    # Brand small
-    if ticket.product_brand:
-        canvas_obj.setFont("Helvetica", 7)
-        canvas_obj.drawString(4*mm, y-10*mm, ticket.product_brand[:32])
+@login_required
+def bulk_ticket_pdf(request, supermarket_id, sheet_id):
+    supermarket = get_object_or_404(Supermarket, pk=supermarket_id, owner=request.user)
+    sheet = get_object_or_404(LabelSheet, pk=sheet_id, supermarket=supermarket)
+    return _print_queue(request, supermarket, sheet)
 
-    # PRICE BIG — FRANPRIX STYLE
-    canvas_obj.setFont("Helvetica-Bold", 28)
-    canvas_obj.drawString(4*mm, y-26*mm, f"{ticket.unit_price:.2f}€")
 
-    # price per liter small
-    if ticket.price_per_liter:
-        canvas_obj.setFont("Helvetica", 7)
-        canvas_obj.drawString(4*mm, y-33*mm, ticket.price_per_liter)
+@login_required
+def print_job_view(request, supermarket_id, job_id):
+    supermarket = get_object_or_404(Supermarket, pk=supermarket_id, owner=request.user)
+    job = get_object_or_404(TicketPrintJob.objects.select_related("sheet"), pk=job_id, supermarket=supermarket)
+    return render(request, "tickettheme/print_job.html", {
+        "supermarket": supermarket,
+        "job": job,
+    })
 
-    # Promo Chip
-    if ticket.promo_display:
-        canvas_obj.setFont("Helvetica-Bold", 9)
-        canvas_obj.drawString(4*mm, y-40*mm, f"{ticket.promo_display}")
 
-    # BARCODE
-    EAN = barcode.get_barcode_class("ean13")
-    try:
-        img = EAN(ticket.unit_barcode, writer=ImageWriter())
-        buf = BytesIO()
-        img.write(buf)
-        canvas_obj.drawImage(ImageReader(buf), 4*mm, 3*mm, width=W*0.78, height=13*mm)
-    except:
-        pass
+@login_required
+def print_job_download(request, supermarket_id, job_id):
+    supermarket = get_object_or_404(Supermarket, pk=supermarket_id, owner=request.user)
+    job = get_object_or_404(TicketPrintJob, pk=job_id, supermarket=supermarket,
+                            status=TicketPrintJob.Status.DONE)
+    return FileResponse(job.file.open("rb"), as_attachment=True, filename=f"tickets_{job.id}.pdf",
+                        content_type="application/pdf")
 
 
 # ============================================================
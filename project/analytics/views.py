@@ -17,6 +17,8 @@ from Inventory.models import (
     Rack,
 )
 
+from Inventory.stock_status import EXPIRED, EXPIRES_SOON, EXPIRES_TODAY, FRESH, status_counts
+
 # Pricing models
 from pricing.models import DiscountedSale, WastageRecord, Promotion, PricingRule
 
@@ -54,14 +56,12 @@ def dashboard(request, supermarket_id):
     # INVENTORY STATS
     # ============================
     items = InventoryItem.objects.filter(supermarket=supermarket)
-    total_items = items.count()
+    counts = status_counts(items, today)
+    total_items = counts["total"]
 
-    expired = items.filter(expiry_date__lt=today).count()
-    expiring = items.filter(
-        expiry_date__gte=today,
-        expiry_date__lte=today + timedelta(days=7)
-    ).count()
-    fresh = max(total_items - expired - expiring, 0)
+    expired = counts[EXPIRED]
+    expiring = counts[EXPIRES_TODAY] + counts[EXPIRES_SOON]
+    fresh = counts[FRESH]
 
     # ============================
     # SALES
@@ -319,15 +319,12 @@ def expiry_detail(request, supermarket_id):
     supermarket = get_object_or_404(Supermarket, id=supermarket_id)
     today = timezone.now().date()
 
-    items = InventoryItem.objects.filter(supermarket=supermarket)
+    counts = status_counts(InventoryItem.objects.filter(supermarket=supermarket), today)
 
     stats = {
-        "expired": items.filter(expiry_date__lt=today).count(),
-        "expiring": items.filter(
-            expiry_date__lte=today + timedelta(days=7),
-            expiry_date__gte=today
-        ).count(),
-        "fresh": items.filter(expiry_date__gt=today + timedelta(days=7)).count(),
+        "expired": counts[EXPIRED],
+        "expiring": counts[EXPIRES_TODAY] + counts[EXPIRES_SOON],
+        "fresh": counts[FRESH],
     }
 
     return render(request, "analytics/expiry_detail.html", {
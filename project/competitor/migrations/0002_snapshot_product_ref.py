@@ -0,0 +1,34 @@
+"""
+Detaches CompetitorPriceSnapshot from Product's barcode primary key (see
+Inventory 0008) until 0003 points it at the new integer id.
+"""
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def fill_product_refs(apps, schema_editor):
+    Product = apps.get_model('Inventory', 'Product')
+    CompetitorPriceSnapshot = apps.get_model('competitor', 'CompetitorPriceSnapshot')
+    CompetitorPriceSnapshot.objects.update(
+        product_ref=Subquery(Product.objects.filter(barcode=OuterRef('product_id')).values('id')[:1]))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Inventory', '0008_product_id_prepare'),
+        ('competitor', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='competitorpricesnapshot',
+            name='product_ref',
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.RunPython(fill_product_refs),
+        migrations.RemoveField(
+            model_name='competitorpricesnapshot',
+            name='product',
+        ),
+    ]
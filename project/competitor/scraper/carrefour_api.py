@@ -7,7 +7,7 @@ CARREFOUR_API = (
 )
 
 def scrape_carrefour(product):
-    url = CARREFOUR_API.format(barcode=product.barcode)
+    url = CARREFOUR_API.format(barcode=product.external_barcode)
     r = requests.get(url, timeout=15)
     r.raise_for_status()
     data = r.json()
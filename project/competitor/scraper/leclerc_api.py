@@ -8,7 +8,7 @@ LECLERC_API = (
 
 def scrape_leclerc(product):
     r = requests.get(
-        LECLERC_API.format(barcode=product.barcode),
+        LECLERC_API.format(barcode=product.external_barcode),
         timeout=15,
         headers={"User-Agent": "Mozilla/5.0"}
     )
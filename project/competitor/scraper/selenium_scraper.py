@@ -25,7 +25,7 @@ def scrape_selenium(product, competitor):
 
     try:
         url = competitor.search_url_template.format(
-            barcode=product.barcode
+            barcode=product.external_barcode
         )
         driver.get(url)
         time.sleep(random.uniform(3, 6))
@@ -78,7 +78,7 @@ from competitor.models import Competitor
 from competitor.scraper.scraper import scrape_all_competitors
 
 @shared_task(bind=True, autoretry_for=(Exception,), retry_kwargs={"max_retries": 3})
-def scrape_product_competitors_task(self, product_id):
-    product = Product.objects.get(pk=product_id)
+def scrape_product_competitors_task(self, product_barcode):
+    product = Product.objects.for_stored_barcode(product_barcode).get()
     competitors = Competitor.objects.filter(is_active=True)
     return scrape_all_competitors(product, competitors)
@@ -139,7 +139,7 @@ def price_trend_data(request):
     if not barcode:
         return JsonResponse({"points": []})
 
-    product = get_object_or_404(Product, pk=barcode)
+    product = get_object_or_404(Product.objects.for_stored_barcode(barcode))
 
     qs = (
         CompetitorPriceSnapshot.objects
@@ -181,7 +181,7 @@ def price_trend_data(request):
 from competitor.tasks import scrape_product_competitors_task
 
 @login_required
-def refresh_price(request, product_id):
-    scrape_product_competitors_task.delay(product_id)
-    messages.success(request, f"Scraping started: {product_id}")
+def refresh_price(request, product_barcode):
+    scrape_product_competitors_task.delay(product_barcode)
+    messages.success(request, f"Scraping started: {product_barcode}")
     return redirect(request.META.get("HTTP_REFERER", "/"))
@@ -96,12 +96,7 @@ from datetime import timedelta
 def expired_products(request, supermarket_id):
     supermarket = get_object_or_404(Supermarket, id=supermarket_id)
 
-    expired_items = (
-        supermarket.inventory_items
-        .filter(expiry_date__lt=timezone.now().date())
-        .select_related("product")
-        .order_by("-expiry_date")
-    )
+    expired_items = InventoryItem.objects.expired(supermarket, timezone.now().date())
 
     return render(
         request,
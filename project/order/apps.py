@@ -1,6 +1,21 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_save, post_delete
 
 
 class OrderConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "order"
+
+    def ready(self):
+        from Inventory.models import Product
+        from . import scan_resolver
+
+        ProductPackaging = self.get_model("ProductPackaging")
+        post_save.connect(scan_resolver.packaging_changed, sender=ProductPackaging,
+                          dispatch_uid="scan_resolver_packaging_saved")
+        post_delete.connect(scan_resolver.packaging_changed, sender=ProductPackaging,
+                            dispatch_uid="scan_resolver_packaging_deleted")
+        post_delete.connect(scan_resolver.packaging_changed, sender=Product,
+                            dispatch_uid="scan_resolver_product_deleted")
+        post_save.connect(scan_resolver.product_saved, sender=Product,
+                          dispatch_uid="scan_resolver_product_saved")
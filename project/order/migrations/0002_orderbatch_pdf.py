@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderbatch',
+            name='pdf',
+            field=models.FileField(blank=True, upload_to='orders/pdf/%Y/%m/'),
+        ),
+        migrations.AddField(
+            model_name='orderbatch',
+            name='pdf_rendered_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0002_orderbatch_pdf'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='productpackaging',
+            name='carton_barcode',
+            field=models.CharField(db_index=True, help_text='Distribution Unit (DU) barcode — GTIN-14 / Code128 / internal', max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='productpackaging',
+            name='unit_barcode',
+            field=models.CharField(db_index=True, help_text='Consumer Unit (CU) barcode — usually same as Product.barcode', max_length=50),
+        ),
+    ]
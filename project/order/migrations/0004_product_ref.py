@@ -0,0 +1,52 @@
+"""
+Detaches ProductPackaging/OrderLine from Product's barcode primary key
+(see Inventory 0008): their foreign keys become integer `product_ref`
+columns until 0005 turns them back into foreign keys.
+"""
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def fill_product_refs(apps, schema_editor):
+    Product = apps.get_model('Inventory', 'Product')
+    product_id = Subquery(Product.objects.filter(barcode=OuterRef('product_id')).values('id')[:1])
+    for model_name in ('ProductPackaging', 'OrderLine'):
+        apps.get_model('order', model_name).objects.update(product_ref=product_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Inventory', '0008_product_id_prepare'),
+        ('order', '0003_packaging_barcode_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productpackaging',
+            name='product_ref',
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='orderline',
+            name='product_ref',
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.RunPython(fill_product_refs),
+        migrations.AlterUniqueTogether(
+            name='productpackaging',
+            unique_together=set(),
+        ),
+        migrations.AlterUniqueTogether(
+            name='orderline',
+            unique_together=set(),
+        ),
+        migrations.RemoveField(
+            model_name='productpackaging',
+            name='product',
+        ),
+        migrations.RemoveField(
+            model_name='orderline',
+            name='product',
+        ),
+    ]
@@ -0,0 +1,45 @@
+"""
+Points ProductPackaging/OrderLine back at Product through its new integer
+primary key (see Inventory 0009) and restores their unique_together.
+"""
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Inventory', '0009_product_integer_pk'),
+        ('order', '0004_product_ref'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='productpackaging',
+            old_name='product_ref',
+            new_name='product',
+        ),
+        migrations.AlterField(
+            model_name='productpackaging',
+            name='product',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='packaging_options', to='Inventory.product'),
+        ),
+        migrations.RenameField(
+            model_name='orderline',
+            old_name='product_ref',
+            new_name='product',
+        ),
+        migrations.AlterField(
+            model_name='orderline',
+            name='product',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='order_lines', to='Inventory.product'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='productpackaging',
+            unique_together={('product', 'unit_barcode', 'carton_barcode')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='orderline',
+            unique_together={('batch', 'product', 'unit_barcode', 'packaging')},
+        ),
+    ]
@@ -0,0 +1,61 @@
+from django.db import migrations, models
+
+
+def canonical_barcode(code):
+    # Frozen copy of Inventory.gtin.canonical_barcode as of this migration;
+    # later changes to that function must not rewrite history
+    code = (code or '').strip()
+    if not code.isascii() or not code.isdigit() or len(code) < 8:
+        return code
+    significant = code.lstrip('0')
+    if len(significant) > 14 or len(significant) < 2:
+        return code
+    total = sum(int(d) * (3 if i % 2 == 0 else 1) for i, d in enumerate(reversed(significant[:-1])))
+    if significant[-1] != str(-total % 10):
+        return code
+    return significant.zfill(14)
+
+
+def fill_canonical_barcodes(apps, schema_editor):
+    ProductPackaging = apps.get_model('order', 'ProductPackaging')
+    batch = []
+    for pack in ProductPackaging.objects.only('id', 'unit_barcode', 'carton_barcode').iterator(chunk_size=2000):
+        pack.canonical_unit_barcode = canonical_barcode(pack.unit_barcode)
+        pack.canonical_carton_barcode = canonical_barcode(pack.carton_barcode)
+        batch.append(pack)
+        if len(batch) >= 2000:
+            ProductPackaging.objects.bulk_update(batch, ['canonical_unit_barcode', 'canonical_carton_barcode'])
+            batch = []
+    ProductPackaging.objects.bulk_update(batch, ['canonical_unit_barcode', 'canonical_carton_barcode'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0005_product_fk'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productpackaging',
+            name='canonical_unit_barcode',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='productpackaging',
+            name='canonical_carton_barcode',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=50),
+        ),
+        migrations.RunPython(fill_canonical_barcodes, migrations.RunPython.noop),
+        # Scans are matched on the canonical columns now
+        migrations.AlterField(
+            model_name='productpackaging',
+            name='carton_barcode',
+            field=models.CharField(help_text='Distribution Unit (DU) barcode — GTIN-14 / Code128 / internal', max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='productpackaging',
+            name='unit_barcode',
+            field=models.CharField(help_text='Consumer Unit (CU) barcode — usually same as Product.barcode', max_length=50),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0006_packaging_canonical_barcodes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderbatch',
+            name='pdf_error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='orderbatch',
+            name='pdf_requested_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,7 +1,10 @@
+from datetime import timedelta
+
 from django.conf import settings
 from django.db import models
 from django.utils import timezone
 
+from Inventory.gtin import canonical_barcode
 from Inventory.models import Product, Supermarket, Supplier
 
 
@@ -26,6 +29,10 @@ class ProductPackaging(models.Model):
         help_text="Distribution Unit (DU) barcode — GTIN-14 / Code128 / internal",
     )
 
+    # Lookup keys for scans (see Inventory/gtin.py), filled in save()
+    canonical_unit_barcode = models.CharField(max_length=50, db_index=True, editable=False, default="")
+    canonical_carton_barcode = models.CharField(max_length=50, db_index=True, editable=False, default="")
+
     units_per_carton = models.PositiveIntegerField(
         help_text="How many units in one carton (DU).",
     )
@@ -50,6 +57,14 @@ class ProductPackaging(models.Model):
     def __str__(self):
         return f"{self.product.name} / {self.units_per_carton} units per carton"
 
+    def save(self, *args, **kwargs):
+        self.canonical_unit_barcode = canonical_barcode(self.unit_barcode)
+        self.canonical_carton_barcode = canonical_barcode(self.carton_barcode)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"unit_barcode", "carton_barcode"} & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, "canonical_unit_barcode", "canonical_carton_barcode"}
+        super().save(*args, **kwargs)
+
 
 class OrderBatch(models.Model):
     """
@@ -95,12 +110,30 @@ class OrderBatch(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Order document, rendered by a Celery worker after finalizing
+    pdf = models.FileField(upload_to="orders/pdf/%Y/%m/", blank=True)
+    pdf_rendered_at = models.DateTimeField(null=True, blank=True)
+    pdf_requested_at = models.DateTimeField(null=True, blank=True)
+    pdf_error = models.TextField(blank=True)
+
+    # A render still missing this long after it was requested was lost (worker down, task dropped)
+    PDF_STALE_AFTER = timedelta(minutes=5)
+
     class Meta:
         ordering = ["-created_at"]
 
     def __str__(self):
         return f"OrderBatch #{self.id} - {self.supermarket.name} ({self.status})"
 
+    @property
+    def pdf_failed(self):
+        """True when the PDF will not arrive without a new render request."""
+        if self.pdf_rendered_at:
+            return False
+        if self.pdf_error:
+            return True
+        return self.pdf_requested_at is None or timezone.now() - self.pdf_requested_at > self.PDF_STALE_AFTER
+
 
 class OrderLine(models.Model):
     """
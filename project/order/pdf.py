@@ -0,0 +1,90 @@
+# packaging/pdf.py
+"""
+Order document rendering.
+
+Finalizing an order only schedules render_order_pdf_task; the Celery worker
+renders the PDF with render_order_pdf() and stores it on OrderBatch.pdf,
+which order_pdf_view then serves. A render that keeps failing is recorded in
+OrderBatch.pdf_error (see tasks.py); order_pdf_view then offers to render
+again, as it does when a render never arrives (OrderBatch.pdf_failed).
+"""
+from tempfile import SpooledTemporaryFile
+
+from django.core.files import File
+from django.utils import timezone
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+
+from .models import OrderBatch
+
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+
+def render_order_pdf(batch: OrderBatch, out):
+    """
+    Simple ReportLab PDF for the given order batch, written to the binary file `out`.
+    """
+    p = canvas.Canvas(out, pagesize=A4)
+    width, height = A4
+
+    y = height - 50
+
+    p.setFont("Helvetica-Bold", 14)
+    p.drawString(40, y, f"Order #{batch.id} - {batch.supermarket.name}")
+    y -= 20
+
+    p.setFont("Helvetica", 11)
+    supplier_name = batch.supplier.name if batch.supplier else "N/A"
+    p.drawString(40, y, f"Supplier: {supplier_name}")
+    y -= 15
+    if batch.reference:
+        p.drawString(40, y, f"Reference: {batch.reference}")
+        y -= 15
+    p.drawString(40, y, f"Created: {batch.created_at.strftime('%Y-%m-%d %H:%M')}")
+    y -= 25
+
+    # Table headers
+    p.setFont("Helvetica-Bold", 10)
+    p.drawString(40, y, "Product")
+    p.drawString(220, y, "Unit EAN")
+    p.drawString(320, y, "Carton Code")
+    p.drawString(430, y, "Cartons")
+    p.drawString(490, y, "Total Units")
+    y -= 12
+    p.line(40, y, width - 40, y)
+    y -= 15
+
+    p.setFont("Helvetica", 9)
+    lines = batch.lines.select_related("product", "packaging").order_by("id")
+    for line in lines.iterator(chunk_size=1000):
+        if y < 60:  # new page
+            p.showPage()
+            y = height - 50
+            p.setFont("Helvetica", 9)
+
+        name = (line.product.name or "")[:30]
+        p.drawString(40, y, name)
+        p.drawString(220, y, line.unit_barcode or "")
+        p.drawString(320, y, line.carton_barcode or "-")
+        p.drawRightString(470, y, str(line.cartons))
+        p.drawRightString(560, y, str(line.total_units))
+        y -= 14
+
+    p.showPage()
+    p.save()
+
+
+def store_order_pdf(batch_id):
+    """Renders the batch's PDF and stores it on OrderBatch.pdf, replacing any previous one."""
+    batch = OrderBatch.objects.select_related("supermarket", "supplier").get(pk=batch_id)
+    previous = batch.pdf.name
+
+    with SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as spool:
+        render_order_pdf(batch, spool)
+        spool.seek(0)
+        batch.pdf.save(f"order_{batch.id}.pdf", File(spool), save=False)
+
+    OrderBatch.objects.filter(pk=batch.pk).update(pdf=batch.pdf.name, pdf_rendered_at=timezone.now(), pdf_error="")
+    if previous and previous != batch.pdf.name:
+        batch.pdf.storage.delete(previous)
+    return batch
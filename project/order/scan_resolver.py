@@ -0,0 +1,149 @@
+# packaging/scan_resolver.py
+"""
+Barcode resolution shared by every scan path (inventory, order, ticket).
+
+resolve_barcode() maps any scanned code — a consumer-unit EAN or a carton
+EAN/GTIN-14 — to a ScanResolution: the product, the packaging it belongs to
+and how many units one scan represents. Codes are matched by their canonical
+form (see Inventory/gtin.py), so UPC-A, EAN-13 and GTIN-14 spellings of one
+item share a lookup and a cache entry. A code is resolved with one indexed
+query on ProductPackaging (plus one on Product for codes without packaging)
+and then served from a per-process dict; resolve_barcodes() does the same
+for a whole list of scans. A code whose key no product holds falls back to
+a product left without a key under one of its spellings (see Product.save).
+
+Only hits are cached: an unknown code is looked up again on its next scan,
+so creating a product needs no invalidation. ProductPackaging saves/deletes,
+Product deletes and Product barcode/key changes bump a version counter in
+the shared cache (see OrderConfig.ready and settings.CACHES), which makes
+every worker drop its dict. The counter starts from a timestamp, so a flushed cache never hands
+out a version a worker has already synced to.
+"""
+import time
+from collections import namedtuple
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+from Inventory.bulk_import import chunked
+from Inventory.gtin import canonical_barcode
+from Inventory.models import Product
+from .models import ProductPackaging
+
+CACHE_SIZE = 50000
+VERSION_KEY = "packaging:scan_resolver:version"
+
+# barcode:      canonical form of the scanned code
+# product_id:  Product id the scan belongs to
+# unit_barcode: consumer-unit barcode of that product, as stored
+# packaging_id: carton config scanned (carton scan) or the default one for the unit (unit scan); may be None
+# units:        units represented by one scan (units_per_carton for a carton, 1 for a unit)
+ScanResolution = namedtuple(
+    "ScanResolution",
+    "barcode product_id unit_barcode packaging_id units_per_carton units is_carton",
+)
+
+_resolved = {}         # canonical code -> ScanResolution
+_state = {"version": None}
+
+
+def _lookup(keys):
+    """{key: ScanResolution} for the canonical codes any packaging or product knows (three queries at most)."""
+    found = {}
+    packs = (ProductPackaging.objects
+             .filter(Q(canonical_carton_barcode__in=keys) | Q(canonical_unit_barcode__in=keys), is_active=True)
+             .order_by("units_per_carton", "id")
+             .values_list("id", "product_id", "unit_barcode", "canonical_unit_barcode", "canonical_carton_barcode",
+                          "units_per_carton"))
+    for pack_id, product_id, unit_barcode, unit_key, carton_key, units in packs:
+        # A carton match wins over a unit match (a carton code is never a CU);
+        # among unit matches the smallest carton comes first
+        if carton_key in keys and not (found.get(carton_key) and found[carton_key].is_carton):
+            found[carton_key] = ScanResolution(carton_key, product_id, unit_barcode, pack_id,
+                                               units, units or 1, True)
+        if unit_key in keys and unit_key not in found:
+            found[unit_key] = ScanResolution(unit_key, product_id, unit_barcode, pack_id, units, 1, False)
+
+    rest = [key for key in keys if key not in found]
+    if rest:
+        for product_id, key, barcode in (Product.objects.filter(canonical_barcode__in=rest)
+                                         .values_list("id", "canonical_barcode", "barcode")):
+            found[key] = ScanResolution(key, product_id, barcode, None, None, 1, False)
+
+    rest = [key for key in rest if key not in found]
+    if rest:
+        for product_id, barcode in Product.objects.keyless(rest).values_list("id", "barcode"):
+            key = canonical_barcode(barcode)
+            found.setdefault(key, ScanResolution(key, product_id, barcode, None, None, 1, False))
+    return found
+
+
+def _sync():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(VERSION_KEY, 0)
+    if _state["version"] != version:
+        _resolved.clear()
+        _state["version"] = version
+
+
+def resolve_barcode(code):
+    """ScanResolution for a scanned code, or None if no product or packaging knows it."""
+    code = (code or "").strip()
+    if not code:
+        return None
+    return resolve_barcodes([code]).get(code)
+
+
+def resolve_barcodes(codes):
+    """{code: ScanResolution} for several scanned codes; unknown codes are left out."""
+    keys = {}   # canonical code -> the codes scanned for it
+    for code in codes:
+        code = (code or "").strip()
+        if code:
+            keys.setdefault(canonical_barcode(code), []).append(code)
+    _sync()
+    found = {key: _resolved[key] for key in keys if key in _resolved}
+    missing = keys.keys() - found.keys()
+    for chunk in chunked(missing):
+        looked_up = _lookup(set(chunk))
+        if len(_resolved) + len(looked_up) > CACHE_SIZE:
+            _resolved.clear()
+        _resolved.update(looked_up)
+        found.update(looked_up)
+    return {code: found[key] for key, scanned in keys.items() if key in found for code in scanned}
+
+
+def resolve_product(code):
+    """(Product, ScanResolution) for a scanned code, or (None, None)."""
+    resolution = resolve_barcode(code)
+    if resolution is None:
+        return None, None
+    product = Product.objects.filter(pk=resolution.product_id).first()
+    if product is None:  # deleted since it was cached
+        invalidate()
+        return None, None
+    return product, resolution
+
+
+def invalidate():
+    _resolved.clear()
+    if not cache.add(VERSION_KEY, time.time_ns(), timeout=None):
+        try:
+            cache.incr(VERSION_KEY)
+        except ValueError:
+            cache.set(VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def packaging_changed(sender, **kwargs):
+    invalidate()
+
+
+def product_saved(sender, instance, created, **kwargs):
+    # A new product only adds codes (misses are never cached); a re-keyed one moves them.
+    # Invalidated again on commit, so no worker keeps what it cached before the commit
+    if not created and instance.changed("barcode", "canonical_barcode"):
+        invalidate()
+        transaction.on_commit(invalidate)
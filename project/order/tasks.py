@@ -0,0 +1,28 @@
+# packaging/tasks.py
+import logging
+
+from celery import shared_task
+
+from .models import OrderBatch
+from .pdf import store_order_pdf
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=30)
+def render_order_pdf_task(self, batch_id):
+    """
+    Renders a finalized order's PDF in the background (see pdf.store_order_pdf).
+    Failures are retried; the last one is recorded on the batch for the poll page.
+    """
+    try:
+        batch = store_order_pdf(batch_id)
+    except OrderBatch.DoesNotExist:
+        return f"OrderBatch {batch_id} not found"
+    except Exception as exc:
+        if self.request.retries < self.max_retries:
+            raise self.retry(exc=exc)
+        logger.exception("Order %s: PDF rendering failed", batch_id)
+        OrderBatch.objects.filter(pk=batch_id).update(pdf_error=(str(exc) or repr(exc))[:1000])
+        return f"Order #{batch_id}: PDF rendering failed."
+    return f"Order #{batch.id}: PDF stored as {batch.pdf.name}."
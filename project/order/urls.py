@@ -33,6 +33,11 @@ urlpatterns = [
         views.order_builder_view,
         name="order_builder",
     ),
+    path(
+        "<int:supermarket_id>/order/<int:batch_id>/pdf/",
+        views.order_pdf_view,
+        name="order_pdf",
+    ),
     path(
         "<int:supermarket_id>/order/reset/",
         views.reset_order_batch_view,
@@ -53,4 +58,9 @@ urlpatterns = [
         views.add_scanned_item,
         name="add_scanned_item",
     ),
+    path(
+        "<int:supermarket_id>/order/add-scanned/batch/",
+        views.add_scanned_items,
+        name="add_scanned_items",
+    ),
 ]
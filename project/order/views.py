@@ -5,16 +5,28 @@ from collections import defaultdict
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.db import transaction
-from django.http import JsonResponse, HttpResponse
+from django.db.models import Case, F, PositiveIntegerField, When
+from django.http import JsonResponse, HttpResponse, FileResponse
 from django.shortcuts import render, get_object_or_404, redirect
+from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
 
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A4
-
+from Inventory import autocomplete, reference_data
+from Inventory.bulk_import import chunked
+from Inventory.gtin import canonical_barcode
 from Inventory.models import Product, Supermarket, Supplier
+from Inventory.search import normalize_search_text
 from .models import ProductPackaging, OrderBatch, OrderLine
+from .scan_resolver import resolve_barcodes, resolve_product
+from .tasks import render_order_pdf_task
+
+
+def _queue_order_pdf(batch):
+    """Schedules (again) the worker render of a finalized batch's PDF once the transaction commits."""
+    OrderBatch.objects.filter(pk=batch.pk).update(pdf_rendered_at=None, pdf_error="",
+                                                  pdf_requested_at=timezone.now())
+    transaction.on_commit(lambda: render_order_pdf_task.delay(batch.pk))
 
 
 # -----------------------------
@@ -57,16 +69,18 @@ def check_unit_api(request):
     if not barcode:
         return JsonResponse({"status": "error", "message": "No barcode provided."}, status=400)
 
-    product = Product.objects.filter(barcode=barcode).first()
+    # A scanned carton code resolves to its consumer unit
+    product, resolution = resolve_product(barcode)
     if not product:
         return JsonResponse({"status": "not_found"}, status=200)
+    barcode = resolution.unit_barcode
 
     # multiple packaging options allowed for same CU
     pack_options = ProductPackaging.objects.filter(
         product=product,
-        unit_barcode=barcode,
+        canonical_unit_barcode=canonical_barcode(barcode),
         is_active=True,
-    )
+    ).select_related("supplier")
 
     if pack_options.exists():
         data = {
@@ -101,10 +115,10 @@ def scan_carton_view(request, supermarket_id, unit_barcode):
     Only superadmin can access.
     """
     supermarket = get_object_or_404(Supermarket, pk=supermarket_id)
-    product = get_object_or_404(Product, barcode=unit_barcode)
+    product = get_object_or_404(Product.objects.for_stored_barcode(unit_barcode))
 
     existing_packs = ProductPackaging.objects.filter(
-        product=product, unit_barcode=unit_barcode
+        product=product, canonical_unit_barcode=canonical_barcode(unit_barcode)
     )
 
     return render(request, "packaging/scan_carton.html", {
@@ -131,7 +145,7 @@ def save_carton_api(request):
     if not unit_barcode or not carton_barcode or not units_str:
         return JsonResponse({"success": False, "message": "Missing required fields."}, status=400)
 
-    product = Product.objects.filter(barcode=unit_barcode).first()
+    product = Product.objects.for_stored_barcode(unit_barcode).first()
     if not product:
         return JsonResponse({"success": False, "message": "Product not found."}, status=404)
 
@@ -146,11 +160,14 @@ def save_carton_api(request):
     if supplier_id:
         supplier = Supplier.objects.filter(pk=supplier_id).first()
 
+    # Matched on the canonical codes, so re-entering a carton in another GTIN spelling updates it
     packaging, created = ProductPackaging.objects.update_or_create(
         product=product,
-        unit_barcode=unit_barcode,
-        carton_barcode=carton_barcode,
+        canonical_unit_barcode=canonical_barcode(unit_barcode),
+        canonical_carton_barcode=canonical_barcode(carton_barcode),
         defaults={
+            "unit_barcode": unit_barcode,
+            "carton_barcode": carton_barcode,
             "units_per_carton": units,
             "supplier": supplier,
             "is_active": True,
@@ -197,7 +214,7 @@ def order_builder_view(request, supermarket_id):
     )
 
     batch = _get_or_create_draft_batch(supermarket, request.user)
-    suppliers = Supplier.objects.all().order_by("name")
+    suppliers = reference_data.suppliers()
 
     # ----------------------------
     # POST: Finalize or add item
@@ -224,7 +241,10 @@ def order_builder_view(request, supermarket_id):
                 batch.save()
                 return redirect("packaging:order_builder", supermarket_id)
 
-            return _generate_order_pdf(batch)
+            # Render in the worker; the next page serves the PDF when it is stored
+            _queue_order_pdf(batch)
+            messages.success(request, f"Order #{batch.id} finalized. Preparing the PDF…")
+            return redirect("packaging:order_pdf", supermarket_id=supermarket.id, batch_id=batch.id)
 
         # ADD SINGLE PRODUCT (Manual)
         barcode = (request.POST.get("barcode") or "").strip()
@@ -252,34 +272,90 @@ def order_builder_view(request, supermarket_id):
 
 def _add_barcode_to_batch(batch: OrderBatch, barcode: str):
     """
-    Core logic: add scanned CU barcode to batch.
-    If multiple carton configs exist, we pick the first one for now.
-    (Later you can add a UI to choose between 12/24 etc.)
+    Core logic: add scanned barcode to batch (+1 carton).
     """
-    with transaction.atomic():
-        product, _created = Product.objects.get_or_create(
-            barcode=barcode,
-            defaults={"name": f"Product {barcode}"}
-        )
+    _add_scans_to_batch(batch, {barcode.strip(): 1})
 
-        # Get the first active packaging config (if any)
-        packaging = ProductPackaging.objects.filter(
-            product=product,
-            unit_barcode=barcode,
-            is_active=True,
-        ).order_by("units_per_carton").first()
-
-        line, created_line = OrderLine.objects.get_or_create(
-            batch=batch,
-            product=product,
-            unit_barcode=barcode,
-            packaging=packaging,
-            defaults={"cartons": 1},
-        )
 
-        if not created_line:
-            line.cartons += 1
-            line.save()
+def _add_scans_to_batch(batch: OrderBatch, scans):
+    """
+    Adds {barcode: cartons} to the batch in bulk.
+
+    - A carton barcode selects its own packaging; a CU barcode uses the
+      smallest active carton config of that unit (see scan_resolver).
+    - Unknown barcodes create placeholder products without packaging.
+    - Scans that land on the same line are summed; existing lines are
+      incremented with one UPDATE (cartons = cartons + n), new lines are
+      created with one INSERT. The batch row is locked meanwhile, so
+      concurrent scans of the same batch cannot create duplicate lines.
+
+    Returns {"updated": lines, "created": lines, "cartons": total}.
+    """
+    increments = defaultdict(int)   # (product_id, unit_barcode, packaging_id) -> cartons
+    unknown = []
+    resolved = resolve_barcodes(scans)
+    for barcode, count in scans.items():
+        resolution = resolved.get(barcode)
+        if resolution:
+            increments[(resolution.product_id, resolution.unit_barcode, resolution.packaging_id)] += count
+        else:
+            unknown.append(barcode)
+
+    with transaction.atomic():
+        OrderBatch.objects.select_for_update().filter(pk=batch.pk).first()
+
+        if unknown:
+            # bulk_create skips Product.save() and its signals: the computed columns are
+            # set here (spellings of one GTIN in the same upload collide on the lookup key
+            # and create a single product), and the autocomplete index is told explicitly
+            Product.objects.bulk_create(
+                [Product(barcode=code, canonical_barcode=canonical_barcode(code), name=f"Product {code}",
+                         search_text=normalize_search_text(f"Product {code}"))
+                 for code in unknown],
+                ignore_conflicts=True,
+            )
+            transaction.on_commit(autocomplete.invalidate)
+            created = {}
+            for chunk in chunked(unknown):
+                created.update((key, (product_id, barcode)) for key, product_id, barcode in (
+                    Product.objects.for_barcodes(chunk).values_list("canonical_barcode", "id", "barcode")))
+            # A code skipped as a conflict on the barcode itself belongs to a product left without a key
+            keyless = [code for code in unknown if canonical_barcode(code) not in created]
+            stored = {}
+            for chunk in chunked(keyless):
+                stored.update((barcode, (product_id, barcode)) for product_id, barcode in (
+                    Product.objects.filter(barcode__in=chunk).values_list("id", "barcode")))
+            for code in unknown:
+                product_id, barcode = created.get(canonical_barcode(code)) or stored[code]
+                increments[(product_id, barcode, None)] += scans[code]
+
+        existing = {}
+        for chunk in chunked(list({key[0] for key in increments})):
+            for line_id, *key in (OrderLine.objects
+                                  .filter(batch=batch, product_id__in=chunk)
+                                  .values_list("id", "product_id", "unit_barcode", "packaging_id")):
+                existing[tuple(key)] = line_id
+
+        updates = {existing[key]: n for key, n in increments.items() if key in existing}
+        for chunk in chunked(list(updates)):
+            OrderLine.objects.filter(pk__in=chunk).update(cartons=Case(
+                *[When(pk=line_id, then=F("cartons") + updates[line_id]) for line_id in chunk],
+                default=F("cartons"),
+                output_field=PositiveIntegerField(),
+            ))
+
+        OrderLine.objects.bulk_create([
+            OrderLine(batch=batch, product_id=product_id, unit_barcode=unit_barcode,
+                      packaging_id=packaging_id, cartons=n)
+            for (product_id, unit_barcode, packaging_id), n in increments.items()
+            if (product_id, unit_barcode, packaging_id) not in existing
+        ])
+
+    return {
+        "updated": len(updates),
+        "created": len(increments) - len(updates),
+        "cartons": sum(increments.values()),
+    }
 
 
 @login_required(login_url="account_login")
@@ -296,62 +372,25 @@ def reset_order_batch_view(request, supermarket_id):
     return redirect("packaging:order_builder", supermarket_id=supermarket.id)
 
 
-def _generate_order_pdf(batch: OrderBatch) -> HttpResponse:
+@login_required(login_url="account_login")
+def order_pdf_view(request, supermarket_id, batch_id):
     """
-    Simple ReportLab PDF for the given order batch.
+    Serves a finalized order's PDF once the worker has stored it;
+    until then shows a page that polls for it, or offers to render again
+    (POST) when the render failed or never arrived.
     """
-    response = HttpResponse(content_type="application/pdf")
-    filename = f"order_{batch.id}.pdf"
-    response["Content-Disposition"] = f'attachment; filename="{filename}"'
-
-    p = canvas.Canvas(response, pagesize=A4)
-    width, height = A4
-
-    y = height - 50
-
-    p.setFont("Helvetica-Bold", 14)
-    p.drawString(40, y, f"Order #{batch.id} - {batch.supermarket.name}")
-    y -= 20
-
-    p.setFont("Helvetica", 11)
-    supplier_name = batch.supplier.name if batch.supplier else "N/A"
-    p.drawString(40, y, f"Supplier: {supplier_name}")
-    y -= 15
-    if batch.reference:
-        p.drawString(40, y, f"Reference: {batch.reference}")
-        y -= 15
-    p.drawString(40, y, f"Created: {batch.created_at.strftime('%Y-%m-%d %H:%M')}")
-    y -= 25
-
-    # Table headers
-    p.setFont("Helvetica-Bold", 10)
-    p.drawString(40, y, "Product")
-    p.drawString(220, y, "Unit EAN")
-    p.drawString(320, y, "Carton Code")
-    p.drawString(430, y, "Cartons")
-    p.drawString(490, y, "Total Units")
-    y -= 12
-    p.line(40, y, width - 40, y)
-    y -= 15
-
-    p.setFont("Helvetica", 9)
-    for line in batch.lines.select_related("product", "packaging").all():
-        if y < 60:  # new page
-            p.showPage()
-            y = height - 50
-            p.setFont("Helvetica", 9)
-
-        name = (line.product.name or "")[:30]
-        p.drawString(40, y, name)
-        p.drawString(220, y, line.unit_barcode or "")
-        p.drawString(320, y, line.carton_barcode or "-")
-        p.drawRightString(470, y, str(line.cartons))
-        p.drawRightString(560, y, str(line.total_units))
-        y -= 14
-
-    p.showPage()
-    p.save()
-    return response
+    supermarket = get_object_or_404(Supermarket, pk=supermarket_id, owner=request.user)
+    batch = get_object_or_404(OrderBatch, pk=batch_id, supermarket=supermarket, status="finalized")
+
+    if request.method == "POST":
+        _queue_order_pdf(batch)
+        messages.info(request, f"Preparing the PDF of order #{batch.id} again…")
+        return redirect("packaging:order_pdf", supermarket_id=supermarket.id, batch_id=batch.id)
+
+    if batch.pdf and batch.pdf_rendered_at:
+        return FileResponse(batch.pdf.open("rb"), as_attachment=True,
+                            filename=f"order_{batch.id}.pdf", content_type="application/pdf")
+    return render(request, "packaging/order_pdf.html", {"supermarket": supermarket, "batch": batch})
 
 
 # -----------------------------
@@ -386,6 +425,54 @@ def add_scanned_item(request, supermarket_id):
     return JsonResponse({"status": "ok"})
 
 
+# Upper bounds for one batch scan request
+MAX_SCAN_CODES = 500
+MAX_SCAN_COUNT = 9999
+
+
+@login_required(login_url="account_login")
+@require_POST
+def add_scanned_items(request, supermarket_id):
+    """
+    Batch version of add_scanned_item: the scanner buffers scans and sends
+    {"scans": [{"barcode": "...", "count": 3}, ...]} (plain barcode strings
+    count as 1). Duplicate barcodes are summed before anything is written.
+    """
+    supermarket = get_object_or_404(Supermarket, id=supermarket_id, owner=request.user)
+
+    try:
+        data = json.loads(request.body.decode("utf-8"))
+        entries = data["scans"]
+        if not isinstance(entries, list):
+            raise TypeError
+    except (json.JSONDecodeError, UnicodeDecodeError, KeyError, TypeError):
+        return JsonResponse({"error": "Expected JSON {\"scans\": [...]}"}, status=400)
+
+    scans = defaultdict(int)
+    for entry in entries:
+        if isinstance(entry, dict):
+            barcode, count = entry.get("barcode"), entry.get("count", 1)
+        else:
+            barcode, count = entry, 1
+        barcode = str(barcode or "").strip()
+        try:
+            count = int(count)
+        except (TypeError, ValueError):
+            return JsonResponse({"error": f"Invalid count for {barcode or 'scan'}"}, status=400)
+        if not barcode or count <= 0:
+            continue
+        scans[barcode] = min(scans[barcode] + count, MAX_SCAN_COUNT)
+
+    if not scans:
+        return JsonResponse({"error": "No barcodes provided"}, status=400)
+    if len(scans) > MAX_SCAN_CODES:
+        return JsonResponse({"error": f"At most {MAX_SCAN_CODES} different barcodes per request"}, status=400)
+
+    batch = _get_or_create_draft_batch(supermarket, request.user)
+    result = _add_scans_to_batch(batch, scans)
+    return JsonResponse({"status": "ok", "batch_id": batch.id, **result})
+
+
 # -----------------------------
 # 4. Edit / Delete order lines
 # -----------------------------
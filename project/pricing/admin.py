@@ -1,7 +1,7 @@
 from django.contrib import admin
 
 # Register your models here.
-from pricing.models import CompetitorPrice, WastageRecord, DiscountedSale
+from pricing.models import CompetitorPrice, WastageRecord, DiscountedSale, RepricingRun, PriceChangeLog
 
 import csv
 from django.http import HttpResponse
@@ -72,3 +72,26 @@ class WastageRecordAdmin(admin.ModelAdmin):
 
     # def has_change_permission(self, request, obj=None):
     #     return False
+
+
+class PriceChangeLogInline(admin.TabularInline):
+    model = PriceChangeLog
+    raw_id_fields = ('inventory_item', 'product')
+    readonly_fields = ('inventory_item', 'product', 'store_price', 'old_price', 'new_price', 'old_rule', 'new_rule')
+    can_delete = False
+    extra = 0
+
+
+@admin.register(RepricingRun)
+class RepricingRunAdmin(admin.ModelAdmin):
+    list_display = ('supermarket', 'trigger', 'run_at', 'evaluated', 'changed')
+    list_filter = ('trigger', 'supermarket')
+    date_hierarchy = 'run_at'
+    inlines = [PriceChangeLogInline]
+
+    # Audit trail: read-only in the admin
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
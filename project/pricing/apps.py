@@ -1,6 +1,18 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_save, post_delete, m2m_changed
 
 
 class PricingConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "pricing"
+
+    def ready(self):
+        from . import promotions
+
+        Promotion = self.get_model('Promotion')
+        post_save.connect(promotions.promotion_changed, sender=Promotion, dispatch_uid='promotion_index_saved')
+        post_delete.connect(promotions.promotion_changed, sender=Promotion, dispatch_uid='promotion_index_deleted')
+        m2m_changed.connect(promotions.promotion_links_changed, sender=Promotion.products.through,
+                            dispatch_uid='promotion_index_products')
+        m2m_changed.connect(promotions.promotion_links_changed, sender=Promotion.categories.through,
+                            dispatch_uid='promotion_index_categories')
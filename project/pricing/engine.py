@@ -0,0 +1,181 @@
+# pricing/engine.py
+"""
+Set-based evaluation of a supermarket's PricingRules against its inventory.
+
+Instead of pricing one item at a time, the engine loads the columns it needs
+for every batch of the store in one query, loads the rule inputs (competitor
+minima, product suppliers) in one query each, evaluates all active rules in a
+single pass and writes back only the batches whose suggestion changed.
+
+Rule semantics:
+- Rules are tried in priority order (lower number first, then id); the first
+  price rule that matches a batch and lowers its price wins.
+- EXPIRY_DISCOUNT: store price - amount %.
+- MATCH_LOWEST / BEAT_LOWEST: lowest competitor price (- amount % for BEAT);
+  skipped when there is no competitor data for the product.
+- PROFIT_MARGIN: there is no cost price in the data model, so a margin rule is
+  a floor — a matching margin rule of higher priority than the winning rule
+  keeps the suggestion at or above store price - amount %.
+- Suggestions are never above the store price; batches under a promotion or
+  discounted by hand (InventoryItem.manual_price) are left alone.
+"""
+from collections import defaultdict, namedtuple
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import transaction
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from Inventory.bulk_import import chunked
+from Inventory.models import InventoryItem, Product
+from competitor.models import CompetitorPriceSnapshot
+from .models import PricingRule, CompetitorPrice, RepricingRun, PriceChangeLog
+
+CENT = Decimal('0.01')
+HUNDRED = Decimal('100')
+
+PriceChange = namedtuple(
+    'PriceChange',
+    'item_id product_id barcode product_name expiry_date store_price old_price new_price old_rule_id new_rule_id',
+)
+
+COMPETITIVE_TYPES = {PricingRule.RuleType.MATCH_LOWEST, PricingRule.RuleType.BEAT_LOWEST}
+
+
+def _pct_off(price, pct):
+    return (price * (HUNDRED - pct) / HUNDRED).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def load_competitor_minima(product_ids):
+    """
+    {product_id: lowest competitor price}, from both the legacy CompetitorPrice
+    rows and the latest CompetitorPriceSnapshot of each competitor.
+    `product_ids` may be a queryset (used as a SQL subquery).
+    """
+    minima = {}
+    for product_id, price in (CompetitorPrice.objects.filter(product_id__in=product_ids)
+                              .values_list('product_id', 'price')):
+        if product_id not in minima or price < minima[product_id]:
+            minima[product_id] = price
+
+    seen = set()
+    snapshots = (CompetitorPriceSnapshot.objects.filter(product_id__in=product_ids)
+                 .order_by('product_id', 'competitor_id', '-scraped_at')
+                 .values_list('product_id', 'competitor_id', 'price'))
+    for product_id, competitor_id, price in snapshots:
+        if (product_id, competitor_id) in seen:
+            continue  # older snapshot of the same competitor
+        seen.add((product_id, competitor_id))
+        if product_id not in minima or price < minima[product_id]:
+            minima[product_id] = price
+    return minima
+
+
+def evaluate_rules(supermarket, today=None):
+    """
+    Evaluates every active rule of `supermarket` against all its batches.
+    Returns (evaluated_count, [PriceChange]) without writing anything.
+    """
+    today = today or timezone.localdate()
+    rules = list(PricingRule.objects.filter(supermarket=supermarket, is_active=True).order_by('priority', 'id'))
+
+    items = (InventoryItem.objects.filter(supermarket=supermarket, promotion__isnull=True, manual_price=False)
+             .annotate(effective_category=Coalesce('category_id', 'product__category_id'))
+             .values_list('id', 'product_id', 'product__barcode', 'product__name', 'expiry_date', 'store_price',
+                          'suggested_price', 'applied_rule_id', 'effective_category'))
+    rows = list(items)
+    if not rows:
+        return 0, []
+    (ids, product_ids, barcodes, names, expiries, store_prices,
+     old_prices, old_rules, categories) = (list(col) for col in zip(*rows))
+
+    store_products = InventoryItem.objects.filter(supermarket=supermarket).values('product_id')
+    minima = {}
+    if any(r.rule_type in COMPETITIVE_TYPES for r in rules):
+        minima = load_competitor_minima(store_products)
+
+    supplier_ids = {r.supplier_id for r in rules if r.supplier_id}
+    product_suppliers = set()
+    if supplier_ids:
+        product_suppliers = set(
+            Product.suppliers.through.objects
+            .filter(supplier_id__in=supplier_ids, product_id__in=store_products)
+            .values_list('product_id', 'supplier_id')
+        )
+
+    changes = []
+    for i in range(len(ids)):
+        base = store_prices[i]
+        new_price = new_rule = floor = None
+
+        if base is not None:
+            days_left = (expiries[i] - today).days
+            for rule in rules:
+                if rule.category_id and rule.category_id != categories[i]:
+                    continue
+                if rule.supplier_id and (product_ids[i], rule.supplier_id) not in product_suppliers:
+                    continue
+                if rule.days_until_expiry is not None and days_left > rule.days_until_expiry:
+                    continue
+
+                if rule.rule_type == PricingRule.RuleType.PROFIT_MARGIN:
+                    if floor is None:
+                        floor = _pct_off(base, rule.amount)
+                    continue
+                if rule.rule_type == PricingRule.RuleType.EXPIRY_DISCOUNT:
+                    price = _pct_off(base, rule.amount)
+                else:
+                    lowest = minima.get(product_ids[i])
+                    if lowest is None:
+                        continue
+                    price = lowest if rule.rule_type == PricingRule.RuleType.MATCH_LOWEST else _pct_off(lowest, rule.amount)
+
+                if floor is not None and price < floor:
+                    price = floor
+                if price < base:
+                    new_price, new_rule = max(price, Decimal('0.00')), rule.id
+                    break
+
+        if (new_price, new_rule) != (old_prices[i], old_rules[i]):
+            changes.append(PriceChange(ids[i], product_ids[i], barcodes[i], names[i], expiries[i], base,
+                                       old_prices[i], new_price, old_rules[i], new_rule))
+    return len(ids), changes
+
+
+def apply_pricing_rules(supermarket, dry_run=False, today=None, trigger=RepricingRun.Trigger.MANUAL):
+    """
+    Runs evaluate_rules() and, unless `dry_run`, writes the changed
+    suggestions back in bulk together with their audit trail
+    (a RepricingRun and one PriceChangeLog per changed batch).
+    Runs that change nothing are not recorded. Returns a report dict.
+    """
+    evaluated, changes = evaluate_rules(supermarket, today=today)
+    run = None
+    if not dry_run and changes:
+        # Suggestions repeat a lot (same rule, same price), so one UPDATE per
+        # distinct (price, rule) is far cheaper than bulk_update's CASE WHEN.
+        groups = defaultdict(list)
+        for c in changes:
+            groups[(c.new_price, c.new_rule_id)].append(c.item_id)
+        with transaction.atomic():
+            for (price, rule_id), item_ids in groups.items():
+                for chunk in chunked(item_ids):
+                    InventoryItem.objects.filter(id__in=chunk).update(
+                        suggested_price=price, applied_rule_id=rule_id)
+
+            run = RepricingRun.objects.create(
+                supermarket=supermarket, trigger=trigger, evaluated=evaluated, changed=len(changes))
+            PriceChangeLog.objects.bulk_create([
+                PriceChangeLog(
+                    run=run, inventory_item_id=c.item_id, product_id=c.product_id,
+                    store_price=c.store_price, old_price=c.old_price, new_price=c.new_price,
+                    old_rule_id=c.old_rule_id, new_rule_id=c.new_rule_id,
+                ) for c in changes
+            ], batch_size=1000)
+    return {
+        'evaluated': evaluated,
+        'changes': changes,
+        'written': 0 if dry_run else len(changes),
+        'dry_run': dry_run,
+        'run': run,
+    }
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from Inventory.models import Supermarket
+from pricing.engine import apply_pricing_rules
+
+
+class Command(BaseCommand):
+    help = "Evaluate active pricing rules against every batch and store the suggested prices."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--supermarket", type=int, help="Only this supermarket id (default: all)")
+        parser.add_argument("--dry-run", action="store_true", help="Print the changes without writing them")
+
+    def handle(self, *args, **opts):
+        supermarkets = Supermarket.objects.all()
+        if opts["supermarket"]:
+            supermarkets = supermarkets.filter(pk=opts["supermarket"])
+
+        for supermarket in supermarkets:
+            report = apply_pricing_rules(supermarket, dry_run=opts["dry_run"])
+            if opts["dry_run"]:
+                for c in report["changes"]:
+                    self.stdout.write(
+                        f"  #{c.item_id} {c.product_name} ({c.expiry_date}): "
+                        f"{c.old_price or '-'} -> {c.new_price or '-'} (rule {c.new_rule_id or '-'})"
+                    )
+            self.stdout.write(self.style.SUCCESS(
+                f"{supermarket.name}: {report['evaluated']} batches evaluated, "
+                f"{len(report['changes'])} changed, {report['written']} written"
+            ))
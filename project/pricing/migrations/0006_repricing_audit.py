@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Inventory', '0005_inventoryitem_suggested_price'),
+        ('pricing', '0005_alter_promotion_start_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RepricingRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trigger', models.CharField(choices=[('SCHEDULED', 'Scheduled'), ('MANUAL', 'Manual')], default='MANUAL', max_length=20)),
+                ('run_at', models.DateTimeField(auto_now_add=True)),
+                ('evaluated', models.PositiveIntegerField(default=0)),
+                ('changed', models.PositiveIntegerField(default=0)),
+                ('supermarket', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='repricing_runs', to='Inventory.supermarket')),
+            ],
+            options={
+                'ordering': ['-run_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PriceChangeLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('store_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('old_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('new_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('inventory_item', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='price_changes', to='Inventory.inventoryitem')),
+                ('new_rule', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='pricing.pricingrule')),
+                ('old_rule', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='pricing.pricingrule')),
+                ('product', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='price_changes', to='Inventory.product')),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='changes', to='pricing.repricingrun')),
+            ],
+        ),
+    ]
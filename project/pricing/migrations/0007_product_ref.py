@@ -0,0 +1,58 @@
+"""
+Detaches this app's references to Product from the barcode primary key
+(see Inventory 0008): foreign keys become integer `product_ref` columns and
+Promotion.products is parked in a scratch table until 0008 restores them.
+"""
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+BATCH_SIZE = 2000
+PRODUCT_FKS = ('CompetitorPrice', 'DiscountedSale', 'WastageRecord', 'PriceChangeLog')
+
+
+def fill_product_refs(apps, schema_editor):
+    Product = apps.get_model('Inventory', 'Product')
+    product_id = Subquery(Product.objects.filter(barcode=OuterRef('product_id')).values('id')[:1])
+    for model_name in PRODUCT_FKS:
+        apps.get_model('pricing', model_name).objects.update(product_ref=product_id)
+
+    Promotion = apps.get_model('pricing', 'Promotion')
+    PromotionProductRef = apps.get_model('pricing', 'PromotionProductRef')
+    links = Promotion.products.through.objects.values_list('promotion_id', 'product__id')
+    PromotionProductRef.objects.bulk_create(
+        [PromotionProductRef(promotion_id=promotion_id, product_ref=product_ref) for promotion_id, product_ref in links],
+        batch_size=BATCH_SIZE,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Inventory', '0008_product_id_prepare'),
+        ('pricing', '0006_repricing_audit'),
+    ]
+
+    operations = [
+        *[migrations.AddField(
+            model_name=model_name.lower(),
+            name='product_ref',
+            field=models.BigIntegerField(null=True),
+        ) for model_name in PRODUCT_FKS],
+        migrations.CreateModel(
+            name='PromotionProductRef',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('product_ref', models.BigIntegerField()),
+                ('promotion', models.ForeignKey(on_delete=models.deletion.CASCADE, to='pricing.promotion')),
+            ],
+        ),
+        migrations.RunPython(fill_product_refs),
+        *[migrations.RemoveField(
+            model_name=model_name.lower(),
+            name='product',
+        ) for model_name in PRODUCT_FKS],
+        migrations.RemoveField(
+            model_name='promotion',
+            name='products',
+        ),
+    ]
@@ -0,0 +1,79 @@
+"""
+Points this app back at Product through its new integer primary key
+(see Inventory 0009) and restores Promotion.products from the scratch table.
+"""
+import django.db.models.deletion
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+
+
+def restore_promotion_products(apps, schema_editor):
+    Promotion = apps.get_model('pricing', 'Promotion')
+    PromotionProductRef = apps.get_model('pricing', 'PromotionProductRef')
+    Through = Promotion.products.through
+    Through.objects.bulk_create(
+        [Through(promotion_id=promotion_id, product_id=product_ref)
+         for promotion_id, product_ref in PromotionProductRef.objects.values_list('promotion_id', 'product_ref')],
+        batch_size=BATCH_SIZE,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Inventory', '0009_product_integer_pk'),
+        ('pricing', '0007_product_ref'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='competitorprice',
+            old_name='product_ref',
+            new_name='product',
+        ),
+        migrations.AlterField(
+            model_name='competitorprice',
+            name='product',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='competitor_prices', to='Inventory.product'),
+        ),
+        migrations.RenameField(
+            model_name='discountedsale',
+            old_name='product_ref',
+            new_name='product',
+        ),
+        migrations.AlterField(
+            model_name='discountedsale',
+            name='product',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sales_logs', to='Inventory.product'),
+        ),
+        migrations.RenameField(
+            model_name='wastagerecord',
+            old_name='product_ref',
+            new_name='product',
+        ),
+        migrations.AlterField(
+            model_name='wastagerecord',
+            name='product',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='wastage_logs', to='Inventory.product'),
+        ),
+        migrations.RenameField(
+            model_name='pricechangelog',
+            old_name='product_ref',
+            new_name='product',
+        ),
+        migrations.AlterField(
+            model_name='pricechangelog',
+            name='product',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='price_changes', to='Inventory.product'),
+        ),
+        migrations.AddField(
+            model_name='promotion',
+            name='products',
+            field=models.ManyToManyField(blank=True, related_name='promotions', to='Inventory.product'),
+        ),
+        migrations.RunPython(restore_promotion_products),
+        migrations.DeleteModel(
+            name='PromotionProductRef',
+        ),
+    ]
@@ -299,3 +299,39 @@ class WastageRecord(models.Model):
 
         super().save(*args, **kwargs)
 
+
+
+class RepricingRun(models.Model):
+    """One evaluation of a supermarket's pricing rules (see pricing/engine.py)."""
+
+    class Trigger(models.TextChoices):
+        SCHEDULED = 'SCHEDULED', 'Scheduled'
+        MANUAL = 'MANUAL', 'Manual'
+
+    supermarket = models.ForeignKey('Inventory.Supermarket', on_delete=models.CASCADE, related_name='repricing_runs')
+    trigger = models.CharField(max_length=20, choices=Trigger.choices, default=Trigger.MANUAL)
+    run_at = models.DateTimeField(auto_now_add=True)
+    evaluated = models.PositiveIntegerField(default=0)
+    changed = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-run_at']
+
+    def __str__(self):
+        return f"{self.supermarket.name} @ {self.run_at:%Y-%m-%d %H:%M}: {self.changed} changed"
+
+
+class PriceChangeLog(models.Model):
+    """Audit trail: one row per batch whose suggested price a run changed."""
+    run = models.ForeignKey(RepricingRun, on_delete=models.CASCADE, related_name='changes')
+    inventory_item = models.ForeignKey('Inventory.InventoryItem', on_delete=models.SET_NULL, null=True,
+                                       related_name='price_changes')
+    product = models.ForeignKey('Inventory.Product', on_delete=models.SET_NULL, null=True, related_name='price_changes')
+    store_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    old_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    new_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    old_rule = models.ForeignKey(PricingRule, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    new_rule = models.ForeignKey(PricingRule, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+
+    def __str__(self):
+        return f"#{self.inventory_item_id}: {self.old_price} -> {self.new_price}"
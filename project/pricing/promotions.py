@@ -0,0 +1,157 @@
+# pricing/promotions.py
+"""
+Per-store, in-memory index of the promotions active right now.
+
+Best-price resolution for labels and scans is a dictionary lookup: the index
+maps product id -> promotions and category id -> promotions. It is built
+with three queries per store and stays valid until the next start/end-date
+boundary of that store's promotions, or until a promotion of the store
+changes (see PricingConfig.ready). A per-store version counter in the shared
+cache (settings.CACHES) makes the other workers drop their copy; MAX_AGE
+bounds how long a copy lives if a version bump is ever lost (cache flush or
+eviction).
+"""
+from collections import namedtuple
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import Promotion
+
+# Longest an index is served without a rebuild, even with no boundary in sight
+MAX_AGE = timedelta(minutes=5)
+
+PromoEntry = namedtuple(
+    'PromoEntry',
+    'id name discount_type discount_value buy_qty free_qty pack_qty pack_price start_date end_date',
+)
+
+_FIELDS = PromoEntry._fields
+
+
+def promotion_price(promo, base_price: Decimal):
+    """(discounted unit price, label text) for one promotion, or None if it cannot apply."""
+    if promo.discount_type == Promotion.DiscountType.PERCENTAGE and promo.discount_value is not None:
+        return (base_price * (Decimal(100) - promo.discount_value) / 100,
+                f"-{promo.discount_value}%")
+    if promo.discount_type == Promotion.DiscountType.FIXED_AMOUNT and promo.discount_value is not None:
+        return base_price - promo.discount_value, f"-{promo.discount_value}€"
+    if promo.discount_type == Promotion.DiscountType.MULTIPACK and promo.pack_qty and promo.pack_price is not None:
+        return promo.pack_price / promo.pack_qty, f"{promo.pack_qty} for {promo.pack_price}€"
+    if promo.discount_type == Promotion.DiscountType.BOGO and promo.buy_qty and promo.free_qty:
+        return ((base_price * promo.buy_qty) / (promo.buy_qty + promo.free_qty),
+                f"Buy {promo.buy_qty} get {promo.free_qty} free")
+    return None
+
+
+class ActivePromotionIndex:
+
+    def __init__(self, supermarket_id, now=None):
+        now = now or timezone.now()
+        self.supermarket_id = supermarket_id
+        self.built_at = now
+        self.promotions = {}     # id -> PromoEntry
+        self.by_product = {}     # product id -> [PromoEntry]
+        self.by_category = {}    # category id -> [PromoEntry]
+
+        # Active and upcoming promotions; the upcoming ones only set the next boundary
+        boundaries = []
+        rows = (Promotion.objects
+                .filter(supermarket_id=supermarket_id, is_active=True, end_date__gte=now)
+                .order_by('start_date', 'id')
+                .values_list(*_FIELDS))
+        for row in rows:
+            promo = PromoEntry(*row)
+            if promo.start_date <= now:
+                self.promotions[promo.id] = promo
+                boundaries.append(promo.end_date)
+            else:
+                boundaries.append(promo.start_date)
+        self.valid_until = min(boundaries, default=None)
+
+        if self.promotions:
+            ids = list(self.promotions)
+            for promo_id, product_id in (Promotion.products.through.objects
+                                         .filter(promotion_id__in=ids).values_list('promotion_id', 'product_id')):
+                self.by_product.setdefault(product_id, []).append(self.promotions[promo_id])
+            for promo_id, category_id in (Promotion.categories.through.objects
+                                          .filter(promotion_id__in=ids).values_list('promotion_id', 'category_id')):
+                self.by_category.setdefault(category_id, []).append(self.promotions[promo_id])
+
+    def is_current(self, now):
+        if now - self.built_at > MAX_AGE:
+            return False
+        return self.valid_until is None or now <= self.valid_until
+
+    def active(self):
+        """Active promotions ordered by name (for dropdowns)."""
+        return sorted(self.promotions.values(), key=lambda p: p.name)
+
+    def candidates(self, product_id, category_id=None):
+        promos = list(self.by_product.get(product_id, ()))
+        for promo in self.by_category.get(category_id, ()):
+            if promo not in promos:
+                promos.append(promo)
+        return promos
+
+    def best_price(self, product_id, category_id, base_price: Decimal):
+        """
+        Returns (final_price, display_text, original_price); display_text and
+        original_price are None when no promotion beats `base_price`.
+        """
+        best_price, best_label = base_price, None
+        for promo in self.candidates(product_id, category_id):
+            result = promotion_price(promo, base_price)
+            if result and result[0] < best_price:
+                best_price, best_label = result
+        if not best_label:
+            return base_price, None, None
+        return best_price, best_label, base_price
+
+
+_indexes = {}   # supermarket id -> (version, ActivePromotionIndex)
+
+
+def _version_key(supermarket_id):
+    return f"pricing:promotions:version:{supermarket_id}"
+
+
+def promotion_index(supermarket_id):
+    """The store's index, rebuilt when stale (boundary passed or a promotion changed)."""
+    now = timezone.now()
+    version = cache.get(_version_key(supermarket_id), 0)
+    cached = _indexes.get(supermarket_id)
+    if cached is None or cached[0] != version or not cached[1].is_current(now):
+        cached = (version, ActivePromotionIndex(supermarket_id, now))
+        _indexes[supermarket_id] = cached
+    return cached[1]
+
+
+def invalidate_store(supermarket_id):
+    _indexes.pop(supermarket_id, None)
+    key = _version_key(supermarket_id)
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+
+def promotion_changed(sender, instance, **kwargs):
+    invalidate_store(instance.supermarket_id)
+
+
+def promotion_links_changed(sender, instance, action, reverse, pk_set=None, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        invalidate_store(instance.supermarket_id)
+    else:
+        # Changed from the product/category side: every store owning one of those promotions
+        store_ids = Promotion.objects.filter(pk__in=pk_set or ()).values_list('supermarket_id', flat=True)
+        if action == 'post_clear':
+            store_ids = Promotion.objects.values_list('supermarket_id', flat=True)
+        for store_id in set(store_ids):
+            invalidate_store(store_id)
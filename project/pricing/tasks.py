@@ -0,0 +1,49 @@
+# pricing/tasks.py
+import uuid
+
+from celery import group, shared_task
+from django.core.cache import cache
+
+from Inventory.models import Supermarket
+from .engine import apply_pricing_rules
+from .models import RepricingRun
+
+# A store's run must not overlap with the next scheduled one. The lock lives in the
+# shared cache (settings.CACHES), where add() is atomic across every worker process.
+LOCK_TIMEOUT = 30 * 60
+
+
+@shared_task
+def reprice_supermarket_task(supermarket_id):
+    """Applies one supermarket's pricing rules; only changed batches are written and audited."""
+    lock_key = f"pricing:reprice:{supermarket_id}"
+    token = uuid.uuid4().hex
+    if not cache.add(lock_key, token, LOCK_TIMEOUT):
+        return f"Supermarket {supermarket_id}: previous run still in progress, skipped."
+    try:
+        try:
+            supermarket = Supermarket.objects.get(pk=supermarket_id)
+        except Supermarket.DoesNotExist:
+            return f"Supermarket {supermarket_id} not found"
+        report = apply_pricing_rules(supermarket, trigger=RepricingRun.Trigger.SCHEDULED)
+        return f"{supermarket.name}: {report['evaluated']} batches evaluated, {report['written']} repriced."
+    finally:
+        # Only release our own lock: past LOCK_TIMEOUT another run may hold it
+        if cache.get(lock_key) == token:
+            cache.delete(lock_key)
+
+
+@shared_task
+def reprice_all_supermarkets_task():
+    """
+    Periodic job (Celery Beat): fans out one reprice task per supermarket
+    that has active rules or still carries rule-based suggestions, so stores
+    are repriced in parallel across the workers.
+    """
+    ids = list(
+        Supermarket.objects.filter(pricing_rules__is_active=True)
+        .union(Supermarket.objects.filter(inventory_items__applied_rule__isnull=False))
+        .values_list('id', flat=True)
+    )
+    group(reprice_supermarket_task.s(pk) for pk in ids).apply_async()
+    return f"Repricing scheduled for {len(ids)} supermarkets."
@@ -1,3 +1,57 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from Inventory.models import InventoryItem, Product, Supermarket
+from .models import PricingRule
+from .tasks import reprice_supermarket_task
+from .views import apply_specific_discount_view
+
+LOCAL_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class ManualDiscountTests(TestCase):
+    """Discounts applied by hand from the alert monitor survive the scheduled repricing."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'Store', 'Owner', username='owner', email='owner@example.com', password='pass')
+        self.supermarket = Supermarket.objects.create(name='Store', owner=self.user)
+        self.expiry_rule = PricingRule.objects.create(
+            supermarket=self.supermarket, name='Expiry -30%', priority=1,
+            rule_type=PricingRule.RuleType.EXPIRY_DISCOUNT, amount=30)
+        self.clearance_rule = PricingRule.objects.create(
+            supermarket=self.supermarket, name='Clearance -50%', priority=2, is_active=False,
+            rule_type=PricingRule.RuleType.EXPIRY_DISCOUNT, amount=50)
+        expiry_date = timezone.localdate() + timedelta(days=2)
+        self.items = [
+            InventoryItem.objects.create(
+                supermarket=self.supermarket, product=Product.objects.create(barcode=code, name=code),
+                expiry_date=expiry_date, store_price=Decimal('10.00'))
+            for code in ('1001', '1002', '1003')
+        ]
+
+    def test_manual_discounts_survive_the_scheduled_run(self):
+        by_rule, by_choice, untouched = self.items
+        self.client.force_login(self.user)
+        self.client.post(reverse('pricing:apply_discount', args=[self.supermarket.pk, by_rule.pk]))
+        request = RequestFactory().post('/', {'discount_type': 'rule', 'discount_id': self.clearance_rule.pk})
+        request.user = self.user
+        request.session = self.client.session
+        request._messages = FallbackStorage(request)
+        apply_specific_discount_view(request, supermarket_id=self.supermarket.pk, item_id=by_choice.pk)
+        # Off what a run would suggest (7.00), so an overwrite shows
+        InventoryItem.objects.filter(pk=by_rule.pk).update(suggested_price=Decimal('6.50'))
+
+        reprice_supermarket_task(self.supermarket.pk)
+
+        prices = dict(InventoryItem.objects.values_list('pk', 'suggested_price'))
+        self.assertEqual(prices[by_rule.pk], Decimal('6.50'))
+        self.assertEqual(prices[by_choice.pk], Decimal('5.00'))
+        self.assertEqual(prices[untouched.pk], Decimal('7.00'))
@@ -7,6 +7,7 @@ urlpatterns = [
 
 path('supermarket/<int:supermarket_id>/alerts/', views.alert_monitor_view, name='alert_monitor'),
     path('supermarket/<int:supermarket_id>/strategy/', views.pricing_strategy_view, name='pricing_strategy'),
+    path('supermarket/<int:supermarket_id>/strategy/run/', views.pricing_rules_run_view, name='pricing_rules_run'),
 
 # --- ✅ ADD THESE ---
     # Edit Pricing Rule
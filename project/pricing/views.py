@@ -18,6 +18,10 @@ from rest_framework.permissions import IsAuthenticated
 
 from Inventory.models import Supermarket, InventoryItem, Category, Rack
 from pricing.models import PricingRule, DiscountedSale, Promotion, WastageRecord  # ✅ Import models
+from pricing.promotions import promotion_index
+from Inventory.stock_status import EXPIRED, EXPIRES_SOON, EXPIRES_TODAY
+from Inventory.urgent_items import bucketed, urgent_items
+from Inventory import reference_data
 
 
 @require_POST
@@ -44,6 +48,7 @@ def apply_discount_view(request, supermarket_id, item_id):
             # Apply the new price and link the rule
             item.suggested_price = new_price
             item.applied_rule = rule  # Save the rule object (ForeignKey)
+            item.manual_price = True  # kept by the scheduled repricing
             item.save()
             messages.success(request, f"Discount of {rule.amount}% applied to {item.product.name}.")
         else:
@@ -165,38 +170,13 @@ def alert_monitor_view(request, supermarket_id):
     This view is optimized to perform only one database query.
     """
     supermarket = get_object_or_404(Supermarket, pk=supermarket_id, owner=request.user)
-    today = timezone.now().date()
-
-    # 1. Fetch all urgent items ONCE...
-    urgent_items_list = list(
-        supermarket.inventory_items.filter(
-            expiry_date__lt=today + timezone.timedelta(days=8)
-        ).select_related(
-            'product', 'applied_rule', 'category', 'promotion'  # ✅ ADD 'promotion' HERE
-        ).order_by('expiry_date')
-    )
 
-    # ... (rest of your item sorting logic from line 2 to 5) ...
-    expired_items, expires_today_items, expires_soon_items = [], [], []
-    categories_set = set()
-    racks_set = set()
-    for item in urgent_items_list:
-        status = item.status
-        days_diff = (item.expiry_date - today).days
-
-        if status == 'expired':
-            item.days_since_expiry = abs(days_diff)
-            expired_items.append(item)
-        elif status == 'expires_today':
-            item.days_left = 0
-            expires_today_items.append(item)
-        elif status == 'expires_soon':
-            item.days_left = days_diff
-            expires_soon_items.append(item)
-
-    categories = Category.objects.all()
-    # ✅ ADDED: Get all racks for this supermarket to populate the dropdown
-    racks = Rack.objects.filter(supermarket=supermarket).order_by('name')
+    # 1. Fetch all urgent items in one query, already bucketed by status
+    urgent_items_list = urgent_items(supermarket)
+    buckets = bucketed(urgent_items_list)
+
+    categories = reference_data.categories()
+    racks = reference_data.racks(supermarket.pk)
 
     # --- ✅ ADD THIS SECTION ---
     # Fetch active discounts for this supermarket to populate the modal dropdown
@@ -205,19 +185,15 @@ def alert_monitor_view(request, supermarket_id):
         supermarket=supermarket
     ).order_by('name')
 
-    active_promotions = Promotion.objects.filter(
-        supermarket=supermarket,
-        start_date__lte=today,
-        end_date__gte=today
-    ).order_by('name')
+    active_promotions = promotion_index(supermarket.pk).active()
     # --- END ADDED SECTION ---
 
     # 6. Build the final context
     context = {
         'supermarket': supermarket,
-        'expired_items': expired_items,
-        'expires_today_items': expires_today_items,
-        'expires_soon_items': expires_soon_items,
+        'expired_items': buckets[EXPIRED],
+        'expires_today_items': buckets[EXPIRES_TODAY],
+        'expires_soon_items': buckets[EXPIRES_SOON],
         'total_urgent_count': len(urgent_items_list),
         'available_categories': categories,
         'available_racks': racks,
@@ -274,6 +250,7 @@ def apply_specific_discount_view(request, supermarket_id, item_id):
             item.suggested_price = new_price
             item.applied_rule = applied_rule_obj
             item.promotion = applied_promo_obj
+            item.manual_price = True  # kept by the scheduled repricing
             item.save()
             messages.success(request, f"Discount '{rule_name}' applied to {item.product.name}.")
         else:
@@ -386,6 +363,43 @@ def pricing_rule_delete_view(request, supermarket_id, rule_id):
         messages.error(request, f"Could not delete rule: {e}")
     return redirect('pricing:pricing_strategy', supermarket_id=supermarket.id)
 
+
+from .engine import apply_pricing_rules
+
+# Max number of changed batches listed on the preview page
+PREVIEW_LIMIT = 500
+
+
+@login_required(login_url='account_login')
+def pricing_rules_run_view(request, supermarket_id):
+    """
+    GET: dry run of all active rules, showing the batches whose suggested
+    price would change. POST: applies them in bulk.
+    """
+    supermarket = get_object_or_404(Supermarket, pk=supermarket_id, owner=request.user)
+
+    if request.method == 'POST':
+        report = apply_pricing_rules(supermarket)
+        messages.success(
+            request,
+            f"Pricing rules applied: {report['written']} of {report['evaluated']} batches repriced."
+        )
+        return redirect('pricing:pricing_strategy', supermarket_id=supermarket.id)
+
+    report = apply_pricing_rules(supermarket, dry_run=True)
+    rule_names = dict(PricingRule.objects.filter(supermarket=supermarket).values_list('id', 'name'))
+    changes = [
+        {**c._asdict(), 'old_rule': rule_names.get(c.old_rule_id), 'new_rule': rule_names.get(c.new_rule_id)}
+        for c in report['changes'][:PREVIEW_LIMIT]
+    ]
+    context = {
+        'supermarket': supermarket,
+        'report': report,
+        'changes': changes,
+        'truncated': len(report['changes']) > PREVIEW_LIMIT,
+    }
+    return render(request, 'pricing/pricing_rules_preview.html', context)
+
 # ... your other pricing views (alert_monitor, mark_item_sold, api) ...
 
 @require_POST
@@ -0,0 +1,18 @@
+from django import forms
+
+
+class PriceListImportForm(forms.Form):
+    """
+    Upload form for a supplier / head-office price list (CSV or XLSX).
+    """
+    file = forms.FileField(
+        help_text="Columns: barcode, price",
+        widget=forms.FileInput(attrs={
+            'class': 'w-full text-sm text-gray-500 file:mr-4 file:py-2 file:px-4 file:rounded-full file:border-0 file:text-sm file:font-semibold file:bg-blue-50 file:text-blue-700 hover:file:bg-blue-100',
+            'accept': '.csv,.xlsx',
+        })
+    )
+    cascade = forms.BooleanField(
+        required=False, initial=True,
+        label="Also update non-discounted inventory batches",
+    )
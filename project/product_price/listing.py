@@ -0,0 +1,70 @@
+# product_price/listing.py
+from django.core.paginator import Paginator
+from django.db.models import F, FilteredRelation, Q
+from django.utils.functional import cached_property
+
+from Inventory.models import Product
+from Inventory.search import search
+
+PAGE_SIZE = 30
+
+# The primary key breaks ties between equal names
+LISTING_ORDERING = ('name', 'id')
+
+
+def filtered_products(supermarket, query='', category_id='', rack_id='', price_status=''):
+    """
+    Catalog filtered by the manage-prices filters, without display columns.
+
+    The store's ProductPrice row is exposed as the `store_defaults` relation
+    (a LEFT JOIN on (product, supermarket)); it is only joined when a filter
+    actually uses it.
+    """
+    product_list = Product.objects.alias(
+        store_defaults=FilteredRelation(
+            'price_listings', condition=Q(price_listings__supermarket=supermarket)
+        ),
+    )
+
+    if query:
+        product_list = search(product_list, query)
+    if category_id:
+        product_list = product_list.filter(store_defaults__default_category_id=category_id)
+    if rack_id:
+        product_list = product_list.filter(store_defaults__default_rack_id=rack_id)
+    if price_status == 'set':
+        product_list = product_list.filter(store_defaults__price__isnull=False)
+    elif price_status == 'unset':
+        product_list = product_list.filter(store_defaults__price__isnull=True)
+
+    return product_list
+
+
+def product_price_listing(supermarket, **filters):
+    """
+    Catalog listing with this supermarket's defaults attached.
+
+    ProductPrice is LEFT JOINed once (it is unique on (supermarket, product),
+    so no DISTINCT is needed), and its category and rack names come from two
+    more LEFT JOINs on that same row instead of three correlated subqueries.
+    """
+    return filtered_products(supermarket, **filters).annotate(
+        current_price=F('store_defaults__price'),
+        current_category=F('store_defaults__default_category__name'),
+        current_rack=F('store_defaults__default_rack__name'),
+    ).order_by(*LISTING_ORDERING)
+
+
+class ListingPaginator(Paginator):
+    """
+    Paginator that counts a lean queryset (filters only, no display joins)
+    while slicing the fully annotated one.
+    """
+
+    def __init__(self, object_list, per_page, count_queryset, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_queryset = count_queryset
+
+    @cached_property
+    def count(self):
+        return self.count_queryset.count()
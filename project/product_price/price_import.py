@@ -0,0 +1,147 @@
+# product_price/price_import.py
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery
+
+from Inventory.bulk_import import chunked, iter_rows, parse_price
+from Inventory.gtin import canonical_barcode
+from Inventory.models import Product, ProductPrice, InventoryItem
+
+PRICE_COLUMN_ALIASES = {
+    'barcode': 'barcode', 'ean': 'barcode', 'gtin': 'barcode',
+    'price': 'price', 'store_price': 'price', 'prix': 'price',
+}
+
+# ProductPrice.price is DecimalField(max_digits=5, decimal_places=2)
+MAX_PRICE = Decimal('999.99')
+
+
+def import_price_list(supermarket, uploaded_file, cascade=True):
+    """
+    Diff-merges a CSV/XLSX price list (barcode, price) into the supermarket's
+    ProductPrice rows.
+
+    - Existing prices are loaded once and compared in memory.
+    - Only new or changed rows are written, in one bulk upsert on
+      (supermarket, product).
+    - If `cascade` is set, non-discounted InventoryItem batches of the changed
+      products get the new price (see _cascade).
+
+    Returns a change summary dict.
+    """
+    errors = []
+    prices = {}
+
+    for line_no, row in iter_rows(uploaded_file, required=('barcode', 'price'), aliases=PRICE_COLUMN_ALIASES):
+        barcode = str(row.get('barcode') or '').strip()
+        if not barcode:
+            errors.append((line_no, "Missing barcode."))
+            continue
+        try:
+            price = parse_price(row.get('price'))
+        except ValueError as e:
+            errors.append((line_no, str(e)))
+            continue
+        if price is None or price < 0 or price > MAX_PRICE:
+            errors.append((line_no, f"Price must be between 0 and {MAX_PRICE}."))
+            continue
+        # Last line wins if a barcode is listed twice (in any GTIN spelling)
+        prices[canonical_barcode(barcode)] = (line_no, barcode, price)
+
+    known = {}  # canonical barcode -> product id
+    for chunk in chunked(prices):
+        known.update(Product.objects.filter(canonical_barcode__in=chunk).values_list('canonical_barcode', 'id'))
+
+    current = {}  # product id -> price
+    for chunk in chunked(known.values()):
+        current.update(
+            ProductPrice.objects.filter(supermarket=supermarket, product_id__in=chunk)
+            .values_list('product_id', 'price')
+        )
+
+    created, changed, unchanged = [], [], 0
+    product_ids = {}  # barcode as listed -> product id
+    for key, (line_no, barcode, price) in prices.items():
+        product_id = known.get(key)
+        if product_id is None:
+            errors.append((line_no, f"Unknown product '{barcode}'."))
+            continue
+        product_ids[barcode] = product_id
+        if product_id not in current:
+            created.append((barcode, None, price))
+        elif current[product_id] != price:
+            changed.append((barcode, current[product_id], price))
+        else:
+            unchanged += 1
+
+    cascaded = merged = 0
+    to_write = created + changed
+    if to_write:
+        with transaction.atomic():
+            ProductPrice.objects.bulk_create(
+                [ProductPrice(supermarket=supermarket, product_id=product_ids[barcode], price=price)
+                 for barcode, _old, price in to_write],
+                batch_size=1000,
+                update_conflicts=True,
+                unique_fields=['supermarket', 'product'],
+                update_fields=['price', 'last_updated'],
+            )
+
+            if cascade:
+                cascaded, merged = _cascade(supermarket, {product_ids[barcode]: price for barcode, _old, price in to_write})
+
+    errors.sort()
+    return {
+        'created': created,
+        'changed': changed,
+        'unchanged': unchanged,
+        'cascaded': cascaded,
+        'merged': merged,
+        'errors': errors,
+    }
+
+
+def _cascade(supermarket, new_prices):
+    """
+    Gives the non-discounted batches of each product in `new_prices`
+    ({product_id: price}) the new price: one UPDATE ... SET store_price =
+    (SELECT price FROM ProductPrice ...) per chunk.
+
+    Batches that differ only by store_price would end up with the same batch
+    key (inventory_item_unique_batch); each such group is merged first into
+    the batch already at the new price, or else the oldest one (quantities
+    summed, the others deleted). Returns (batches repriced, batches merged).
+    """
+    new_price = ProductPrice.objects.filter(supermarket=supermarket, product=OuterRef('product')).values('price')[:1]
+    repriced = merged = 0
+    for chunk in chunked(new_prices):
+        groups = defaultdict(list)  # batch key after the cascade -> [(id, quantity, needs the new price)]
+        for item_id, product_id, expiry_date, rack_id, store_price, quantity, promotion_id, rule_id in (
+                InventoryItem.objects.filter(supermarket=supermarket, product_id__in=chunk).order_by('id')
+                .values_list('id', 'product_id', 'expiry_date', 'rack_id', 'store_price', 'quantity',
+                             'promotion_id', 'applied_rule_id')):
+            price = new_prices[product_id] if promotion_id is None and rule_id is None else store_price
+            groups[(product_id, expiry_date, rack_id, price)].append((item_id, quantity, price != store_price))
+
+        to_reprice, extra, to_delete = [], {}, []
+        for members in groups.values():
+            keep = next((m for m in members if not m[2]), members[0])
+            if keep[2]:
+                to_reprice.append(keep[0])
+            others = [m for m in members if m is not keep]
+            if others:
+                extra[keep[0]] = sum(quantity for _id, quantity, _reprice in others)
+                to_delete.extend(item_id for item_id, _quantity, _reprice in others)
+
+        # Free the keys first, then fold the quantities in and reprice
+        for ids in chunked(to_delete):
+            InventoryItem.objects.filter(pk__in=ids).delete()
+        for item_id, quantity in extra.items():
+            InventoryItem.objects.filter(pk=item_id).update(quantity=F('quantity') + quantity)
+        for ids in chunked(to_reprice):
+            InventoryItem.objects.filter(pk__in=ids).update(store_price=Subquery(new_price))
+        repriced += len(to_reprice)
+        merged += len(to_delete)
+    return repriced, merged
@@ -1,3 +1,32 @@
-from django.test import TestCase
+from datetime import date
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+
+from Inventory.models import InventoryItem, Product, ProductPrice, Supermarket
+from .price_import import import_price_list
+
+LOCAL_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class PriceCascadeTests(TestCase):
+
+    def test_batches_that_meet_at_the_new_price_are_merged(self):
+        owner = get_user_model().objects.create_user(
+            'Store', 'Owner', username='owner', email='owner@example.com', password='pass')
+        supermarket = Supermarket.objects.create(name='Store', owner=owner)
+        product = Product.objects.create(barcode='3017620422003', name='Nutella')
+        ProductPrice.objects.create(supermarket=supermarket, product=product, price=Decimal('2.00'))
+        for quantity, price in ((5, '2.00'), (3, '2.20'), (4, '2.50')):
+            InventoryItem.objects.add_quantity(supermarket, product, date(2030, 1, 31), quantity,
+                                               store_price=Decimal(price))
+
+        summary = import_price_list(supermarket, SimpleUploadedFile(
+            'prices.csv', b'barcode,price\n3017620422003,2.50\n'))
+
+        self.assertEqual((summary['cascaded'], summary['merged'], summary['errors']), (0, 2, []))
+        self.assertEqual(list(InventoryItem.objects.values_list('store_price', 'quantity')),
+                         [(Decimal('2.50'), 12)])
@@ -17,6 +17,7 @@ path(
         views.manage_product_prices_view,
         name='product_price_list'  # <-- This name must match the one in your template
     ),
+path('<int:supermarket_id>/manage-prices/import/', views.price_list_import_view, name='price_list_import'),
 path(
         '<int:supermarket_id>/manage-prices/<str:product_barcode>/update/',
         views.update_product_defaults_view,
@@ -28,6 +28,15 @@ from Inventory.models import InventoryItem, Product
 
 # Import models and forms from THIS app
 from pricing.models import DiscountedSale, WastageRecord
+from Inventory.bulk_import import ImportFileError
+from .forms import PriceListImportForm
+from .price_import import import_price_list
+from .listing import product_price_listing, filtered_products, ListingPaginator, PAGE_SIZE, LISTING_ORDERING
+from Inventory.gtin import canonical_barcode
+from Inventory.pagination import page_number_for
+from Inventory.urgent_items import api_payload, urgent_items
+from Inventory.stock_status import EXPIRED, EXPIRES_SOON, EXPIRES_TODAY, FRESH, status_counts
+from Inventory import reference_data
 
 
 import random
@@ -55,12 +64,8 @@ def manage_product_prices_view(request, supermarket_id):
     supermarket = get_object_or_404(Supermarket, pk=supermarket_id, owner=request.user)
 
     # Fetch related objects for the filters and forms
-    try:
-        racks = Rack.objects.filter(supermarket=supermarket)
-    except NameError:
-        racks = []  # Fallback if Rack model isn't imported
-
-    categories = Category.objects.all()
+    racks = reference_data.racks(supermarket.pk)
+    categories = reference_data.categories()
 
     # --- POST (Create/Update Price & Defaults) Logic ---
     if request.method == 'POST':
@@ -73,7 +78,7 @@ def manage_product_prices_view(request, supermarket_id):
             messages.error(request, "Invalid product.")
             return redirect(request.META.get('HTTP_REFERER', 'product_pricing:product_price_list'))
 
-        product = get_object_or_404(Product, pk=product_barcode)
+        product = get_object_or_404(Product.objects.for_stored_barcode(product_barcode))
 
         try:
             # Prepare the new price value
@@ -123,48 +128,25 @@ def manage_product_prices_view(request, supermarket_id):
         return redirect(redirect_url)
 
     # --- GET Request (Read) Logic ---
-
-    price_subquery = ProductPrice.objects.filter(product=OuterRef('pk'), supermarket=supermarket).values('price')[:1]
-    cat_name_subquery = ProductPrice.objects.filter(product=OuterRef('pk'), supermarket=supermarket).values(
-        'default_category__name')[:1]
-    rack_name_subquery = ProductPrice.objects.filter(product=OuterRef('pk'), supermarket=supermarket).values(
-        'default_rack__name')[:1]
-
-    product_list = Product.objects.annotate(
-        current_price=Subquery(price_subquery, output_field=DecimalField()),
-        current_category=Subquery(cat_name_subquery),
-        current_rack=Subquery(rack_name_subquery)
-    ).order_by('name')
-
-    # --- Filters ---
     query = request.GET.get('q', '')
     category_id = request.GET.get('category', '')
     rack_id_filter = request.GET.get('rack', '')
     price_status = request.GET.get('price_status', '')
 
-    if query:
-        product_list = product_list.filter(
-            Q(name__icontains=query) | Q(brand__icontains=query) | Q(barcode__icontains=query))
-    if category_id:
-        product_list = product_list.filter(price_listings__default_category__id=category_id)
-    if rack_id_filter:
-        product_list = product_list.filter(price_listings__default_rack__id=rack_id_filter)
-    if price_status == 'set':
-        product_list = product_list.filter(current_price__isnull=False)
-    elif price_status == 'unset':
-        product_list = product_list.filter(current_price__isnull=True)
-
-    paginator = Paginator(product_list.distinct(), 30)
+    filters = {
+        'query': query, 'category_id': category_id,
+        'rack_id': rack_id_filter, 'price_status': price_status,
+    }
+    product_list = product_price_listing(supermarket, **filters)
+
+    paginator = ListingPaginator(product_list, PAGE_SIZE,
+                                 count_queryset=filtered_products(supermarket, **filters))
     page_number = request.GET.get('page')
 
     # --- "Scan to Find" Feature Logic ---
-    if query and not page_number and Product.objects.filter(barcode=query).exists():
-        product_ids = list(product_list.values_list('barcode', flat=True))
-        try:
-            index = product_ids.index(query)
-            page_number = (index // 30) + 1
-        except ValueError:
-            page_number = 1
+    if query and not page_number:
+        page_number = page_number_for(paginator.count_queryset, canonical_barcode(query), LISTING_ORDERING,
+                                      PAGE_SIZE, field='canonical_barcode') or 1
     # --- End "Scan to Find" Logic ---
 
     page_obj = paginator.get_page(page_number)
@@ -180,50 +162,6 @@ def manage_product_prices_view(request, supermarket_id):
         'price_status_filter': price_status,
     }
     return render(request, 'pricing/manage_product_prices.html', context)
-    # --- GET Request (Read) Logic ---
-    # (Your GET logic appears correct and does not need changes)
-    price_subquery = ProductPrice.objects.filter(product=OuterRef('pk'), supermarket=supermarket).values('price')[:1]
-    cat_name_subquery = ProductPrice.objects.filter(product=OuterRef('pk'), supermarket=supermarket).values('default_category__name')[:1]
-    rack_name_subquery = ProductPrice.objects.filter(product=OuterRef('pk'), supermarket=supermarket).values('default_rack__name')[:1]
-
-    product_list = Product.objects.annotate(
-        current_price=Subquery(price_subquery, output_field=DecimalField()),
-        current_category=Subquery(cat_name_subquery),
-        current_rack=Subquery(rack_name_subquery)
-    ).order_by('name')
-
-    # --- Filters ---
-    query = request.GET.get('q', '')
-    category_id = request.GET.get('category', '')
-    rack_id = request.GET.get('rack', '')
-    price_status = request.GET.get('price_status', '')
-
-    if query:
-        product_list = product_list.filter(Q(name__icontains=query) | Q(brand__icontains=query) | Q(barcode__icontains=query))
-    if category_id:
-        product_list = product_list.filter(price_listings__default_category__id=category_id)
-    if rack_id:
-        product_list = product_list.filter(price_listings__default_rack__id=rack_id)
-    if price_status == 'set':
-        product_list = product_list.filter(current_price__isnull=False)
-    elif price_status == 'unset':
-        product_list = product_list.filter(current_price__isnull=True)
-
-    paginator = Paginator(product_list.distinct(), 30)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-
-    context = {
-        'supermarket': supermarket,
-        'page_obj': page_obj,
-        'categories': categories,
-        'racks': racks,
-        'search_query': query,
-        'category_filter': category_id,
-        'rack_filter': rack_id,
-        'price_status_filter': price_status,
-    }
-    return render(request, 'pricing/manage_product_prices.html', context)
 
 # This is the single view that handles everything
 # @login_required(login_url='account_login')
@@ -422,18 +360,12 @@ def dashboard_competitor_api(request, supermarket_id):
 @permission_classes([IsAuthenticated])
 def dashboard_stats_api(request, supermarket_id):
     supermarket = get_object_or_404(Supermarket, pk=supermarket_id, owner=request.user)
-    today = timezone.now().date()
-    stats = supermarket.inventory_items.aggregate(
-        total_items=Sum('quantity'),
-        fresh_count=Count('id', filter=Q(expiry_date__gt=today + timezone.timedelta(days=7))),
-        soon_count=Count('id', filter=Q(expiry_date__range=[today, today + timezone.timedelta(days=7)])),
-        expired_count=Count('id', GTR(expiry_date__lt=today))
-    )
+    counts = status_counts(supermarket.inventory_items.all(), timezone.localdate(), quantity=Sum('quantity'))
     return Response({
-        'total_items': stats['total_items'] or 0,
-        'fresh_count': stats['fresh_count'],
-        'expires_soon_count': stats['soon_count'],
-        'expired_count': stats['expired_count']
+        'total_items': counts['quantity'] or 0,
+        'fresh_count': counts[FRESH],
+        'expires_soon_count': counts[EXPIRES_TODAY] + counts[EXPIRES_SOON],
+        'expired_count': counts[EXPIRED]
     })
 
 
@@ -442,32 +374,10 @@ def dashboard_stats_api(request, supermarket_id):
 def urgent_items_api(request, supermarket_id):
     """
     API endpoint for the "Urgent Attention" list on the dashboard.
-    ✅ This is the single, correct version of this function.
+    Shares its one-query list with Inventory's endpoint (Inventory/urgent_items.py).
     """
     supermarket = get_object_or_404(Supermarket, pk=supermarket_id, owner=request.user)
-    today = timezone.now().date()
-    urgent_items_qs = supermarket.inventory_items.filter(
-        expiry_date__lt=today + timezone.timedelta(days=8)
-    ).select_related('product', 'rack', 'applied_rule', 'promotion').order_by('expiry_date')
-
-    data = []
-    for item in urgent_items_qs:
-        days_diff = (item.expiry_date - today).days
-        data.append({
-            'id': item.id,
-            'product': {
-                'name': item.product.name,
-                'brand': item.product.brand,
-                'image_url': item.product.display_image_url,  # ✅ Use smart property
-                'barcode': item.product.barcode
-            },
-            'quantity': item.quantity,
-            'rack_name': item.rack.name if item.rack else 'N/A',  # ✅ Use rack.name
-            'status': item.status,
-            'days_left': days_diff if days_diff >= 0 else 0,
-            'days_since_expiry': abs(days_diff) if days_diff < 0 else 0
-        })
-    return Response(data)
+    return Response(api_payload(urgent_items(supermarket)))
 
 
 # Add this new view to your product_price/views.py
@@ -484,7 +394,7 @@ def update_product_defaults_view(request, supermarket_id, product_barcode):
     Handles the POST submission from the "Edit Defaults" modal.
     """
     supermarket = get_object_or_404(Supermarket, pk=supermarket_id, owner=request.user)
-    product = get_object_or_404(Product, pk=product_barcode)
+    product = get_object_or_404(Product.objects.for_stored_barcode(product_barcode))
 
     # Get data from the modal form
     price_str = request.POST.get('price', '').strip()
@@ -535,3 +445,32 @@ def update_product_defaults_view(request, supermarket_id, product_barcode):
     final_url = f"{list_url}?{query_params}#product-row-{product.barcode}"
 
     return redirect(final_url)
+
+
+@login_required(login_url='account_login')
+def price_list_import_view(request, supermarket_id):
+    """
+    Bulk price-list upload: diff-merges the file into ProductPrice and
+    optionally cascades the new prices to non-discounted inventory batches.
+    """
+    supermarket = get_object_or_404(Supermarket, pk=supermarket_id, owner=request.user)
+    summary = None
+
+    if request.method == 'POST':
+        form = PriceListImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            try:
+                summary = import_price_list(supermarket, form.cleaned_data['file'],
+                                            cascade=form.cleaned_data['cascade'])
+                messages.success(request, f"{len(summary['created'])} prices created, "
+                                          f"{len(summary['changed'])} changed, {summary['unchanged']} unchanged.")
+            except ImportFileError as e:
+                messages.error(request, str(e))
+    else:
+        form = PriceListImportForm()
+
+    return render(request, 'pricing/price_list_import.html', {
+        'supermarket': supermarket,
+        'form': form,
+        'summary': summary,
+    })
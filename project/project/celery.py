@@ -16,4 +16,9 @@ app.conf.beat_schedule = {
         "task": "competitor.tasks.scrape_all_products_nightly",
         "schedule": crontab(hour=5, minute=0),   # 05:00 every day
     },
+    # Expiry discounts move at midnight, competitor snapshots every few hours
+    "reprice-all-supermarkets-hourly": {
+        "task": "pricing.tasks.reprice_all_supermarkets_task",
+        "schedule": crontab(minute=5),           # hh:05 every hour
+    },
 }
@@ -115,6 +115,18 @@ CELERY_BEAT_SCHEDULE = {
     },
 }
 
+# Shared cache (same Redis as Celery). Web and Celery workers coordinate through it:
+# invalidation counters (promotions, autocomplete, packaging, reference data),
+# subscription validity and task locks. A per-process cache (LocMemCache) would keep
+# those changes inside the process that made them.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.redis.RedisCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'redis://localhost:6379/2'),
+        'KEY_PREFIX': 'project',
+    }
+}
+
 
 
 MIDDLEWARE = [
@@ -157,14 +169,42 @@ WSGI_APPLICATION = 'project.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# settings.py
+load_dotenv()
+
+# SQLite performance profile, run by Django on every new connection
+# (OPTIONS['init_command']). Web and Celery workers write concurrently:
+# - WAL lets readers carry on while one connection writes
+# - busy_timeout makes a second writer wait (ms) instead of failing with "database is locked"
+# - synchronous=NORMAL only fsyncs at WAL checkpoints (a power cut may drop the last commits, never corrupts)
+# - mmap_size / cache_size (negative = KiB) keep hot pages in memory
+# Override any of them from the environment; `manage.py benchmark_sqlite_writers` compares profiles.
+SQLITE_PRAGMAS = {
+    'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+    'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 20000)),
+    'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+    'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+    'cache_size': int(os.environ.get('SQLITE_CACHE_SIZE', -64000)),
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Persistent connections: the pragmas above run once per connection, not per request
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()),
+            # Take the write lock at BEGIN so busy_timeout applies; a deferred
+            # transaction that upgrades to a writer fails at once when another writer holds the lock
+            'transaction_mode': os.environ.get('SQLITE_TRANSACTION_MODE', 'IMMEDIATE'),
+        },
+        # Tests run on a file too: the default in-memory test database fails concurrent
+        # writers with "table is locked" instead of applying busy_timeout
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
-# settings.py
-load_dotenv()
 # DATABASES = {
 #     'default': {
 #         'ENGINE': 'django.db.backends.postgresql',
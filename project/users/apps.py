@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_save, post_delete
 
 
 class UsersConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "users"
+
+    def ready(self):
+        from . import subscriptions
+
+        Subscription = self.get_model("Subscription")
+        post_save.connect(subscriptions.subscription_changed, sender=Subscription,
+                          dispatch_uid="subscription_cache_saved")
+        post_delete.connect(subscriptions.subscription_changed, sender=Subscription,
+                            dispatch_uid="subscription_cache_deleted")
@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
 from users.models import Subscription
+from users.subscriptions import invalidate
 from django.utils import timezone
 import datetime
 
@@ -17,8 +18,10 @@ class Command(BaseCommand):
             end_date__lt=now  # The end_date is before now
         )
 
-        # Deactivate them
+        # Deactivate them; update() sends no post_save, so drop the cached validity here
+        user_ids = list(expired_subs.values_list('user_id', flat=True))
         count = expired_subs.update(is_active=False)
+        invalidate(*user_ids)
 
         if count > 0:
             self.stdout.write(self.style.SUCCESS(f'Successfully deactivated {count} expired subscriptions.'))
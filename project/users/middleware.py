@@ -2,37 +2,37 @@ from django.shortcuts import redirect
 from django.urls import reverse
 from django.contrib import messages
 from .models import Subscription
+from .subscriptions import MISSING, subscription_is_valid
 
 class SubscriptionCheckMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
 
+        # Pages that an expired user can still access, resolved once at startup
+        self.safe_paths = frozenset([
+            reverse('users:subscription_renew'),
+            reverse('account_logout'),      # The logout URL
+            # Add any other "safe" URLs, like a contact page
+        ])
+
     def __call__(self, request):
         # Check if the user is authenticated, not staff, and not already on a "safe" page
         if request.user.is_authenticated and not request.user.is_staff:
 
-            # Define pages that an expired user can still access
-            safe_paths = [
-                reverse('users:subscription_renew'),  # <-- THE FIX
-                reverse('account_logout'),      # The logout URL
-                # Add any other "safe" URLs, like a contact page
-            ]
-
             # Prevent redirect loops
-            if request.path in safe_paths:
+            if request.path in self.safe_paths:
                 return self.get_response(request)
 
-            # Get the subscription. The @property 'is_valid' does all the work
-            try:
-                if not request.user.subscription.is_valid:
-                    messages.warning(request, "Your plan has expired. Please renew your subscription to continue.")
-                    # This redirect was already correct
-                    return redirect('users:subscription_renew')
-            except Subscription.DoesNotExist:
+            # Cached per user until the plan's end_date (see users/subscriptions.py)
+            valid = subscription_is_valid(request.user)
+            if valid is MISSING:
                 # This shouldn't happen because of your signal, but it's safe to handle
                 Subscription.objects.create(user=request.user)
                 messages.info(request, "Welcome! Your free plan has been set up.")
+            elif not valid:
+                messages.warning(request, "Your plan has expired. Please renew your subscription to continue.")
+                return redirect('users:subscription_renew')
 
         # Continue to the requested view
         response = self.get_response(request)
-        return response
\ No newline at end of file
+        return response
@@ -0,0 +1,62 @@
+"""
+Cached subscription validity, read by SubscriptionCheckMiddleware on every request.
+
+subscription_is_valid(user) answers from the cache and only queries the
+Subscription table on a miss. A valid Pro plan is cached until its end_date,
+so it turns invalid on time without a query per request; everything else is
+cached for MAX_TTL. Subscription saves/deletes drop the user's entry (see
+UsersConfig.ready), and bulk updates that bypass signals must call
+invalidate() themselves (check_subscriptions does).
+
+The entries live in the shared cache (settings.CACHES), so an invalidation
+from an admin edit, a renewal or the management command reaches every web
+worker. MAX_TTL only bounds the damage of a lost invalidation.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Subscription
+
+MAX_TTL = 5 * 60  # seconds
+
+MISSING = 'missing'
+
+
+def _key(user_id):
+    return f"users:subscription_valid:{user_id}"
+
+
+def _ttl(subscription, valid):
+    if valid and subscription.plan == Subscription.PLAN_PRO:
+        seconds_left = (subscription.end_date - timezone.now()).total_seconds()
+        return max(1, min(MAX_TTL, int(seconds_left)))
+    return MAX_TTL
+
+
+def subscription_is_valid(user):
+    """
+    True / False for the user's subscription, or MISSING if the user has none
+    (never cached, the middleware creates one).
+    """
+    valid = cache.get(_key(user.pk))
+    if valid is not None:
+        return valid
+
+    subscription = Subscription.objects.filter(user_id=user.pk).first()
+    if subscription is None:
+        return MISSING
+    valid = subscription.is_valid
+    cache.set(_key(user.pk), valid, timeout=_ttl(subscription, valid))
+    return valid
+
+
+def invalidate(*user_ids):
+    keys = [_key(user_id) for user_id in user_ids]
+    cache.delete_many(keys)
+    # Again once the change is committed: a request that read the old row meanwhile may have re-cached it
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def subscription_changed(sender, instance, **kwargs):
+    invalidate(instance.user_id)